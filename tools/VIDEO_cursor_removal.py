@@ -28,13 +28,18 @@ import sys
 import cv2
 import time
 import glob
+import queue
+import threading
+import collections
 import numpy as np
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace as dc_replace
+from typing import List, Tuple, Optional, Dict, Callable, Iterator, Any
 import tkinter as tk
 from tkinter import ttk, filedialog
 from PIL import Image, ImageTk
 import json
+import argparse
 
 
 UI_BG = "#0b0b0b"
@@ -148,6 +153,339 @@ def inpaint_frame(frame_bgr: np.ndarray, mask: np.ndarray, method: str = "telea"
     method_flag = cv2.INPAINT_TELEA if method == "telea" else cv2.INPAINT_NS
     return cv2.inpaint(frame_bgr, (mask > 0).astype(np.uint8) * 255, radius, method_flag)
 
+def mask_from_bbox(shape: Tuple[int, int], bbox: Tuple[int, int, int, int], dilation: int = 3, trueform_mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Binary mask for a detection: the trueform silhouette resized into the bbox if given, else the dilated bbox."""
+    if trueform_mask is None:
+        return create_mask_from_bbox(shape, bbox, dilation)
+    h, w = shape
+    mask = np.zeros((h, w), dtype=np.uint8)
+    x, y, bw, bh = bbox
+    tf_resized = cv2.resize(trueform_mask, (bw, bh), interpolation=cv2.INTER_NEAREST)
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(w, x + bw), min(h, y + bh)
+    if x1 > x0 and y1 > y0:
+        mask[y0:y1, x0:x1] = (tf_resized[y0-y:y1-y, x0-x:x1-x] > 0).astype(np.uint8) * 255
+    return mask
+
+def bbox_iou(a: Tuple[int,int,int,int], b: Tuple[int,int,int,int]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ax2, ay2 = ax+aw, ay+ah
+    bx2, by2 = bx+bw, by+bh
+    inter_w = max(0, min(ax2, bx2) - max(ax, bx))
+    inter_h = max(0, min(ay2, by2) - max(ay, by))
+    inter = inter_w * inter_h
+    ua = aw*ah + bw*bh - inter
+    return float(inter) / float(ua) if ua > 0 else 0.0
+
+def load_mask_png(path: Optional[str], shape: Tuple[int, int]) -> Optional[np.ndarray]:
+    if path and os.path.isfile(path):
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is not None and img.shape[:2] == tuple(shape):
+            return (img > 0).astype(np.uint8) * 255
+    return None
+
+def frame_descriptor(img_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return downscaled grayscale and color histogram as a scene descriptor."""
+    try:
+        small = cv2.resize(img_bgr, (128, 72), interpolation=cv2.INTER_AREA)
+    except Exception:
+        h, w = img_bgr.shape[:2]
+        small = cv2.resize(img_bgr, (max(16, w//10), max(16, h//10)), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5,5), 0)
+    # Color histogram in HSV for robustness
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0,1], None, [16,16], [0,180, 0,256])
+    cv2.normalize(hist, hist, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
+    return gray, hist
+
+def scene_similarity(ref_desc: Tuple[np.ndarray, np.ndarray], cand_desc: Tuple[np.ndarray, np.ndarray]) -> float:
+    """Combine grayscale MSE-based score and HSV histogram correlation to estimate scene similarity (0..1)."""
+    try:
+        ref_gray, ref_hist = ref_desc
+        c_gray, c_hist = cand_desc
+        # Histogram correlation in [0..1]
+        hc = float(cv2.compareHist(ref_hist, c_hist, cv2.HISTCMP_CORREL))
+        hc = max(0.0, min(1.0, hc))
+        # Grayscale similarity via normalized MSE -> convert to score in [0..1]
+        diff = cv2.absdiff(ref_gray, c_gray)
+        mse = float(np.mean(diff.astype(np.float32)**2))
+        # Normalize roughly by 255^2
+        nmse = mse / (255.0*255.0)
+        gs = max(0.0, 1.0 - nmse*10.0)  # tolerate some noise
+        # Combine (weighted)
+        score = 0.6*hc + 0.4*gs
+        return max(0.0, min(1.0, score))
+    except Exception:
+        return 0.0
+
+def temporal_fill(read_frame: Callable[[int], Optional[np.ndarray]], load_mask: Callable[[int], Optional[np.ndarray]], frame_count: int, fi: int, frame_bgr: np.ndarray, mask: np.ndarray, max_search: int = 120, scene_thresh: float = 0.90, index: Optional["SceneDescriptorStore"] = None) -> Optional[np.ndarray]:
+    """
+    Composite the masked region from neighboring frames that belong to the same scene.
+    Strategy:
+      1) Search backward up to max_search frames, picking frames with high scene similarity.
+      2) Copy pixels only from regions that are not masked in the candidate frame.
+      3) If region not fully filled, search forward similarly.
+      4) Return frame with filled pixels; if nothing filled, return None.
+    With a ready SceneDescriptorStore the scene check runs on the stored descriptors for the whole
+    window at once, so rejected frames are never decoded and unmasked frames skip the mask load.
+    """
+    H, W = frame_bgr.shape[:2]
+    target = frame_bgr.copy()
+    to_fill = (mask > 0)
+    if not np.any(to_fill):
+        return target
+    if index is not None and index.is_ready():
+        return _temporal_fill_indexed(read_frame, load_mask, index, fi, frame_bgr, mask, max_search, scene_thresh)
+    # Precompute reference descriptor for scene matching
+    ref_desc = frame_descriptor(frame_bgr)
+    filled_any = False
+    def try_composite_from(idx: int) -> bool:
+        nonlocal target, to_fill
+        cand = read_frame(idx)
+        if cand is None:
+            return False
+        # Scene check
+        sim = scene_similarity(ref_desc, frame_descriptor(cand))
+        if sim < scene_thresh:
+            return False
+        # Respect candidate's saved mask (avoid copying its corrupted pixels)
+        cm = load_mask(idx)
+        valid = np.ones((H, W), dtype=bool) if cm is None else (cm == 0)
+        # Copy only where we still need fill and candidate is valid
+        sel = to_fill & valid
+        if not np.any(sel):
+            return False
+        target[sel] = cand[sel]
+        to_fill[sel] = False
+        return True
+    # Backward
+    for k in range(1, max_search+1):
+        j = fi - k
+        if j < 0:
+            break
+        if try_composite_from(j):
+            filled_any = True
+        if not np.any(to_fill):
+            break
+    # Forward if needed
+    if np.any(to_fill):
+        for k in range(1, max_search+1):
+            j = fi + k
+            if j >= frame_count:
+                break
+            if try_composite_from(j):
+                filled_any = True
+            if not np.any(to_fill):
+                break
+    if filled_any:
+        # For any remaining holes, do a small Telea pass on the result
+        remain = (to_fill.astype(np.uint8) * 255)
+        try:
+            out = inpaint_frame(target, remain, method='telea', radius=2)
+        except Exception:
+            out = target
+        return out
+    return None
+
+def _temporal_fill_indexed(read_frame: Callable[[int], Optional[np.ndarray]], load_mask: Callable[[int], Optional[np.ndarray]], index: "SceneDescriptorStore", fi: int, frame_bgr: np.ndarray, mask: np.ndarray, max_search: int, scene_thresh: float) -> Optional[np.ndarray]:
+    H, W = frame_bgr.shape[:2]
+    target = frame_bgr.copy()
+    to_fill = (mask > 0)
+    backward, forward = index.candidates(fi, frame_bgr, max_search, scene_thresh)
+    filled_any = False
+    for cands in (backward, forward):
+        for j in cands:
+            if not np.any(to_fill):
+                break
+            cand = read_frame(j)
+            if cand is None:
+                continue
+            cm = load_mask(j) if index.has_mask(j) else None
+            sel = to_fill if cm is None else (to_fill & (cm == 0))
+            if not np.any(sel):
+                continue
+            target[sel] = cand[sel]
+            to_fill[sel] = False
+            filled_any = True
+    if not filled_any:
+        return None
+    # For any remaining holes, do a small Telea pass on the result
+    try:
+        return inpaint_frame(target, to_fill.astype(np.uint8) * 255, method='telea', radius=2)
+    except Exception:
+        return target
+
+def compact_frame_descriptor(img_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """frame_descriptor() reduced for storage: 64x36 blurred gray (uint8) and flattened HSV histogram (float16)."""
+    gray, hist = frame_descriptor(img_bgr)
+    small = cv2.resize(gray, SceneDescriptorStore.GRAY_SIZE, interpolation=cv2.INTER_AREA)
+    return small, hist.reshape(-1).astype(np.float16)
+
+def select_trueform_mask(frame_bgr: Optional[np.ndarray], bbox: Tuple[int,int,int,int], trueforms: Dict[str, Dict[str, np.ndarray]], base_name: str) -> Optional[np.ndarray]:
+    """Pick the trueform variant of base_name whose median best matches the frame crop at bbox."""
+    if frame_bgr is None:
+        return None
+    x, y, w, h = bbox
+    crop = frame_bgr[y:y+h, x:x+w]
+    if crop.size == 0:
+        return None
+    crop_gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    best_score = -1.0
+    best_mask = None
+    for key, data in trueforms.items():
+        if not (key == base_name or key.startswith(base_name + "_")):
+            continue
+        median = data['median']
+        mask = data['mask']
+        if median is None or mask is None:
+            continue
+        med_gray = cv2.cvtColor(median, cv2.COLOR_BGR2GRAY)
+        med_resized = cv2.resize(med_gray, (w, h), interpolation=cv2.INTER_AREA)
+        # Use normalized cross-correlation
+        try:
+            res = cv2.matchTemplate(crop_gray, med_resized, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, _ = cv2.minMaxLoc(res)
+            if max_val > best_score:
+                best_score = max_val
+                best_mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
+        except Exception:
+            continue
+    return best_mask
+
+def align_to_reference(ref: np.ndarray, img: np.ndarray) -> np.ndarray:
+    # Robust ECC alignment with fallbacks and normalization to avoid NaNs.
+    ref_gray = cv2.cvtColor(ref, cv2.COLOR_BGR2GRAY)
+    img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # Normalize to [0,1] float32 and blur slightly to reduce noise
+    ref_f = cv2.GaussianBlur(ref_gray, (3,3), 0).astype(np.float32) / 255.0
+    img_f = cv2.GaussianBlur(img_gray, (3,3), 0).astype(np.float32) / 255.0
+    # Replace any NaNs/Infs just in case
+    ref_f = np.nan_to_num(ref_f, nan=0.0, posinf=1.0, neginf=0.0)
+    img_f = np.nan_to_num(img_f, nan=0.0, posinf=1.0, neginf=0.0)
+    # Try Euclidean first, then translation
+    for warp_mode in (cv2.MOTION_EUCLIDEAN, cv2.MOTION_TRANSLATION):
+        warp_matrix = np.eye(2, 3, dtype=np.float32)
+        try:
+            criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 150, 1e-6)
+            cc, warp_matrix = cv2.findTransformECC(ref_f, img_f, warp_matrix, warp_mode, criteria)
+            if not np.isfinite(warp_matrix).all():
+                raise ValueError("warp_matrix not finite")
+            aligned = cv2.warpAffine(img, warp_matrix, (ref.shape[1], ref.shape[0]), flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REFLECT)
+            return aligned
+        except Exception as e:
+            print(f"[PRESET] ECC alignment failed ({'EUCLIDEAN' if warp_mode==cv2.MOTION_EUCLIDEAN else 'TRANSLATION'}): {e}")
+            continue
+    # Fallback: return original resized image if alignment fails
+    return img
+
+class PixelHistogramU8:
+    """
+    Per-pixel 256-bin histograms over a stream of uint8 images of one shape.
+    Gives the exact per-pixel median (same as np.median over the stack) and median absolute
+    deviation in memory proportional to the image size, not the number of samples.
+    """
+    def __init__(self, shape: Tuple[int, ...], chunk: int = 4096):
+        self.shape = tuple(int(v) for v in shape)
+        self.size = int(np.prod(self.shape))
+        self.counts = np.zeros((self.size, 256), dtype=np.uint32)
+        self.n = 0
+        self.chunk = max(1, int(chunk))
+        self._base = np.arange(self.size, dtype=np.int64) * 256
+
+    def add(self, img: np.ndarray):
+        # Every pixel owns its own row, so the fancy-indexed increment never collides
+        self.counts.reshape(-1)[self._base + np.asarray(img, dtype=np.uint8).reshape(-1)] += 1
+        self.n += 1
+
+    def merge(self, other: "PixelHistogramU8"):
+        self.counts += other.counts
+        self.n += other.n
+
+    def _median2(self, hist: np.ndarray) -> np.ndarray:
+        """Twice the median per row (sum of the two middle ranks), from histogram rows."""
+        cum = np.cumsum(hist, axis=1)
+        lo = np.argmax(cum > (self.n - 1) // 2, axis=1)
+        hi = np.argmax(cum > self.n // 2, axis=1)
+        return lo + hi
+
+    def median(self) -> np.ndarray:
+        m2 = np.empty(self.size, dtype=np.int64)
+        for s in range(0, self.size, self.chunk):
+            m2[s:s+self.chunk] = self._median2(self.counts[s:s+self.chunk])
+        return (m2 / 2.0).reshape(self.shape)
+
+    def median_and_mad(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-pixel median and MAD; deviations are histogrammed in half steps so both stay exact."""
+        med = np.empty(self.size, dtype=np.float32)
+        mad = np.empty(self.size, dtype=np.float32)
+        v2 = 2 * np.arange(256, dtype=np.int64)
+        for s in range(0, self.size, self.chunk):
+            c = self.counts[s:s+self.chunk]
+            k = c.shape[0]
+            m2 = self._median2(c)
+            dev = np.abs(v2[None, :] - m2[:, None])  # 0..510
+            idx = (np.arange(k, dtype=np.int64)[:, None] * 511 + dev).ravel()
+            dev_hist = np.bincount(idx, weights=c.ravel(), minlength=k * 511).reshape(k, 511)
+            med[s:s+k] = m2 / 2.0
+            mad[s:s+k] = self._median2(dev_hist) / 4.0
+        return med.reshape(self.shape), mad.reshape(self.shape)
+
+def build_trueform_from_crops(crops: List[np.ndarray], workers: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Median image and stable-shape mask from many cursor crops.
+    Crops are aligned to the first one with ECC on a thread pool; each worker folds its aligned crops
+    into a PixelHistogramU8 and an edge counter, so RAM stays bounded for 10k+ samples.
+    """
+    # Determine reference size (median) and align all crops to first reference using ECC
+    H = int(np.median([c.shape[0] for c in crops]))
+    W = int(np.median([c.shape[1] for c in crops]))
+    ref = cv2.resize(crops[0], (W, H), interpolation=cv2.INTER_AREA)
+    workers = workers if workers > 0 else min(8, os.cpu_count() or 2)
+    parts = [p for p in np.array_split(np.arange(len(crops)), max(1, min(workers, len(crops)))) if p.size]
+
+    def accumulate(idx: np.ndarray) -> Tuple[PixelHistogramU8, np.ndarray]:
+        hist = PixelHistogramU8((H, W, 3))
+        edges = np.zeros((H, W), dtype=np.uint32)
+        for i in idx:
+            img = align_to_reference(ref, cv2.resize(crops[int(i)], (W, H), interpolation=cv2.INTER_AREA))
+            hist.add(img)
+            gray = cv2.cvtColor(img.astype(np.uint8), cv2.COLOR_BGR2GRAY)
+            edges += cv2.Canny(gray, 50, 150) > 0
+        return hist, edges
+
+    if len(parts) == 1:
+        results = [accumulate(parts[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(parts)) as ex:
+            results = list(ex.map(accumulate, parts))
+    hist, edge_sum = results[0]
+    for h, e in results[1:]:
+        hist.merge(h)
+        edge_sum += e
+    # Median image and robust variation (MAD) per pixel
+    med, mad = hist.median_and_mad()
+    median_img = med.astype(np.uint8)
+    mad_gray = np.mean(mad, axis=2)
+    # Edge consensus
+    edge_consensus = edge_sum.astype(np.float32) / max(1, hist.n)
+    # Normalize MAD via robust scaling
+    q1, q3 = np.percentile(mad_gray, [25, 75])
+    iqr = max(1e-6, q3 - q1)
+    mad_norm = np.clip((mad_gray - q1) / iqr, 0, 3.0) / 3.0  # 0..1
+    # Combine: prefer low MAD (stable across samples) and high edge consensus (consistent edges)
+    prob = (1.0 - mad_norm) * (edge_consensus ** 0.7)
+    # Threshold adaptively
+    thr = max(0.2, np.percentile(prob, 70) * 0.7)
+    mask = (prob > thr).astype(np.uint8) * 255
+    # Cleanup
+    mask = cv2.medianBlur(mask, 3)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3,3))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=1)
+    return median_img, mask
+
 # ====================== Template matching logic ======================
 class MultiScaleTemplateMatcher:
     def __init__(self, templates: Dict[str, np.ndarray], scales: List[float]):
@@ -220,6 +558,163 @@ class MultiScaleTemplateMatcher:
                     break
         return best
 
+class PyramidTemplateMatcher(MultiScaleTemplateMatcher):
+    """
+    Coarse-to-fine drop-in for MultiScaleTemplateMatcher.detect().
+
+    Every (template, scale) entry is first correlated against a downsampled copy of the frame;
+    with use_fft the frame is transformed once and that spectrum is shared by all templates
+    (window statistics come from one integral image per template size). Only the top_k coarse
+    peaks are then verified with cv2.matchTemplate in small full-resolution ROIs, on a thread
+    pool when detect() is called with parallel=True.
+    """
+    FFT_CACHE_SHAPES = 8  # Coarse frame/ROI sizes whose template spectra are kept (LRU)
+
+    def __init__(self, templates: Dict[str, np.ndarray], scales: List[float], coarse_scale: float = 0.5, top_k: int = 6, coarse_margin: float = 0.15, use_fft: bool = True):
+        self.coarse_scale = float(coarse_scale)
+        self.top_k = max(1, int(top_k))
+        self.coarse_margin = float(coarse_margin)
+        self.use_fft = bool(use_fft)
+        # entry index -> (zero-mean coarse template float32, its L2 norm); None = too small for coarse level
+        self._coarse: List[Optional[Tuple[np.ndarray, float]]] = []
+        # (frame_h, frame_w) -> conj rFFT of every coarse template padded to that frame size, LRU order;
+        # detect() runs on pipeline worker threads, so the cache is only touched under the lock
+        self._tmpl_fft: "collections.OrderedDict[Tuple[int, int], List[Optional[np.ndarray]]]" = collections.OrderedDict()
+        self._tmpl_fft_lock = threading.Lock()
+        super().__init__(templates, scales)
+
+    def _build_cache(self):
+        super()._build_cache()
+        self._coarse = []
+        with self._tmpl_fft_lock:
+            self._tmpl_fft.clear()
+        cs = self.coarse_scale
+        for _name, _s, tmpl_s, (tw_s, th_s) in self._cache:
+            cw, ch = int(round(tw_s * cs)), int(round(th_s * cs))
+            if cw < 4 or ch < 4:
+                self._coarse.append(None)
+                continue
+            t = cv2.resize(tmpl_s, (cw, ch), interpolation=cv2.INTER_AREA).astype(np.float32)
+            t0 = t - float(t.mean())
+            self._coarse.append((t0, float(np.sqrt((t0 * t0).sum()))))
+
+    def _template_ffts(self, shape: Tuple[int, int]) -> List[Optional[np.ndarray]]:
+        with self._tmpl_fft_lock:
+            ffts = self._tmpl_fft.get(shape)
+            if ffts is not None:
+                self._tmpl_fft.move_to_end(shape)
+                return ffts
+        # Computed outside the lock; a concurrent miss on the same shape just does the work twice
+        ffts = []
+        for entry in self._coarse:
+            if entry is None or entry[0].shape[0] > shape[0] or entry[0].shape[1] > shape[1]:
+                ffts.append(None)
+            else:
+                ffts.append(np.conj(np.fft.rfft2(entry[0], s=shape)))
+        with self._tmpl_fft_lock:
+            self._tmpl_fft[shape] = ffts
+            self._tmpl_fft.move_to_end(shape)
+            while len(self._tmpl_fft) > self.FFT_CACHE_SHAPES:
+                self._tmpl_fft.popitem(last=False)
+        return ffts
+
+    def _coarse_peaks(self, small: np.ndarray) -> List[Tuple[float, int, int, int]]:
+        """Best (score, entry, x, y) per entry on the coarse level, TM_CCOEFF_NORMED semantics."""
+        H, W = small.shape[:2]
+        peaks: List[Tuple[float, int, int, int]] = []
+        if self.use_fft:
+            spec = np.fft.rfft2(small.astype(np.float32))
+            ffts = self._template_ffts((H, W))
+            sums, sqsums = cv2.integral2(small, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+            window_cache: Dict[Tuple[int, int], np.ndarray] = {}
+        for k, entry in enumerate(self._coarse):
+            if entry is None:
+                continue
+            t0, tnorm = entry
+            ch, cw = t0.shape
+            if ch > H or cw > W or tnorm <= 1e-6:
+                continue
+            if self.use_fft and ffts[k] is not None:
+                corr = np.fft.irfft2(spec * ffts[k], s=(H, W))[:H-ch+1, :W-cw+1]
+                den = window_cache.get((ch, cw))
+                if den is None:
+                    # sqrt of per-window variance * n, from the integral images (shared per template size)
+                    S = sums[ch:, cw:] - sums[:-ch, cw:] - sums[ch:, :-cw] + sums[:-ch, :-cw]
+                    SS = sqsums[ch:, cw:] - sqsums[:-ch, cw:] - sqsums[ch:, :-cw] + sqsums[:-ch, :-cw]
+                    den = np.sqrt(np.maximum(SS - S * S / float(ch * cw), 0.0))
+                    window_cache[(ch, cw)] = den
+                res = np.where(den > 1e-6, corr / np.maximum(den * tnorm, 1e-6), 0.0)
+                flat = int(np.argmax(res))
+                y, x = divmod(flat, res.shape[1])
+                peaks.append((float(res[y, x]), k, x, y))
+            else:
+                t8 = np.clip(t0 + (128.0 - float(t0.mean())), 0, 255).astype(np.uint8)
+                res = cv2.matchTemplate(small, t8, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, max_loc = cv2.minMaxLoc(res)
+                peaks.append((float(max_val), k, int(max_loc[0]), int(max_loc[1])))
+        return peaks
+
+    def detect(self, frame_gray: np.ndarray, method=cv2.TM_CCOEFF_NORMED, threshold: float = 0.75, parallel: bool = False, workers: int = 0, early_stop_at: float = 0.985) -> Optional[DetectionResult]:
+        if not self._cache:
+            return None
+        cs = self.coarse_scale
+        H, W = frame_gray.shape[:2]
+        max_tw = max(e[3][0] for e in self._cache)
+        max_th = max(e[3][1] for e in self._cache)
+        # Small ROIs and non-normalized methods gain nothing from the pyramid
+        if method != cv2.TM_CCOEFF_NORMED or cs >= 1.0 or W < 3 * max_tw or H < 3 * max_th:
+            return super().detect(frame_gray, method=method, threshold=threshold, parallel=parallel, workers=workers, early_stop_at=early_stop_at)
+        small = cv2.resize(frame_gray, (max(1, int(W * cs)), max(1, int(H * cs))), interpolation=cv2.INTER_AREA)
+        peaks = self._coarse_peaks(small)
+        floor = threshold - self.coarse_margin
+        proposals = sorted((p for p in peaks if p[0] >= floor), reverse=True)[:self.top_k]
+        # Entries too small for the coarse level are still searched at full resolution
+        verify: List[Tuple[int, Optional[Tuple[int, int]]]] = [(k, (x, y)) for _, k, x, y in proposals]
+        verify += [(k, None) for k, entry in enumerate(self._coarse) if entry is None]
+        pad = int(np.ceil(2.0 / cs)) + 2
+
+        def eval_one(item: Tuple[int, Optional[Tuple[int, int]]]) -> Optional[DetectionResult]:
+            k, loc = item
+            tmpl_name, s, tmpl_s, (tw_s, th_s) = self._cache[k]
+            if loc is None:
+                x0, y0, roi = 0, 0, frame_gray
+            else:
+                cx, cy = int(round(loc[0] / cs)), int(round(loc[1] / cs))
+                x0, y0 = max(0, cx - pad), max(0, cy - pad)
+                x1, y1 = min(W, cx + tw_s + pad), min(H, cy + th_s + pad)
+                roi = frame_gray[y0:y1, x0:x1]
+            if roi.shape[0] < th_s or roi.shape[1] < tw_s:
+                return None
+            res = cv2.matchTemplate(roi, tmpl_s, cv2.TM_CCOEFF_NORMED)
+            _, max_val, _, max_loc = cv2.minMaxLoc(res)
+            if max_val < threshold:
+                return None
+            return DetectionResult(frame_index=-1, bbox=(x0 + int(max_loc[0]), y0 + int(max_loc[1]), tw_s, th_s), score=float(max_val), template_name=f"{tmpl_name}@{s:.2f}")
+
+        best: Optional[DetectionResult] = None
+        if parallel and len(verify) > 1:
+            # cv2.matchTemplate releases the GIL; results are consumed in proposal order so the
+            # early stop picks the same detection as the sequential loop
+            max_workers = workers if workers and workers > 0 else max(1, min(32, (os.cpu_count() or 4)))
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(verify))) as ex:
+                futures = [ex.submit(eval_one, item) for item in verify]
+                for i, future in enumerate(futures):
+                    det = future.result()
+                    if det is not None and (best is None or det.score > best.score):
+                        best = det
+                        if best.score >= early_stop_at:
+                            for pending in futures[i + 1:]:
+                                pending.cancel()
+                            break
+            return best
+        for item in verify:
+            det = eval_one(item)
+            if det is not None and (best is None or det.score > best.score):
+                best = det
+                if best.score >= early_stop_at:
+                    break
+        return best
+
 class GpuTemplateMatcher:
     def __init__(self, templates: Dict[str, np.ndarray], scales: List[float]):
         self.scales = scales
@@ -265,6 +760,572 @@ class GpuTemplateMatcher:
                 best_val = max_val
         return best
 
+def detect_cursor(matcher: MultiScaleTemplateMatcher, frame_bgr: np.ndarray, threshold: float, downscale: float = 1.0, parallel: bool = False) -> Optional[DetectionResult]:
+    """Full-frame detection at an optional downscale, bbox returned in original frame coordinates."""
+    gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+    s = max(0.1, float(downscale))
+    if s != 1.0:
+        gray = cv2.resize(gray, (max(1, int(gray.shape[1]*s)), max(1, int(gray.shape[0]*s))), interpolation=cv2.INTER_AREA)
+    det = matcher.detect(gray, threshold=threshold, parallel=parallel)
+    if det is None or s == 1.0:
+        return det
+    x, y, w, h = det.bbox
+    inv = 1.0 / s
+    return DetectionResult(frame_index=det.frame_index, bbox=(int(x*inv), int(y*inv), int(w*inv), int(h*inv)), score=det.score, template_name=det.template_name)
+
+# =============== Detection store ===============
+DETECTION_DTYPE = np.dtype([
+    ('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'),
+    ('score', '<f4'), ('template', '<i2'), ('source', 'u1'), ('flags', 'u1'),
+])
+
+class DetectionStore:
+    """
+    Columnar per-frame detection table replacing detections.jsonl.
+
+    One DETECTION_DTYPE row per frame index (bbox, score, template id, source id, flags) held in
+    memory and saved atomically as detections.npy, with template/source names in
+    detections_meta.json. Lookups are O(1) by frame; writes are batched and flushed every
+    flush_every puts or on flush(). A legacy detections.jsonl is imported on first open.
+    Read access mirrors the old dict cache: `fi in store`, `store[fi]` -> record dict, items().
+    """
+    FLAG_DET = 1
+    FLAG_BAD = 2
+    FLAG_GOOD = 4
+
+    def __init__(self, folder: Optional[str], frame_count: int = 0, flush_every: int = 256):
+        self.folder = folder
+        self.table = np.zeros(max(0, int(frame_count)), dtype=DETECTION_DTYPE)
+        self.templates: List[str] = []
+        self.sources: List[str] = []
+        self._name_ids: Dict[Tuple[str, str], int] = {}
+        self.flush_every = max(1, int(flush_every))
+        self._dirty = 0
+
+    @property
+    def path(self) -> Optional[str]:
+        return os.path.join(self.folder, "detections.npy") if self.folder else None
+
+    @property
+    def meta_path(self) -> Optional[str]:
+        return os.path.join(self.folder, "detections_meta.json") if self.folder else None
+
+    @property
+    def jsonl_path(self) -> Optional[str]:
+        return os.path.join(self.folder, "detections.jsonl") if self.folder else None
+
+    def open(self) -> "DetectionStore":
+        if not self.folder:
+            return self
+        if os.path.isfile(self.path):
+            try:
+                table = np.load(self.path, allow_pickle=False)
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                self._ensure_capacity(len(table) - 1)
+                self.table[:len(table)] = table
+                self.templates = list(meta.get('templates', []))
+                self.sources = list(meta.get('sources', []))
+                self._name_ids = {('template', n): i for i, n in enumerate(self.templates)}
+                self._name_ids.update({('source', n): i for i, n in enumerate(self.sources)})
+                return self
+            except Exception as e:
+                print(f"[CACHE] Failed to read detection store ({e}); re-importing JSONL if present.")
+        if os.path.isfile(self.jsonl_path):
+            n = self.import_jsonl(self.jsonl_path)
+            self.flush()
+            print(f"[CACHE] Imported {n} detections from {self.jsonl_path}")
+        return self
+
+    def _ensure_capacity(self, fi: int):
+        if fi >= len(self.table):
+            grown = np.zeros(max(fi + 1, int(len(self.table) * 1.25) + 1), dtype=DETECTION_DTYPE)
+            grown[:len(self.table)] = self.table
+            self.table = grown
+
+    def _name_id(self, kind: str, name: str) -> int:
+        key = (kind, name or "")
+        if key not in self._name_ids:
+            names = self.templates if kind == 'template' else self.sources
+            names.append(key[1])
+            self._name_ids[key] = len(names) - 1
+        return self._name_ids[key]
+
+    # ---- read (dict-like, valid detections only) ----
+    def valid_mask(self, n: Optional[int] = None) -> np.ndarray:
+        f = self.table['flags']
+        m = ((f & self.FLAG_DET) != 0) & ((f & self.FLAG_BAD) == 0)
+        if n is None:
+            return m
+        out = np.zeros(int(n), dtype=bool)
+        k = min(int(n), len(m))
+        out[:k] = m[:k]
+        return out
+
+    def frames(self) -> np.ndarray:
+        return np.flatnonzero(self.valid_mask())
+
+    def __len__(self) -> int:
+        return int(self.valid_mask().sum())
+
+    def __contains__(self, fi) -> bool:
+        try:
+            fi = int(fi)
+        except Exception:
+            return False
+        if fi < 0 or fi >= len(self.table):
+            return False
+        f = int(self.table['flags'][fi])
+        return bool(f & self.FLAG_DET) and not (f & self.FLAG_BAD)
+
+    def _record(self, fi: int) -> Dict[str, Any]:
+        r = self.table[fi]
+        t, src = int(r['template']), int(r['source'])
+        return {
+            'frame': int(fi),
+            'bbox': [int(r['x']), int(r['y']), int(r['w']), int(r['h'])],
+            'score': float(r['score']),
+            'template': self.templates[t] if 0 <= t < len(self.templates) else "",
+            'source': self.sources[src] if 0 <= src < len(self.sources) else "",
+        }
+
+    def __getitem__(self, fi: int) -> Dict[str, Any]:
+        if fi not in self:
+            raise KeyError(fi)
+        return self._record(int(fi))
+
+    def get(self, fi: int, default=None):
+        return self._record(int(fi)) if fi in self else default
+
+    def items(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for fi in self.frames():
+            yield int(fi), self._record(int(fi))
+
+    # ---- write ----
+    def put(self, fi: int, bbox: Tuple[int, int, int, int], score: float, template: str = "", source: str = "auto", flush: bool = False):
+        fi = int(fi)
+        self._ensure_capacity(fi)
+        row = self.table[fi:fi+1]
+        row['x'], row['y'], row['w'], row['h'] = (int(v) for v in bbox)
+        row['score'] = float(score)
+        row['template'] = self._name_id('template', template)
+        row['source'] = self._name_id('source', source)
+        row['flags'] = (int(row['flags'][0]) | self.FLAG_DET) & ~self.FLAG_BAD
+        self._touch(flush)
+
+    def mark_bad(self, fi: int, flush: bool = True) -> Optional[Dict[str, Any]]:
+        """Flag the stored detection at fi as rejected; returns the record it held, if any."""
+        rec = self.get(fi)
+        if rec is not None:
+            self.table['flags'][fi] |= self.FLAG_BAD
+            self._touch(flush)
+        return rec
+
+    def set_good(self, fi: int, good: bool, flush: bool = True):
+        fi = int(fi)
+        self._ensure_capacity(fi)
+        if good:
+            self.table['flags'][fi] |= self.FLAG_GOOD
+        else:
+            self.table['flags'][fi] &= ~self.FLAG_GOOD & 0xFF
+        self._touch(flush)
+
+    def _touch(self, flush: bool):
+        self._dirty += 1
+        if flush or self._dirty >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.folder or (self._dirty == 0 and os.path.isfile(self.path)):
+            return
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, self.table, allow_pickle=False)
+            os.replace(tmp, self.path)
+            tmp = self.meta_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'templates': self.templates, 'sources': self.sources}, f)
+            os.replace(tmp, self.meta_path)
+            self._dirty = 0
+        except Exception as e:
+            print(f"[CACHE] Failed to save detection store: {e}")
+
+    # ---- JSONL compatibility ----
+    def import_jsonl(self, path: str) -> int:
+        n = 0
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    d = json.loads(line)
+                    fi = int(d.get('frame', -1))
+                    if fi < 0:
+                        continue
+                    self.put(fi, d.get('bbox', [0, 0, 0, 0]), float(d.get('score') or 0.0), d.get('template', "") or "", d.get('source', "auto") or "auto")
+                    n += 1
+                except Exception:
+                    continue
+        return n
+
+    def export_jsonl(self, path: str) -> int:
+        n = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for _, rec in self.items():
+                f.write(json.dumps(rec) + "\n")
+                n += 1
+        return n
+
+# =============== Mask / inpaint sequence containers ===============
+BLOB_INDEX_DTYPE = np.dtype([
+    ('offset', '<i8'), ('length', '<i4'),
+    ('x', '<i4'), ('y', '<i4'), ('w', '<i4'), ('h', '<i4'), ('flags', 'u1'),
+])
+
+def rle_encode(mask: np.ndarray) -> np.ndarray:
+    """Run lengths of a binary image in row-major order, alternating off/on and starting with off."""
+    flat = (np.asarray(mask).ravel() > 0).astype(np.int8)
+    if flat.size == 0:
+        return np.zeros(0, dtype=np.uint32)
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(flat)) + 1, [flat.size]))
+    runs = np.diff(bounds)
+    if flat[0]:
+        runs = np.concatenate(([0], runs))
+    return runs.astype(np.uint32)
+
+def rle_decode(runs: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    vals = np.zeros(len(runs), dtype=np.uint8)
+    vals[1::2] = 255
+    return np.repeat(vals, runs.astype(np.int64)).reshape(shape)
+
+class IndexedFrameStore:
+    """
+    Append-only blob file plus a per-frame index (offset, length, ROI, flags) saved as .npy.
+
+    Records are appended to <name>.bin and the index is rewritten atomically on flush(), so a crash
+    never leaves the index pointing at partial data. Replacing or deleting a frame only touches
+    the index; the bytes it leaves behind are reclaimed by compact() on writable open() and on
+    close(). Reads share one handle behind a lock so pipeline workers can load concurrently.
+    """
+    FLAG_PRESENT = 1
+    COMPACT_DEAD_RATIO = 0.5  # Compact once this share of <name>.bin is unreferenced...
+    COMPACT_MIN_BYTES = 1 << 20  # ...and at least this many bytes are dead
+
+    def __init__(self, folder: str, name: str, frame_count: int, frame_w: int, frame_h: int, flush_every: int = 64):
+        self.folder = folder
+        self.data_path = os.path.join(folder, f"{name}.bin")
+        self.index_path = os.path.join(folder, f"{name}_index.npy")
+        self.frame_w = int(frame_w)
+        self.frame_h = int(frame_h)
+        self.index = np.zeros(max(0, int(frame_count)), dtype=BLOB_INDEX_DTYPE)
+        self.flush_every = max(1, int(flush_every))
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._reader = None
+        self._writer = None
+        self._writable = False
+
+    def open(self, writable: bool = True) -> "IndexedFrameStore":
+        # Read-only opens (shard workers, export) never compact: other processes may be reading
+        self._writable = bool(writable)
+        if os.path.isfile(self.index_path):
+            try:
+                idx = np.load(self.index_path, allow_pickle=False)
+                self._ensure_capacity(len(idx) - 1)
+                self.index[:len(idx)] = idx
+                if writable:
+                    self.compact()
+                return self
+            except Exception as e:
+                print(f"[CACHE] Failed to read {self.index_path}: {e}")
+        if writable:
+            n = self._import_legacy()
+            if n:
+                self.flush()
+                print(f"[CACHE] Imported {n} legacy PNG frames into {self.data_path}")
+        return self
+
+    def _import_legacy(self) -> int:
+        return 0
+
+    def _legacy_pngs(self) -> List[Tuple[int, str]]:
+        out = []
+        if os.path.isdir(self.folder):
+            for entry in os.scandir(self.folder):
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() == ".png" and stem.isdigit():
+                    out.append((int(stem), entry.path))
+        return sorted(out)
+
+    def _ensure_capacity(self, fi: int):
+        if fi >= len(self.index):
+            grown = np.zeros(max(fi + 1, int(len(self.index) * 1.25) + 1), dtype=BLOB_INDEX_DTYPE)
+            grown[:len(self.index)] = self.index
+            self.index = grown
+
+    def presence(self, n: Optional[int] = None) -> np.ndarray:
+        m = (self.index['flags'] & self.FLAG_PRESENT) != 0
+        if n is None:
+            return m
+        out = np.zeros(int(n), dtype=bool)
+        k = min(int(n), len(m))
+        out[:k] = m[:k]
+        return out
+
+    def __contains__(self, fi) -> bool:
+        fi = int(fi)
+        return 0 <= fi < len(self.index) and bool(self.index['flags'][fi] & self.FLAG_PRESENT)
+
+    def __len__(self) -> int:
+        return int(self.presence().sum())
+
+    def _put_blob(self, fi: int, blob: bytes, roi: Tuple[int, int, int, int], flags: int):
+        fi = int(fi)
+        with self._lock:
+            if self._writer is None:
+                os.makedirs(self.folder, exist_ok=True)
+                self._writer = open(self.data_path, 'ab')
+            offset = self._writer.seek(0, os.SEEK_END)
+            if blob:
+                self._writer.write(blob)
+            self._ensure_capacity(fi)
+            row = self.index[fi:fi+1]
+            row['offset'], row['length'] = offset, len(blob)
+            row['x'], row['y'], row['w'], row['h'] = (int(v) for v in roi)
+            row['flags'] = flags | self.FLAG_PRESENT
+            self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self.flush()
+
+    def _get_blob(self, fi: int) -> Optional[Tuple[bytes, Tuple[int, int, int, int], int]]:
+        if fi not in self:
+            return None
+        r = self.index[int(fi)]
+        roi = (int(r['x']), int(r['y']), int(r['w']), int(r['h']))
+        n = int(r['length'])
+        if n == 0:
+            return b"", roi, int(r['flags'])
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            if self._reader is None:
+                self._reader = open(self.data_path, 'rb')
+            self._reader.seek(int(r['offset']))
+            blob = self._reader.read(n)
+        return blob, roi, int(r['flags'])
+
+    def delete(self, fi: int, flush: bool = True):
+        if fi in self:
+            self.index['flags'][int(fi)] = 0
+            self._dirty += 1
+            if flush:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            if self._dirty == 0 and os.path.isfile(self.index_path):
+                return
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                tmp = self.index_path + ".tmp"
+                with open(tmp, 'wb') as f:
+                    np.save(f, self.index, allow_pickle=False)
+                os.replace(tmp, self.index_path)
+                self._dirty = 0
+            except Exception as e:
+                print(f"[CACHE] Failed to save {self.index_path}: {e}")
+
+    def compact(self, force: bool = False) -> int:
+        """
+        Rewrite <name>.bin with only the records the index still references once the dead share
+        exceeds COMPACT_DEAD_RATIO (or always with force). Both files are staged as .tmp and swapped
+        with os.replace, data first. Returns the number of bytes reclaimed.
+        """
+        self.flush()
+        with self._lock:
+            if not os.path.isfile(self.data_path):
+                return 0
+            size = os.path.getsize(self.data_path)
+            live_rows = np.flatnonzero(((self.index['flags'] & self.FLAG_PRESENT) != 0) & (self.index['length'] > 0))
+            dead = size - int(self.index['length'][live_rows].sum())
+            if dead <= 0 or (not force and (dead < self.COMPACT_MIN_BYTES or dead < size * self.COMPACT_DEAD_RATIO)):
+                return 0
+            for fh in (self._reader, self._writer):
+                if fh is not None:
+                    fh.close()
+            self._reader = self._writer = None
+            index = self.index.copy()
+            index['offset'][index['flags'] & self.FLAG_PRESENT == 0] = 0
+            index['length'][index['flags'] & self.FLAG_PRESENT == 0] = 0
+            data_tmp, index_tmp = self.data_path + ".tmp", self.index_path + ".tmp"
+            swapped = False
+            try:
+                # Live records are copied in file order so the old file is read sequentially
+                with open(self.data_path, 'rb') as src, open(data_tmp, 'wb') as dst:
+                    for fi in live_rows[np.argsort(index['offset'][live_rows], kind='stable')]:
+                        src.seek(int(index['offset'][fi]))
+                        index['offset'][fi] = dst.tell()
+                        dst.write(src.read(int(index['length'][fi])))
+                with open(index_tmp, 'wb') as f:
+                    np.save(f, index, allow_pickle=False)
+                os.replace(data_tmp, self.data_path)
+                swapped = True
+                os.replace(index_tmp, self.index_path)
+            except Exception as e:
+                # e.g. another process still has the old .bin open on Windows; keep the old files
+                print(f"[CACHE] Failed to compact {self.data_path}: {e}")
+                if swapped:
+                    # The new .bin is in place; the next flush() writes its index
+                    self.index = index
+                    self._dirty += 1
+                for tmp in (data_tmp, index_tmp):
+                    try:
+                        if os.path.exists(tmp):
+                            os.remove(tmp)
+                    except OSError:
+                        pass
+                return 0
+            self.index = index
+        print(f"[CACHE] Compacted {os.path.basename(self.data_path)}: reclaimed {dead / 1e6:.1f} MB")
+        return dead
+
+    def close(self):
+        if self._writable:
+            self.compact()
+        self.flush()
+        with self._lock:
+            for fh in (self._reader, self._writer):
+                if fh is not None:
+                    fh.close()
+            self._reader = self._writer = None
+
+class MaskSequenceStore(IndexedFrameStore):
+    """Per-frame binary masks stored as bbox-cropped run-length encodings in masks/mask_seq.bin."""
+
+    def __init__(self, folder: str, frame_count: int, frame_w: int, frame_h: int):
+        super().__init__(folder, "mask_seq", frame_count, frame_w, frame_h)
+
+    def put(self, fi: int, mask: np.ndarray):
+        ys, xs = np.nonzero(mask)
+        if xs.size == 0:
+            self._put_blob(fi, b"", (0, 0, 0, 0), 0)
+            return
+        x0, x1, y0, y1 = int(xs.min()), int(xs.max()) + 1, int(ys.min()), int(ys.max()) + 1
+        runs = rle_encode(mask[y0:y1, x0:x1])
+        self._put_blob(fi, runs.tobytes(), (x0, y0, x1 - x0, y1 - y0), 0)
+
+    def get(self, fi: int) -> Optional[np.ndarray]:
+        rec = self._get_blob(fi)
+        if rec is None:
+            return None
+        blob, (x, y, w, h), _ = rec
+        mask = np.zeros((self.frame_h, self.frame_w), dtype=np.uint8)
+        if w > 0 and h > 0:
+            mask[y:y+h, x:x+w] = rle_decode(np.frombuffer(blob, dtype=np.uint32), (h, w))
+        return mask
+
+    def _import_legacy(self) -> int:
+        n = 0
+        for fi, path in self._legacy_pngs():
+            m = load_mask_png(path, (self.frame_h, self.frame_w))
+            if m is not None:
+                self.put(fi, m)
+                n += 1
+        return n
+
+class InpaintPatchStore(IndexedFrameStore):
+    """
+    Inpainted frames stored as the repaired ROI only (PNG-encoded) in inpainted/inpaint_patches.bin.
+    A frame is rebuilt by pasting its patch onto the decoded source frame; frames left unchanged
+    store no pixels at all (FLAG_ORIGINAL).
+    """
+    FLAG_ORIGINAL = 2
+
+    def __init__(self, folder: str, frame_count: int, frame_w: int, frame_h: int):
+        super().__init__(folder, "inpaint_patches", frame_count, frame_w, frame_h)
+
+    @staticmethod
+    def encode_patch(out_bgr: np.ndarray, src_bgr: Optional[np.ndarray]) -> Tuple[Optional[Tuple[int, int, int, int]], bytes]:
+        """(roi, png bytes) for the pixels that differ from the source; (None, b"") when unchanged."""
+        if src_bgr is None or src_bgr.shape != out_bgr.shape:
+            roi = (0, 0, out_bgr.shape[1], out_bgr.shape[0])
+        else:
+            ys, xs = np.nonzero(np.any(out_bgr != src_bgr, axis=2))
+            if xs.size == 0:
+                return None, b""
+            roi = (int(xs.min()), int(ys.min()), int(xs.max()) + 1 - int(xs.min()), int(ys.max()) + 1 - int(ys.min()))
+        x, y, w, h = roi
+        ok, buf = cv2.imencode(".png", out_bgr[y:y+h, x:x+w])
+        return roi, (buf.tobytes() if ok else b"")
+
+    def put_patch(self, fi: int, roi: Optional[Tuple[int, int, int, int]], png: bytes):
+        if roi is None:
+            self._put_blob(fi, b"", (0, 0, 0, 0), self.FLAG_ORIGINAL)
+        else:
+            self._put_blob(fi, png, roi, 0)
+
+    def put(self, fi: int, out_bgr: np.ndarray, src_bgr: Optional[np.ndarray]):
+        roi, png = self.encode_patch(out_bgr, src_bgr)
+        self.put_patch(fi, roi, png)
+
+    def needs_source(self, fi: int) -> bool:
+        """False only when the stored patch covers the whole frame."""
+        if fi not in self:
+            return True
+        r = self.index[int(fi)]
+        return not (int(r['w']) == self.frame_w and int(r['h']) == self.frame_h)
+
+    def get(self, fi: int, src_bgr: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        rec = self._get_blob(fi)
+        if rec is None:
+            return None
+        blob, (x, y, w, h), flags = rec
+        if flags & self.FLAG_ORIGINAL or not blob:
+            return None if src_bgr is None else src_bgr.copy()
+        patch = cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if patch is None:
+            return None
+        if w == self.frame_w and h == self.frame_h:
+            return patch
+        if src_bgr is None:
+            return None
+        out = src_bgr.copy()
+        out[y:y+h, x:x+w] = patch
+        return out
+
+    @staticmethod
+    def _png_size(data: bytes) -> Optional[Tuple[int, int]]:
+        """(w, h) from a PNG's IHDR chunk without decoding it; None if data is not a PNG."""
+        if len(data) < 24 or data[:8] != b"\x89PNG\r\n\x1a\n" or data[12:16] != b"IHDR":
+            return None
+        return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+
+    def _import_legacy(self) -> int:
+        # Legacy PNGs are full frames: keep their bytes as-is when they match the video size,
+        # otherwise resize like the old export path did so every stored patch fits the frame
+        n = 0
+        for fi, path in self._legacy_pngs():
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if self._png_size(data) != (self.frame_w, self.frame_h):
+                    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                    if img is None:
+                        continue
+                    if img.shape[:2] != (self.frame_h, self.frame_w):
+                        img = cv2.resize(img, (self.frame_w, self.frame_h), interpolation=cv2.INTER_AREA)
+                    ok, buf = cv2.imencode(".png", img)
+                    if not ok:
+                        continue
+                    data = buf.tobytes()
+                self._put_blob(fi, data, (0, 0, self.frame_w, self.frame_h), 0)
+                n += 1
+            except Exception:
+                continue
+        return n
+
 # =============== Video utilities ===============
 class VideoReader:
     def __init__(self, path: str):
@@ -276,12 +1337,15 @@ class VideoReader:
         self.fps = float(self.cap.get(cv2.CAP_PROP_FPS)) or 30.0
         self.w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or 0
         self.h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 0
+        # Seek + read must be atomic when pipeline workers share this reader
+        self._lock = threading.Lock()
 
     def read_frame(self, index: int) -> Optional[np.ndarray]:
         if index < 0 or index >= self.frame_count:
             return None
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
-        ok, frame = self.cap.read()
+        with self._lock:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ok, frame = self.cap.read()
         if not ok:
             return None
         return frame
@@ -292,6 +1356,604 @@ class VideoReader:
         except Exception:
             pass
 
+class MotionGate:
+    """
+    Cheap frame-difference gate for sequential detection passes.
+
+    Each frame is reduced to a small grayscale thumbnail and compared (normalized L1 absdiff, as in
+    video_to_gif_cropper._compute_diff) against the frame where detection last ran. Detection is
+    needed only when the whole frame or the area around the last cursor box changed, or when
+    keyframe_interval frames have passed since the last full detection. Without a previous box, any
+    block_size thumbnail block changing by region_thresh counts too, so a small cursor appearing on a
+    static screen (far below frame_thresh as a whole-frame mean) is not skipped.
+    """
+    block_size = 4  # Thumbnail pixels per side of the blocks checked when there is no previous box
+
+    def __init__(self, frame_thresh: float = 0.004, region_thresh: float = 0.02, keyframe_interval: int = 30, size: Tuple[int, int] = (160, 90)):
+        self.frame_thresh = float(frame_thresh)
+        self.region_thresh = float(region_thresh)
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self._ref: Optional[np.ndarray] = None
+        self._since_key = 0
+        self.skipped = 0
+        self.detected = 0
+
+    def _thumb(self, frame_bgr: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY) if frame_bgr.ndim == 3 else frame_bgr
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+
+    def should_detect(self, frame_bgr: np.ndarray, last_bbox: Optional[Tuple[int, int, int, int]]) -> bool:
+        """True if full detection must run on this frame; False means carry the previous result forward."""
+        thumb = self._thumb(frame_bgr)
+        changed = self._ref is None or self._since_key >= self.keyframe_interval
+        if not changed:
+            diff = cv2.absdiff(thumb, self._ref)
+            changed = float(diff.mean()) / 255.0 > self.frame_thresh
+            if not changed and last_bbox is not None:
+                fh, fw = frame_bgr.shape[:2]
+                sx, sy = self.size[0] / float(max(1, fw)), self.size[1] / float(max(1, fh))
+                x, y, w, h = last_bbox
+                # Pad by half a box so a cursor leaving its old spot is caught too
+                x0 = max(0, int((x - w // 2) * sx)); y0 = max(0, int((y - h // 2) * sy))
+                x1 = min(self.size[0], int(np.ceil((x + w + w // 2) * sx)) + 1)
+                y1 = min(self.size[1], int(np.ceil((y + h + h // 2) * sy)) + 1)
+                if x1 > x0 and y1 > y0:
+                    changed = float(diff[y0:y1, x0:x1].mean()) / 255.0 > self.region_thresh
+            elif not changed:
+                bw, bh = max(1, self.size[0] // self.block_size), max(1, self.size[1] // self.block_size)
+                blocks = cv2.resize(diff, (bw, bh), interpolation=cv2.INTER_AREA)
+                changed = float(blocks.max()) / 255.0 > self.region_thresh
+        if changed:
+            self._ref = thumb
+            self._since_key = 0
+            self.detected += 1
+        else:
+            self._since_key += 1
+            self.skipped += 1
+        return changed
+
+class CursorMotionTracker:
+    """
+    Constant-velocity cursor predictor for sequential detection.
+
+    The next box is predicted from the last hit and a smoothed per-frame velocity, then matched
+    inside an expanding ROI ladder around the prediction (margins are multiples of the box size
+    plus the expected travel). While a track is live, a miss costs only the ladder; the full frame
+    is searched when there is no track, when a hint (e.g. a cached box) misses, or after
+    max_misses consecutive misses. Every search records mode, tries, searched area (fraction of
+    the frame) and time in `stats` so full-frame searches can be watched.
+    """
+
+    def __init__(self, ladder: Tuple[float, ...] = (0.75, 1.5, 3.0), max_misses: int = 3, max_gap: int = 1, smoothing: float = 0.5, history: int = 5000):
+        self.ladder = tuple(ladder)
+        self.max_misses = max(1, int(max_misses))
+        self.max_gap = max(0, int(max_gap))
+        self.smoothing = float(smoothing)
+        self.stats: collections.deque = collections.deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        self.bbox: Optional[Tuple[int, int, int, int]] = None
+        self.velocity = (0.0, 0.0)
+        self.last_frame: Optional[int] = None
+        self.misses = 0
+
+    def _tracked(self, fi: int) -> bool:
+        return self.bbox is not None and self.last_frame is not None and 0 <= fi - self.last_frame <= self.max_gap
+
+    def predict(self, fi: int) -> Optional[Tuple[int, int, int, int]]:
+        if not self._tracked(fi):
+            return None
+        dt = fi - self.last_frame
+        x, y, w, h = self.bbox
+        return (int(round(x + self.velocity[0] * dt)), int(round(y + self.velocity[1] * dt)), w, h)
+
+    def update(self, fi: int, bbox: Optional[Tuple[int, int, int, int]], full_searched: bool = False):
+        if bbox is not None:
+            if self._tracked(fi) and fi > self.last_frame:
+                dt = fi - self.last_frame
+                vx = (bbox[0] - self.bbox[0]) / dt
+                vy = (bbox[1] - self.bbox[1]) / dt
+                a = self.smoothing
+                self.velocity = (a * vx + (1 - a) * self.velocity[0], a * vy + (1 - a) * self.velocity[1])
+            else:
+                self.velocity = (0.0, 0.0)
+            self.bbox = tuple(int(v) for v in bbox)
+            self.misses = 0
+        else:
+            # Stopped or hidden: keep the last box, drop the motion, and space out full searches
+            self.velocity = (0.0, 0.0)
+            self.misses = 0 if full_searched else self.misses + 1
+        self.last_frame = fi
+
+    def search(self, gray: np.ndarray, fi: int, detect_fn: Callable[[np.ndarray], Optional[DetectionResult]], scale: float = 1.0, hint: Optional[Tuple[int, int, int, int]] = None) -> Optional[DetectionResult]:
+        """Detect on gray (already downscaled by `scale`); returns the bbox in full-resolution coordinates."""
+        t0 = time.perf_counter()
+        H, W = gray.shape[:2]
+        tracked = self._tracked(fi)
+        pred = hint if hint is not None else self.predict(fi)
+        det: Optional[DetectionResult] = None
+        mode, tries, area = "roi", 0, 0
+        if pred is not None:
+            dt = fi - self.last_frame if tracked else 0
+            travel = (abs(self.velocity[0]) + abs(self.velocity[1])) * dt * scale if tracked else 0.0
+            x, y, w, h = pred
+            xs, ys = int(x * scale), int(y * scale)
+            ws, hs = int(max(8, w * scale)), int(max(8, h * scale))
+            for k in self.ladder:
+                margin = int(k * max(ws, hs) + travel)
+                rx0, ry0 = max(0, xs - margin), max(0, ys - margin)
+                rx1, ry1 = min(W, xs + ws + margin), min(H, ys + hs + margin)
+                if rx1 - rx0 < 8 or ry1 - ry0 < 8:
+                    continue
+                tries += 1
+                area += (rx1 - rx0) * (ry1 - ry0)
+                d = detect_fn(gray[ry0:ry1, rx0:rx1])
+                if d is not None:
+                    bx, by, bw, bh = d.bbox
+                    det = DetectionResult(frame_index=fi, bbox=(bx + rx0, by + ry0, bw, bh), score=d.score, template_name=d.template_name)
+                    break
+                if rx0 == 0 and ry0 == 0 and rx1 == W and ry1 == H:
+                    mode = "full"
+                    break
+        if det is None and mode != "full":
+            if pred is None or hint is not None or not tracked or self.misses + 1 >= self.max_misses:
+                mode = "full"
+                tries += 1
+                area += H * W
+                det = detect_fn(gray)
+                if det is not None:
+                    det.frame_index = fi
+            else:
+                mode = "miss"
+        if det is not None and scale != 1.0:
+            x, y, w, h = det.bbox
+            inv = 1.0 / scale
+            det = DetectionResult(frame_index=fi, bbox=(int(x*inv), int(y*inv), int(w*inv), int(h*inv)), score=det.score, template_name=det.template_name)
+        self.update(fi, det.bbox if det is not None else None, full_searched=(mode == "full"))
+        self.stats.append({
+            'frame': int(fi),
+            'mode': mode,
+            'tries': tries,
+            'area': area / float(max(1, H * W)),
+            'ms': (time.perf_counter() - t0) * 1000.0,
+            'hit': det is not None,
+        })
+        return det
+
+    def summary(self) -> Dict[str, float]:
+        n = len(self.stats)
+        if n == 0:
+            return {'frames': 0, 'full_pct': 0.0, 'mean_area_pct': 0.0, 'mean_ms': 0.0}
+        full = sum(1 for st in self.stats if st['mode'] == 'full')
+        return {
+            'frames': n,
+            'full_pct': 100.0 * full / n,
+            'mean_area_pct': 100.0 * sum(st['area'] for st in self.stats) / n,
+            'mean_ms': sum(st['ms'] for st in self.stats) / n,
+        }
+
+_PIPELINE_END = object()
+
+class FramePipeline:
+    """
+    Bounded streaming pipeline: decode -> parallel process -> ordered output.
+
+    A single thread decodes frames sequentially from its own capture (grab() to skip small gaps,
+    seek only for large ones), a worker pool runs process_fn(index, frame), and run() yields
+    (index, result) in frame order so the caller can encode/write while later frames are still
+    being decoded and processed. At most ~max_in_flight frames are held in memory at once.
+    """
+
+    def __init__(self, video_path: str, process_fn: Callable[[int, Optional[np.ndarray]], Any], indices: Optional[List[int]] = None, workers: int = 0, max_in_flight: int = 32, need_frame: Optional[Callable[[int], bool]] = None, seek_gap: int = 48):
+        self.video_path = video_path
+        self.process_fn = process_fn
+        self.indices = indices
+        self.workers = workers if workers and workers > 0 else max(2, (os.cpu_count() or 4) // 2)
+        self.max_in_flight = max(2, int(max_in_flight))
+        self.need_frame = need_frame
+        self.seek_gap = max(1, int(seek_gap))
+
+    def _put(self, q: "queue.Queue", item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self, q: "queue.Queue", stop: threading.Event):
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            if not cap.isOpened():
+                print(f"[PIPELINE] Failed to open video: {self.video_path}")
+                return
+            indices = self.indices
+            if indices is None:
+                indices = range(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0)
+            pos = 0
+            for i in indices:
+                if stop.is_set():
+                    return
+                if i != pos:
+                    if i < pos or (i - pos) > self.seek_gap:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+                        pos = i
+                    else:
+                        while pos < i and cap.grab():
+                            pos += 1
+                        pos = i
+                if self.need_frame is None or self.need_frame(i):
+                    ok, frame = cap.read()
+                else:
+                    ok, frame = cap.grab(), None
+                pos += 1
+                if not self._put(q, (i, frame if ok else None), stop):
+                    return
+        except Exception as e:
+            print(f"[PIPELINE] Decode failed: {e}")
+        finally:
+            cap.release()
+            self._put(q, _PIPELINE_END, stop)
+
+    def _process_safe(self, i: int, frame: Optional[np.ndarray]):
+        try:
+            return self.process_fn(i, frame)
+        except Exception as e:
+            print(f"[PIPELINE] Processing failed at frame {i}: {e}")
+            return None
+
+    def run(self) -> Iterator[Tuple[int, Any]]:
+        frame_q: "queue.Queue" = queue.Queue(maxsize=max(2, self.workers * 2))
+        stop = threading.Event()
+        decoder = threading.Thread(target=self._decode_loop, args=(frame_q, stop), daemon=True)
+        decoder.start()
+        pending = collections.deque()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as ex:
+                while True:
+                    item = frame_q.get()
+                    if item is _PIPELINE_END:
+                        break
+                    i, frame = item
+                    pending.append((i, ex.submit(self._process_safe, i, frame)))
+                    while len(pending) >= self.max_in_flight:
+                        i0, fut = pending.popleft()
+                        yield i0, fut.result()
+                while pending:
+                    i0, fut = pending.popleft()
+                    yield i0, fut.result()
+        finally:
+            stop.set()
+            for _, fut in pending:
+                fut.cancel()
+            decoder.join(timeout=2.0)
+
+class SceneDescriptorStore:
+    """
+    Per-video scene descriptors for temporal fill, persisted as .npy memmaps in the cursor cache.
+
+    gray.npy (N,36,64 uint8), hist.npy (N,256 float16) and valid.npy (N bool) hold one compact
+    descriptor per frame; bad.npy (N bool) marks frames that were attempted but could not be decoded
+    (CAP_PROP_FRAME_COUNT often overcounts VFR/mp4 tails), so they count as indexed but are never
+    used as fill sources. meta.json records the video geometry so a different video invalidates it.
+    A mask-presence bitmap (from one folder scan) lets temporal fill skip mask loads for clean frames.
+    """
+    GRAY_SIZE = (64, 36)  # (w, h)
+    HIST_LEN = 16 * 16
+    VERSION = 1
+
+    def __init__(self, folder: str, frame_count: int, frame_w: int, frame_h: int):
+        self.folder = folder
+        self.frame_count = int(frame_count)
+        self.frame_w = int(frame_w)
+        self.frame_h = int(frame_h)
+        self.gray: Optional[np.ndarray] = None
+        self.hist: Optional[np.ndarray] = None
+        self.valid: Optional[np.ndarray] = None
+        self.bad: Optional[np.ndarray] = None
+        self.mask_present = np.zeros(self.frame_count, dtype=bool)
+
+    def _meta(self) -> Dict[str, int]:
+        return {'version': self.VERSION, 'frame_count': self.frame_count, 'w': self.frame_w, 'h': self.frame_h}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def open(self, writable: bool = False) -> bool:
+        """Map existing arrays; with writable=True create/replace them when missing or stale."""
+        meta_ok = False
+        try:
+            with open(self._path("meta.json"), 'r', encoding='utf-8') as f:
+                meta_ok = json.load(f) == self._meta()
+        except Exception:
+            meta_ok = False
+        mode = 'r+' if writable else 'r'
+        if meta_ok:
+            try:
+                self.gray = np.load(self._path("gray.npy"), mmap_mode=mode)
+                self.hist = np.load(self._path("hist.npy"), mmap_mode=mode)
+                self.valid = np.load(self._path("valid.npy"), mmap_mode=mode)
+                self._open_bad(writable)
+                return True
+            except Exception as e:
+                print(f"[INDEX] Failed to open scene index ({e}); rebuilding.")
+        if not writable:
+            return False
+        os.makedirs(self.folder, exist_ok=True)
+        gw, gh = self.GRAY_SIZE
+        fmt = np.lib.format
+        self.gray = fmt.open_memmap(self._path("gray.npy"), mode='w+', dtype=np.uint8, shape=(self.frame_count, gh, gw))
+        self.hist = fmt.open_memmap(self._path("hist.npy"), mode='w+', dtype=np.float16, shape=(self.frame_count, self.HIST_LEN))
+        self.valid = fmt.open_memmap(self._path("valid.npy"), mode='w+', dtype=bool, shape=(self.frame_count,))
+        self.bad = fmt.open_memmap(self._path("bad.npy"), mode='w+', dtype=bool, shape=(self.frame_count,))
+        with open(self._path("meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(self._meta(), f)
+        return True
+
+    def _open_bad(self, writable: bool):
+        """Map bad.npy; indexes written before it existed get an all-clear one (created when writable)."""
+        path = self._path("bad.npy")
+        if os.path.exists(path):
+            self.bad = np.load(path, mmap_mode='r+' if writable else 'r')
+        elif writable:
+            self.bad = np.lib.format.open_memmap(path, mode='w+', dtype=bool, shape=(self.frame_count,))
+        else:
+            self.bad = np.zeros(self.frame_count, dtype=bool)
+
+    def is_ready(self) -> bool:
+        """True once every frame has been attempted (indexed or found undecodable)."""
+        return self.valid is not None and self.bad is not None and bool(np.all(np.asarray(self.valid) | np.asarray(self.bad)))
+
+    def build(self, video_path: str, workers: int = 0) -> int:
+        """Fill descriptors for frames not yet indexed (resumable). Returns the number computed."""
+        if (self.valid is None or not isinstance(self.valid, np.memmap) or self.valid.mode == 'r'
+                or not isinstance(self.bad, np.memmap) or self.bad.mode == 'r'):
+            self.open(writable=True)
+        missing = [int(i) for i in np.flatnonzero(~(np.asarray(self.valid) | np.asarray(self.bad)))]
+        if not missing:
+            return 0
+        print(f"[INDEX] Indexing {len(missing)} frames for temporal fill...")
+        pipeline = FramePipeline(video_path, lambda i, f: compact_frame_descriptor(f) if f is not None else None, indices=missing, workers=workers)
+        n = 0
+        n_bad = 0
+        for i, desc in pipeline.run():
+            if desc is None:
+                self.bad[i] = True  # Attempted but undecodable: don't retry on every batch
+                n_bad += 1
+                continue
+            self.gray[i], self.hist[i] = desc
+            self.valid[i] = True
+            n += 1
+            if n % 2000 == 0:
+                self.flush()
+                print(f"[INDEX] {n}/{len(missing)}")
+        self.flush()
+        if n_bad:
+            print(f"[INDEX] {n_bad} frames could not be decoded; marked unusable.")
+        return n
+
+    def flush(self):
+        for arr in (self.gray, self.hist, self.valid, self.bad):
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+    def refresh_mask_presence(self, masks: MaskSequenceStore):
+        self.mask_present = masks.presence(self.frame_count)
+
+    def has_mask(self, fi: int) -> bool:
+        return 0 <= fi < self.frame_count and bool(self.mask_present[fi])
+
+    def similarity(self, ref_gray: np.ndarray, ref_hist: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        """Vectorized scene_similarity() of one reference against the stored descriptors at idx."""
+        h = np.asarray(self.hist[idx], dtype=np.float32)
+        r = np.asarray(ref_hist, dtype=np.float32).reshape(-1)
+        hd = h - h.mean(axis=1, keepdims=True)
+        rd = r - r.mean()
+        den = np.sqrt((hd * hd).sum(axis=1) * float((rd * rd).sum()))
+        hc = np.where(den > 1e-12, (hd @ rd) / np.maximum(den, 1e-12), 1.0)
+        hc = np.clip(hc, 0.0, 1.0)
+        d = np.asarray(self.gray[idx], dtype=np.float32) - np.asarray(ref_gray, dtype=np.float32)
+        nmse = (d * d).mean(axis=(1, 2)) / (255.0 * 255.0)
+        gs = np.clip(1.0 - nmse * 10.0, 0.0, 1.0)
+        return np.clip(0.6 * hc + 0.4 * gs, 0.0, 1.0)
+
+    def candidates(self, fi: int, frame_bgr: Optional[np.ndarray], max_search: int, scene_thresh: float) -> Tuple[List[int], List[int]]:
+        """Same-scene frames within max_search of fi, nearest first: (backward, forward)."""
+        if 0 <= fi < self.frame_count and self.valid[fi]:
+            ref_gray, ref_hist = self.gray[fi], self.hist[fi]
+        elif frame_bgr is not None:
+            ref_gray, ref_hist = compact_frame_descriptor(frame_bgr)
+        else:
+            return [], []
+        back = np.arange(fi - 1, max(-1, fi - max_search - 1), -1)
+        fwd = np.arange(fi + 1, min(self.frame_count, fi + max_search + 1))
+        out = []
+        for idx in (back, fwd):
+            if idx.size == 0:
+                out.append([])
+                continue
+            idx = idx[np.asarray(self.valid[idx], dtype=bool)]  # Undecodable frames have no descriptor
+            if idx.size == 0:
+                out.append([])
+                continue
+            sim = self.similarity(ref_gray, ref_hist, idx)
+            out.append([int(j) for j in idx[sim >= scene_thresh]])
+        return out[0], out[1]
+
+@dataclass
+class InpaintJob:
+    """Picklable settings snapshot for one batch-inpaint shard [start, end) handled by a worker process."""
+    video_path: str
+    output_root: str
+    start: int
+    end: int
+    frames: List[int] = field(default_factory=list)
+    method: str = "telea"
+    radius: int = 3
+    dilation: int = 5
+    max_search: int = 120
+    scene_thresh: float = 0.90
+    good_frames: frozenset = frozenset()
+    detections: Dict[int, Tuple[int, int, int, int]] = field(default_factory=dict)
+    bad_bboxes: Dict[int, List[Tuple[int, int, int, int]]] = field(default_factory=dict)
+    templates: Dict[str, np.ndarray] = field(default_factory=dict)
+    scales: List[float] = field(default_factory=lambda: [0.5, 0.75, 1.0, 1.25, 1.5])
+    threshold: float = 0.85
+    detect_downscale: float = 1.0
+    use_pyramid: bool = True
+    trueforms: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
+    preset: str = ""
+    use_trueform: bool = True
+    scene_index_dir: str = ""
+
+def inpaint_range_worker(job: InpaintJob) -> Dict[str, Any]:
+    """
+    Inpaint the listed uncached frames of one shard in a worker process.
+    Decodes the shard sequentially with its own reader and opens a second reader for temporal lookups.
+    Masks are read from the shared mask store; results come back as encoded patches under 'patches'
+    because only the parent process appends to the inpaint store.
+    """
+    # One process per core already; keep OpenCV from oversubscribing each worker
+    try:
+        cv2.setNumThreads(1)
+    except Exception:
+        pass
+    stats: Dict[str, Any] = {'done': 0, 'cached': 0, 'empty': 0, 'failed': 0, 'patches': []}
+    seq = VideoReader(job.video_path)
+    rnd: Optional[VideoReader] = None
+    shape = (seq.h, seq.w)
+    masks = MaskSequenceStore(os.path.join(job.output_root, "masks"), seq.frame_count, seq.w, seq.h).open(writable=False)
+    matcher = None
+    if job.templates:
+        matcher = (PyramidTemplateMatcher if job.use_pyramid else MultiScaleTemplateMatcher)(job.templates, job.scales)
+    load_mask = masks.get
+    index: Optional[SceneDescriptorStore] = None
+    if job.method == 'temporal' and job.scene_index_dir:
+        index = SceneDescriptorStore(job.scene_index_dir, seq.frame_count, seq.w, seq.h)
+        if index.open():
+            index.refresh_mask_presence(masks)
+        else:
+            index = None
+    frames = job.frames if job.frames else range(job.start, job.end)
+    pos = -1
+    try:
+        for fi in frames:
+            if fi >= seq.frame_count:
+                break
+            if fi in job.good_frames:
+                stats['cached'] += 1
+                continue
+            # Sequential decode; grab() across short gaps left by cached frames
+            if pos != fi:
+                if 0 <= pos < fi and fi - pos <= 48:
+                    while pos < fi and seq.cap.grab():
+                        pos += 1
+                else:
+                    seq.cap.set(cv2.CAP_PROP_POS_FRAMES, fi)
+            ok, frame = seq.cap.read()
+            pos = fi + 1
+            if not ok or frame is None:
+                stats['failed'] += 1
+                continue
+            try:
+                mask = load_mask(fi)
+                if mask is None:
+                    bbox = job.detections.get(fi)
+                    if bbox is None and matcher is not None:
+                        det = detect_cursor(matcher, frame, job.threshold, job.detect_downscale)
+                        bbox = det.bbox if det is not None else None
+                    if bbox is not None and any(bbox_iou(bbox, bb) > 0.3 for bb in job.bad_bboxes.get(fi, [])):
+                        bbox = None
+                    if bbox is not None:
+                        tfm = None
+                        if job.use_trueform and job.preset:
+                            if job.preset in job.trueforms:
+                                tfm = job.trueforms[job.preset]['mask']
+                            else:
+                                tfm = select_trueform_mask(frame, bbox, job.trueforms, job.preset)
+                        mask = mask_from_bbox(shape, bbox, job.dilation, tfm)
+                if mask is None or not np.any(mask > 0):
+                    # Record the original (empty patch) to avoid reprocessing repeatedly
+                    out = frame
+                    stats['empty'] += 1
+                elif job.method == 'temporal':
+                    if rnd is None:
+                        rnd = VideoReader(job.video_path)
+                    out = temporal_fill(rnd.read_frame, load_mask, rnd.frame_count, fi, frame, mask, job.max_search, job.scene_thresh, index=index)
+                    if out is None:
+                        out = inpaint_frame(frame, mask, method='telea', radius=job.radius)
+                else:
+                    out = inpaint_frame(frame, mask, method=job.method, radius=job.radius)
+                roi, png = InpaintPatchStore.encode_patch(out, frame)
+                stats['patches'].append((fi, roi, png))
+                stats['done'] += 1
+            except Exception as e:
+                print(f"[BATCH] Inpaint failed at frame {fi}: {e}")
+                stats['failed'] += 1
+    finally:
+        seq.release()
+        masks.close()
+        if rnd is not None:
+            rnd.release()
+    return stats
+
+# Upper bound on frames per worker shard: patches come back per shard, so an interrupt loses at most
+# about procs x this many finished frames
+INPAINT_SHARD_MAX_FRAMES = 64
+
+def run_inpaint_shards(base: InpaintJob, todo: List[int], store: InpaintPatchStore, procs: int = 0) -> Dict[str, int]:
+    """
+    Shard the uncached frames into contiguous ranges of at most INPAINT_SHARD_MAX_FRAMES and inpaint
+    them with inpaint_range_worker. Workers return encoded patches; this process appends them and
+    flushes the index per shard, so an interrupted run resumes from the last finished shards.
+    Each shard carries only its own frames' detections. procs=1 runs shards in-process.
+    """
+    procs = procs if procs > 0 else max(1, (os.cpu_count() or 2) - 1)
+    totals = {'done': 0, 'cached': 0, 'empty': 0, 'failed': 0}
+    if not todo:
+        return totals
+    first, last = todo[0], todo[-1] + 1
+    # Several shards per process keeps the pool balanced when cached frames cluster
+    shard = min(INPAINT_SHARD_MAX_FRAMES, max(16, -(-(last - first) // (procs * 4))))
+    jobs = []
+    todo_arr = np.asarray(todo)
+    for start in range(first, last, shard):
+        end = min(last, start + shard)
+        frames = [int(v) for v in todo_arr[(todo_arr >= start) & (todo_arr < end)]]
+        if frames:
+            jobs.append(dc_replace(
+                base, start=start, end=end, frames=frames,
+                good_frames=frozenset(fi for fi in frames if fi in base.good_frames),
+                detections={fi: base.detections[fi] for fi in frames if fi in base.detections},
+                bad_bboxes={fi: base.bad_bboxes[fi] for fi in frames if fi in base.bad_bboxes}))
+    print(f"[BATCH] {len(todo)} uncached frames in {len(jobs)} shards across {procs} processes")
+    t0 = time.time()
+
+    def collect(n: int, res: Dict[str, Any]):
+        for fi, roi, png in res.pop('patches', []):
+            store.put_patch(fi, roi, png)
+        store.flush()
+        for k, v in res.items():
+            totals[k] = totals.get(k, 0) + v
+        print(f"[BATCH] Shards {n}/{len(jobs)}  inpainted={totals['done']} failed={totals['failed']}  ({time.time()-t0:.1f}s)")
+
+    if procs == 1:
+        for n, job in enumerate(jobs, 1):
+            collect(n, inpaint_range_worker(job))
+    else:
+        with ProcessPoolExecutor(max_workers=procs) as ex:
+            futures = [ex.submit(inpaint_range_worker, job) for job in jobs]
+            for n, fut in enumerate(as_completed(futures), 1):
+                collect(n, fut.result())
+    print(f"[BATCH] Process pool finished: {totals}")
+    return totals
+
 def build_tracker() -> Optional[cv2.Tracker]:
     # Prefer CSRT if available
     if hasattr(cv2, 'TrackerCSRT_create'):
@@ -306,6 +1968,400 @@ def build_tracker() -> Optional[cv2.Tracker]:
     print("[WARN] No supported OpenCV tracker found. Tracking disabled.")
     return None
 
+# =============== Headless pipeline (CLI / Python API) ===============
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv", ".webm")
+HEADLESS_STEPS = ("detect", "mask", "inpaint", "export")
+
+def video_cache_root(video_path: str) -> str:
+    """<video_dir>/cursor_cache/<basename>: the same cache folder the GUI reads and writes."""
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(video_path)), "cursor_cache", base)
+
+def load_templates_folder(folder: str) -> Dict[str, np.ndarray]:
+    """Grayscale templates keyed by file name, as the GUI's dataset folder loader builds them."""
+    templates: Dict[str, np.ndarray] = {}
+    for ext in ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.webp"):
+        for p in glob.glob(os.path.join(folder, ext)):
+            img = imread_grayscale(p)
+            if img is not None:
+                templates[os.path.basename(p)] = img
+    return templates
+
+def load_trueforms_folder(folder: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """Read the <name>_trueform.png RGBA files written by Build Trueform back into {'median', 'mask'}."""
+    trueforms: Dict[str, Dict[str, np.ndarray]] = {}
+    for p in glob.glob(os.path.join(folder, "*_trueform.png")):
+        img = cv2.imread(p, cv2.IMREAD_UNCHANGED)
+        if img is None or img.ndim != 3 or img.shape[2] != 4:
+            continue
+        name = os.path.basename(p)[:-len("_trueform.png")]
+        trueforms[name] = {'median': img[:, :, :3].copy(), 'mask': (img[:, :, 3] > 0).astype(np.uint8) * 255}
+    return trueforms
+
+def load_good_frames(root: str) -> set:
+    p = os.path.join(root, "good_frames.json")
+    try:
+        with open(p, 'r', encoding='utf-8') as f:
+            return set(int(x) for x in json.load(f))
+    except Exception:
+        return set()
+
+def load_bad_bboxes(root: str) -> Dict[int, List[Tuple[int, int, int, int]]]:
+    bad: Dict[int, List[Tuple[int, int, int, int]]] = {}
+    p = os.path.join(root, "detections", "bad_detections.jsonl")
+    if os.path.isfile(p):
+        with open(p, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    d = json.loads(line)
+                    bad.setdefault(int(d['frame']), []).append(tuple(int(v) for v in d['bbox']))
+                except Exception:
+                    continue
+    return bad
+
+@dataclass
+class CursorRemovalSettings:
+    """GUI defaults for a headless run; procs is inpaint worker processes per video (0 = auto)."""
+    threshold: float = 0.85
+    scales: List[float] = field(default_factory=lambda: [0.5, 0.75, 1.0, 1.25, 1.5])
+    detect_downscale: float = 1.0
+    use_pyramid: bool = True
+    motion_gate: bool = True
+    keyframe_interval: int = 30
+    max_misses: int = 3
+    dilation: int = 5
+    method: str = "telea"
+    radius: int = 3
+    max_search: int = 120
+    scene_thresh: float = 0.90
+    preset: str = ""
+    use_trueform: bool = True
+    procs: int = 1
+    decode_workers: int = 2
+
+class HeadlessCursorRemoval:
+    """
+    Detection -> mask -> inpaint -> export for one video without Tk.
+
+    Uses the GUI's cache layout (detection store, mask / inpaint containers, good frames and bad
+    detections), so work can move between the two. Finished steps and the detection checkpoint
+    are kept in <root>/headless_state.json and every step skips what is already cached, so an
+    interrupted run picks up where it stopped.
+    """
+    CHECKPOINT_EVERY = 500
+
+    def __init__(self, video_path: str, templates: Dict[str, np.ndarray], trueforms: Optional[Dict[str, Dict[str, np.ndarray]]] = None, settings: Optional[CursorRemovalSettings] = None):
+        self.video_path = video_path
+        self.templates = templates
+        self.trueforms = trueforms or {}
+        self.settings = settings or CursorRemovalSettings()
+        self.root = video_cache_root(video_path)
+        self.state_path = os.path.join(self.root, "headless_state.json")
+        reader = VideoReader(video_path)
+        self.frame_count, self.w, self.h, self.fps = int(reader.frame_count), reader.w, reader.h, reader.fps
+        reader.release()
+        self.good_frames = load_good_frames(self.root)
+        self.bad_bboxes = load_bad_bboxes(self.root)
+        self.state: Dict[str, Any] = {'steps': {}, 'detect_next': 0}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        except Exception:
+            pass
+
+    def _save_state(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _is_bad(self, fi: int, bbox: Tuple[int, int, int, int]) -> bool:
+        return any(bbox_iou(bbox, bb) > 0.3 for bb in self.bad_bboxes.get(fi, []))
+
+    def _log(self, msg: str):
+        print(f"[HEADLESS] {os.path.basename(self.video_path)}: {msg}")
+
+    def run(self, steps=HEADLESS_STEPS, out_path: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        if force:
+            self.state = {'steps': {}, 'detect_next': 0}
+        out_path = out_path or os.path.splitext(self.video_path)[0] + "_cursor_removed.mp4"
+        report: Dict[str, Any] = {'video': self.video_path, 'frames': self.frame_count}
+        for step in HEADLESS_STEPS:
+            if step not in steps:
+                continue
+            done = self.state['steps'].get(step)
+            if done and (step != 'export' or self.state.get('export_path') == out_path):
+                self._log(f"{step} already complete")
+                continue
+            t0 = time.time()
+            if step == 'detect':
+                report[step] = self.detect()
+            elif step == 'mask':
+                report[step] = self.make_masks()
+            elif step == 'inpaint':
+                report[step] = self.inpaint()
+            else:
+                report[step] = self.export(out_path)
+            report[step + '_s'] = round(time.time() - t0, 2)
+            self.state['steps'][step] = True
+            if step == 'export':
+                self.state['export_path'] = out_path
+            self._save_state()
+        return report
+
+    def detect(self) -> Dict[str, int]:
+        cfg = self.settings
+        store = DetectionStore(os.path.join(self.root, "detections"), self.frame_count).open()
+        matcher = (PyramidTemplateMatcher if cfg.use_pyramid else MultiScaleTemplateMatcher)(self.templates, cfg.scales)
+        gate = MotionGate(keyframe_interval=cfg.keyframe_interval) if cfg.motion_gate else None
+        tracker = CursorMotionTracker(max_misses=cfg.max_misses, max_gap=cfg.keyframe_interval + 1)
+        s = max(0.1, float(cfg.detect_downscale))
+        detect_fn = lambda img: matcher.detect(img, threshold=cfg.threshold)
+        start = int(self.state.get('detect_next', 0))
+        indices = [fi for fi in range(start, self.frame_count) if fi not in self.good_frames]
+        self._log(f"detecting {len(indices)} frames from {start}")
+        prev: Optional[DetectionResult] = None
+        found = 0
+        for n, (fi, frame) in enumerate(FramePipeline(self.video_path, lambda i, f: f, indices=indices, workers=cfg.decode_workers).run(), 1):
+            if frame is None:
+                continue
+            if gate is None or gate.should_detect(frame, prev.bbox if prev is not None else None):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                if s != 1.0:
+                    gray = cv2.resize(gray, (max(1, int(gray.shape[1]*s)), max(1, int(gray.shape[0]*s))), interpolation=cv2.INTER_AREA)
+                det = tracker.search(gray, fi, detect_fn, scale=s)
+                source = "headless"
+                prev = det
+            else:
+                det = prev
+                source = "motion_gate"
+            if det is not None and not self._is_bad(fi, det.bbox):
+                store.put(fi, det.bbox, det.score, det.template_name or "", source, flush=False)
+                found += 1
+            if n % self.CHECKPOINT_EVERY == 0:
+                store.flush()
+                self.state['detect_next'] = fi + 1
+                self._save_state()
+                self._log(f"detect {fi}/{self.frame_count}")
+        store.flush()
+        self.state['detect_next'] = self.frame_count
+        ts = tracker.summary()
+        return {
+            'searched': len(indices),
+            'found': found,
+            'gated': gate.skipped if gate is not None else 0,
+            'full_frame_pct': round(ts['full_pct'], 1),
+            'mean_area_pct': round(ts['mean_area_pct'], 1),
+            'mean_ms': round(ts['mean_ms'], 2),
+        }
+
+    def _trueform_for(self, frame_bgr: Optional[np.ndarray], bbox: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        cfg = self.settings
+        if not (cfg.use_trueform and cfg.preset and self.trueforms):
+            return None
+        if cfg.preset in self.trueforms:
+            return self.trueforms[cfg.preset]['mask']
+        return select_trueform_mask(frame_bgr, bbox, self.trueforms, cfg.preset)
+
+    def make_masks(self) -> Dict[str, int]:
+        cfg = self.settings
+        dets = DetectionStore(os.path.join(self.root, "detections"), self.frame_count).open()
+        masks = MaskSequenceStore(os.path.join(self.root, "masks"), self.frame_count, self.w, self.h).open()
+        todo = np.flatnonzero(dets.valid_mask(self.frame_count) & ~masks.presence(self.frame_count))
+        todo = [int(fi) for fi in todo if int(fi) not in self.good_frames]
+        # Frames are only decoded when a trueform variant has to be picked by appearance
+        need_frame = bool(cfg.use_trueform and cfg.preset and self.trueforms and cfg.preset not in self.trueforms)
+
+        def build(fi: int, frame: Optional[np.ndarray]) -> Optional[np.ndarray]:
+            bbox = tuple(int(v) for v in dets[fi]['bbox'])
+            if self._is_bad(fi, bbox):
+                return None
+            return mask_from_bbox((self.h, self.w), bbox, cfg.dilation, self._trueform_for(frame, bbox))
+
+        made = 0
+        pipeline = FramePipeline(self.video_path, build, indices=todo, workers=cfg.decode_workers, need_frame=lambda i: need_frame)
+        for fi, mask in pipeline.run():
+            if mask is not None:
+                masks.put(fi, mask)
+                made += 1
+        masks.close()
+        return {'masks': made}
+
+    def inpaint(self) -> Dict[str, int]:
+        cfg = self.settings
+        store = InpaintPatchStore(os.path.join(self.root, "inpainted"), self.frame_count, self.w, self.h).open()
+        # Opening the mask store once here imports legacy PNG masks before workers read it
+        MaskSequenceStore(os.path.join(self.root, "masks"), self.frame_count, self.w, self.h).open().close()
+        pending = ~store.presence(self.frame_count)
+        todo = [int(fi) for fi in np.flatnonzero(pending) if int(fi) not in self.good_frames]
+        scene_dir = os.path.join(self.root, "scene_index")
+        if cfg.method == 'temporal' and todo:
+            index = SceneDescriptorStore(scene_dir, self.frame_count, self.w, self.h)
+            index.open(writable=True)
+            index.build(self.video_path, workers=cfg.decode_workers)
+            index.flush()
+        # Detection already ran for every frame, so workers get no templates and skip live detection
+        base = InpaintJob(
+            video_path=self.video_path,
+            output_root=self.root,
+            start=0,
+            end=0,
+            method=cfg.method,
+            radius=cfg.radius,
+            dilation=cfg.dilation,
+            max_search=cfg.max_search,
+            scene_thresh=cfg.scene_thresh,
+            good_frames=frozenset(self.good_frames),
+            scales=list(cfg.scales),
+            scene_index_dir=scene_dir if cfg.method == 'temporal' else "",
+        )
+        totals = run_inpaint_shards(base, todo, store, cfg.procs)
+        store.close()
+        return totals
+
+    def export(self, out_path: str) -> Dict[str, Any]:
+        store = InpaintPatchStore(os.path.join(self.root, "inpainted"), self.frame_count, self.w, self.h).open(writable=False)
+        fourcc = cv2.VideoWriter_fourcc(*('mp4v' if out_path.lower().endswith('.mp4') else 'XVID'))
+        writer = cv2.VideoWriter(out_path, fourcc, self.fps, (self.w, self.h), isColor=True)
+        if not writer.isOpened():
+            raise RuntimeError(f"Failed to open writer: {out_path}")
+        blank = np.zeros((self.h, self.w, 3), dtype=np.uint8)
+
+        def load_output_frame(i: int, src: Optional[np.ndarray]) -> np.ndarray:
+            if i in self.good_frames:
+                return src if src is not None else blank
+            img = store.get(i, src)
+            if img is not None:
+                return img
+            return src if src is not None else blank
+
+        pipeline = FramePipeline(self.video_path, load_output_frame, workers=self.settings.decode_workers,
+                                 need_frame=lambda i: i in self.good_frames or store.needs_source(i))
+        written = 0
+        try:
+            for i, out in pipeline.run():
+                writer.write(out if out is not None else blank)
+                written += 1
+        finally:
+            writer.release()
+            store.close()
+        self._log(f"exported {written} frames to {out_path}")
+        return {'path': out_path, 'frames': written}
+
+def process_video(video_path: str, templates_dir: str, settings: Optional[CursorRemovalSettings] = None, steps=HEADLESS_STEPS, out_path: Optional[str] = None, trueforms_dir: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    """Run the headless pipeline on one video; picklable entry point for process_videos()."""
+    try:
+        cv2.setNumThreads(1)
+    except Exception:
+        pass
+    try:
+        templates = load_templates_folder(templates_dir)
+        if not templates:
+            raise RuntimeError(f"No templates found in {templates_dir}")
+        trueforms = load_trueforms_folder(trueforms_dir or os.path.join(templates_dir, "trueforms"))
+        return HeadlessCursorRemoval(video_path, templates, trueforms, settings).run(steps, out_path=out_path, force=force)
+    except Exception as e:
+        print(f"[HEADLESS] {video_path}: failed: {e}")
+        return {'video': video_path, 'error': str(e)}
+
+def process_videos(videos: List[str], templates_dir: str, settings: Optional[CursorRemovalSettings] = None, jobs: int = 1, steps=HEADLESS_STEPS, out_dir: Optional[str] = None, trueforms_dir: Optional[str] = None, force: bool = False) -> List[Dict[str, Any]]:
+    """Process several videos, up to `jobs` at a time in separate processes."""
+    def out_for(v: str) -> Optional[str]:
+        if not out_dir:
+            return None
+        return os.path.join(out_dir, os.path.splitext(os.path.basename(v))[0] + "_cursor_removed.mp4")
+
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    if jobs <= 1 or len(videos) <= 1:
+        return [process_video(v, templates_dir, settings, steps, out_for(v), trueforms_dir, force) for v in videos]
+    results: Dict[str, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        futures = {ex.submit(process_video, v, templates_dir, settings, steps, out_for(v), trueforms_dir, force): v for v in videos}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+            print(f"[HEADLESS] {len(results)}/{len(videos)} videos finished")
+    return [results[v] for v in videos]
+
+def collect_videos(paths: List[str], list_file: Optional[str] = None) -> List[str]:
+    """Expand files, folders (non-recursive) and an optional one-path-per-line list file into video paths."""
+    items = list(paths)
+    if list_file:
+        with open(list_file, 'r', encoding='utf-8') as f:
+            items.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    videos: List[str] = []
+    for p in items:
+        if os.path.isdir(p):
+            videos.extend(sorted(os.path.join(p, n) for n in os.listdir(p) if n.lower().endswith(VIDEO_EXTS)))
+        elif os.path.isfile(p):
+            videos.append(p)
+        else:
+            print(f"[HEADLESS] Skipping missing path: {p}")
+    return videos
+
+def cli_main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Headless cursor removal: detection -> mask -> inpaint -> export, sharing the GUI's cursor_cache folders.",
+    )
+    parser.add_argument("videos", nargs="*", help="Video files or folders of videos")
+    parser.add_argument("--list", default=None, help="Text file with one video path per line")
+    parser.add_argument("--templates", required=True, help="Templates / dataset folder of cursor crops")
+    parser.add_argument("--trueforms", default=None, help="Trueform folder (default: <templates>/trueforms)")
+    parser.add_argument("--preset", default="", help="Trueform preset name used for mask shapes")
+    parser.add_argument("--steps", default=",".join(HEADLESS_STEPS), help="Comma-separated subset of detect,mask,inpaint,export")
+    parser.add_argument("--out-dir", default=None, help="Folder for exported videos (default: next to each input)")
+    parser.add_argument("--jobs", type=int, default=1, help="Videos processed concurrently, default 1")
+    parser.add_argument("--workers", type=int, default=0, help="Total CPU processes to use (0 = all cores)")
+    parser.add_argument("--method", default="telea", choices=["telea", "ns", "temporal"], help="Inpaint method, default telea")
+    parser.add_argument("--radius", type=int, default=3, help="Inpaint radius, default 3")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Template match threshold, default 0.85")
+    parser.add_argument("--downscale", type=float, default=1.0, help="Detection downscale, default 1.0")
+    parser.add_argument("--dilation", type=int, default=5, help="Mask dilation, default 5")
+    parser.add_argument("--keyframe", type=int, default=30, help="Motion gate keyframe interval, default 30")
+    parser.add_argument("--max-misses", type=int, default=3, help="Tracker misses before a full-frame search, default 3")
+    parser.add_argument("--no-motion-gate", action="store_true", help="Run detection on every frame")
+    parser.add_argument("--force", action="store_true", help="Ignore headless_state.json and rerun every step")
+    parser.add_argument("--report", default=None, help="Optional JSON report path")
+
+    args = parser.parse_args(argv)
+
+    videos = collect_videos(args.videos, args.list)
+    if not videos:
+        print("[ERROR] No videos to process.")
+        return 2
+    if not os.path.isdir(args.templates):
+        print(f"[ERROR] Templates folder not found: {args.templates}")
+        return 2
+    steps = tuple(s.strip() for s in args.steps.split(",") if s.strip())
+    unknown = [s for s in steps if s not in HEADLESS_STEPS]
+    if unknown:
+        print(f"[ERROR] Unknown steps: {', '.join(unknown)}")
+        return 2
+    jobs = max(1, min(args.jobs, len(videos)))
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    settings = CursorRemovalSettings(
+        threshold=args.threshold,
+        detect_downscale=args.downscale,
+        motion_gate=not args.no_motion_gate,
+        keyframe_interval=args.keyframe,
+        max_misses=args.max_misses,
+        dilation=args.dilation,
+        method=args.method,
+        radius=args.radius,
+        preset=args.preset,
+        # Split the CPU budget between concurrent videos
+        procs=max(1, workers // jobs),
+    )
+    t0 = time.time()
+    results = process_videos(videos, args.templates, settings, jobs=jobs, steps=steps, out_dir=args.out_dir, trueforms_dir=args.trueforms, force=args.force)
+    failed = [r for r in results if 'error' in r]
+    print(f"[HEADLESS] {len(results) - len(failed)}/{len(results)} videos completed in {time.time()-t0:.1f}s")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
 # =============== Main Tkinter UI ===============
 class VideoCursorRemovalApp:
     def __init__(self, root: tk.Tk):
@@ -322,11 +2378,20 @@ class VideoCursorRemovalApp:
         self.templates: Dict[str, np.ndarray] = {}
         self.scales = [0.5, 0.75, 1.0, 1.25, 1.5]
         self.matcher = MultiScaleTemplateMatcher(self.templates, scales=self.scales)
+        # Coarse-to-fine matcher (same detect() signature), selectable in SETTINGS
+        self.pyramid_matcher = PyramidTemplateMatcher(self.templates, scales=self.scales)
+        self.use_pyramid = tk.BooleanVar(value=True)
         # GPU/Parallel detection toggles
         self.use_gpu = tk.BooleanVar(value=(hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0))
         self.gpu_matcher = GpuTemplateMatcher(self.templates, scales=self.scales) if self.use_gpu.get() else None
         self.use_parallel = tk.BooleanVar(value=True)
         self.detect_downscale = tk.DoubleVar(value=1.0)  # e.g., 0.75 for speed
+        # Skip detection on static frames during Compute Detections (full detect every N frames)
+        self.motion_gate = tk.BooleanVar(value=True)
+        self.keyframe_interval = tk.IntVar(value=30)
+        # Motion-model ROI tracker for live detection; full-frame search after this many misses
+        self.track_max_misses = tk.IntVar(value=3)
+        self.tracker = CursorMotionTracker()
         self.last_detection: Optional[DetectionResult] = None
         self.tracks: Dict[int, TrackPoint] = {}  # frame_index -> track point
         self.show_detection = tk.BooleanVar(value=True)
@@ -340,11 +2405,14 @@ class VideoCursorRemovalApp:
         # Temporal inpaint settings
         self.temporal_scene_thresh = tk.DoubleVar(value=0.90)
         self.temporal_max_search = tk.IntVar(value=120)
+        # Batch inpaint worker processes (0 = auto, 1 = in-process pipeline)
+        self.inpaint_processes = tk.IntVar(value=0)
         # Frame jump UI state (1-based display)
         self.frame_entry_var = tk.StringVar(value="1")
         # Saved data usage
         self.use_saved_data = tk.BooleanVar(value=True)
-        self.detections_cache: Dict[int, Dict[str, any]] = {}
+        # Per-video detection store (frame -> record); opened lazily by _load_detections_cache
+        self.detections_cache: DetectionStore = DetectionStore(None)
         # Auto-save preview results
         self.auto_save_preview = tk.BooleanVar(value=True)
         # Debug logging toggle
@@ -381,6 +2449,11 @@ class VideoCursorRemovalApp:
         self.overlay_mask_enabled = tk.BooleanVar(value=False)
         self.mask_overlay_path = tk.StringVar(value="")
         self.mask_overlay_reader: Optional[VideoReader] = None
+        # Scene descriptor index for temporal fill (per video, lazily opened)
+        self.scene_index: Optional[SceneDescriptorStore] = None
+        # Mask / inpaint containers for the open video (opened lazily)
+        self.mask_store: Optional[MaskSequenceStore] = None
+        self.inpaint_store: Optional[InpaintPatchStore] = None
 
         self._setup_theme()
         self._build_ui()
@@ -510,6 +2583,7 @@ class VideoCursorRemovalApp:
         splace(ttk.Checkbutton(sr, text="Use GPU", variable=self.use_gpu, command=self._toggle_gpu, style="Dark.TCheckbutton"))
         splace(ttk.Checkbutton(sr, text="Use Parallel", variable=self.use_parallel, style="Dark.TCheckbutton"))
         splace(ttk.Checkbutton(sr, text="Use Saved Data", variable=self.use_saved_data, style="Dark.TCheckbutton"))
+        splace(ttk.Checkbutton(sr, text="Coarse-to-Fine", variable=self.use_pyramid, style="Dark.TCheckbutton"))
         splace(ttk.Label(sr, text="Detect Scale", style="Dark.TLabel"))
         ds_entry = tk.Entry(sr, textvariable=self.detect_downscale, width=5, bg=ENTRY_BG, fg=ENTRY_FG, insertbackground=ENTRY_FG)
         splace(ds_entry)
@@ -562,7 +2636,15 @@ class VideoCursorRemovalApp:
         deplace(ttk.Button(de, text="Detect (Frame)", command=self.detect_current_frame, style="Blue.TButton"))
         deplace(ttk.Button(de, text="Start Track", command=self.start_tracking_from_here, style="Green.TButton"))
         deplace(ttk.Button(de, text="Clear Tracks", command=self.clear_tracks, style="Green.TButton"))
-        deplace(ttk.Button(de, text="Compute Detections (JSONL)", command=self.compute_and_save_detections, style="Blue.TButton"), colspan=2)
+        deplace(ttk.Button(de, text="Compute Detections", command=self.compute_and_save_detections, style="Blue.TButton"), colspan=2)
+        deplace(ttk.Button(de, text="Export Detections (JSONL)", command=self.export_detections_jsonl, style="Blue.TButton"), colspan=2)
+        deplace(ttk.Checkbutton(de, text="Motion Gate", variable=self.motion_gate, style="Dark.TCheckbutton"))
+        deplace(ttk.Label(de, text="Keyframe", style="Dark.TLabel"))
+        kf_entry = tk.Entry(de, textvariable=self.keyframe_interval, width=5, bg=ENTRY_BG, fg=ENTRY_FG, insertbackground=ENTRY_FG)
+        deplace(kf_entry)
+        deplace(ttk.Label(de, text="Max Misses", style="Dark.TLabel"))
+        mm_entry = tk.Entry(de, textvariable=self.track_max_misses, width=5, bg=ENTRY_BG, fg=ENTRY_FG, insertbackground=ENTRY_FG)
+        deplace(mm_entry)
 
         # MASK
         mk = mask_inner; r,c,maxc = 0,0,4
@@ -601,7 +2683,11 @@ class VideoCursorRemovalApp:
         iplace(ttk.Label(ip, text="Max Search", style="Dark.TLabel"))
         ms_entry = tk.Entry(ip, textvariable=self.temporal_max_search, width=6, bg=ENTRY_BG, fg=ENTRY_FG, insertbackground=ENTRY_FG)
         iplace(ms_entry)
+        iplace(ttk.Label(ip, text="Procs", style="Dark.TLabel"))
+        pr_entry = tk.Entry(ip, textvariable=self.inpaint_processes, width=4, bg=ENTRY_BG, fg=ENTRY_FG, insertbackground=ENTRY_FG)
+        iplace(pr_entry)
         iplace(ttk.Button(ip, text="Compute All Uncached Inpaint", command=self.compute_all_uncached_inpaint, style="Green.TButton"), colspan=2)
+        iplace(ttk.Button(ip, text="Build Scene Index", command=self.build_scene_index, style="Blue.TButton"))
 
         # FINAL (exports)
         fn = final_inner; r,c,maxc = 0,0,4
@@ -633,11 +2719,15 @@ class VideoCursorRemovalApp:
             return
         if self.reader:
             self.reader.release()
+        self._close_frame_stores()
         self.reader = VideoReader(path)
         self.video_path = path
         self.cur_frame_idx = 0
         self.tracks.clear()
         self.last_detection = None
+        self.tracker.reset()
+        self.scene_index = None
+        self.detections_cache = DetectionStore(None)
         self._read_and_show()
         print(f"[VIDEO] Opened: {path} ({self.reader.w}x{self.reader.h} @ {self.reader.fps:.2f} fps, {self.reader.frame_count} frames)")
         # Default dataset directory to <video_dir>/cursor
@@ -727,19 +2817,15 @@ class VideoCursorRemovalApp:
         # Apply preview mode shortcuts first
         pmode = (self.preview_mode.get() or "SOURCE").upper()
         if pmode == "INPAINT":
-            ip = self._inpainted_path_for_frame(self.cur_frame_idx)
-            if ip and os.path.isfile(ip):
-                img = cv2.imread(ip, cv2.IMREAD_COLOR)
-                if img is not None and img.shape[:2] == (self.reader.h, self.reader.w):
-                    vis = img.copy()
+            img = self._load_inpainted_frame(self.cur_frame_idx, frame)
+            if img is not None:
+                vis = img.copy()
             # In non-SOURCE modes, skip overlays entirely
             bbox = None; det_score = None
         elif pmode == "MASK":
-            mp = self._mask_path_for_frame(self.cur_frame_idx)
-            if mp and os.path.isfile(mp):
-                mimg = cv2.imread(mp, cv2.IMREAD_GRAYSCALE)
-                if mimg is not None and mimg.shape[:2] == (self.reader.h, self.reader.w):
-                    vis = cv2.cvtColor(mimg, cv2.COLOR_GRAY2BGR)
+            mimg = self._load_saved_mask_for_frame(self.cur_frame_idx)
+            if mimg is not None:
+                vis = cv2.cvtColor(mimg, cv2.COLOR_GRAY2BGR)
             bbox = None; det_score = None
         else:
             # default SOURCE/DETECTION handled below; we allow detection bbox for DETECTION
@@ -801,7 +2887,7 @@ class VideoCursorRemovalApp:
                     except Exception:
                         bb = None
                     if bb is not None and not self._is_bad_candidate(self.cur_frame_idx, bb):
-                        tfm = self._get_trueform_mask_for_bbox(bb)
+                        tfm = self._get_trueform_mask_for_bbox(bb, frame)
                         if tfm is None:
                             mask = create_mask_from_bbox((self.reader.h, self.reader.w), bb, self.dilation.get())
                         else:
@@ -813,7 +2899,7 @@ class VideoCursorRemovalApp:
                     det2 = self._detect_bbox(frame)
                     if det2 is not None and not self._is_bad_candidate(self.cur_frame_idx, det2.bbox):
                         det_used = det2
-                        tfm = self._get_trueform_mask_for_bbox(det2.bbox)
+                        tfm = self._get_trueform_mask_for_bbox(det2.bbox, frame)
                         if tfm is None:
                             mask = create_mask_from_bbox((self.reader.h, self.reader.w), det2.bbox, self.dilation.get())
                         else:
@@ -834,12 +2920,11 @@ class VideoCursorRemovalApp:
                         if bbox is not None and det_used is not None:
                             self._load_detections_cache()
                             if (self.cur_frame_idx not in self.detections_cache):
-                                self._append_detection_jsonl(det_used, self.cur_frame_idx)
+                                self._append_detection(det_used, self.cur_frame_idx)
                                 saved_any = True
-                        # Save mask PNG if not exists
-                        mp = self._mask_path_for_frame(self.cur_frame_idx)
-                        if mp and not os.path.isfile(mp):
-                            cv2.imwrite(mp, mask)
+                        # Save mask if not stored yet
+                        if not self._has_saved_mask(self.cur_frame_idx):
+                            self._save_mask_for_frame(self.cur_frame_idx, mask)
                             self.dlog("[PREVIEW] autosave mask write")
                             saved_any = True
                     except Exception as e:
@@ -946,9 +3031,17 @@ class VideoCursorRemovalApp:
             print(f"[OVERLAY] Failed to load overlay video: {e}")
 
     # ---------- Detection & tracking ----------
-    def _detect_bbox(self, frame_bgr: np.ndarray) -> Optional[DetectionResult]:
+    def _detect_bbox(self, frame_bgr: np.ndarray, frame_index: Optional[int] = None, tracker: Optional[CursorMotionTracker] = None) -> Optional[DetectionResult]:
+        """
+        Detect the cursor via a CursorMotionTracker: ROI ladder around the predicted (or cached) box,
+        full frame only when the track is lost. Defaults to the preview tracker and the current frame.
+        """
         if not self.templates:
             return None
+        fi = self.cur_frame_idx if frame_index is None else int(frame_index)
+        if tracker is None:
+            tracker = self.tracker
+            tracker.max_misses = max(1, int(self.track_max_misses.get()))
         # Convert to grayscale and optionally downscale for speed
         gray = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
         s = max(0.1, float(self.detect_downscale.get()))
@@ -959,40 +3052,23 @@ class VideoCursorRemovalApp:
             gray_ds = gray
         thr = float(self.threshold.get())
 
-        # Optional ROI search using cached detection for this frame or last live detection
-        det: Optional[DetectionResult] = None
-        roi_img = gray_ds
-        roi_offset = (0, 0)
-        try_roi = False
-        # Try to use cached bbox for current frame
+        # Cached bbox for this frame is the best prediction when available
         self._load_detections_cache()
         cached_bbox = None
-        if self.use_saved_data.get() and (self.cur_frame_idx in self.detections_cache):
+        if self.use_saved_data.get() and (fi in self.detections_cache):
             try:
-                bb = self.detections_cache[self.cur_frame_idx].get('bbox', [0,0,0,0])
+                bb = self.detections_cache[fi].get('bbox', [0,0,0,0])
                 cached_bbox = (int(bb[0]), int(bb[1]), int(bb[2]), int(bb[3]))
             except Exception:
                 cached_bbox = None
-        src_bbox = cached_bbox if cached_bbox is not None else (self.last_detection.bbox if getattr(self, 'last_detection', None) is not None else None)
-        if src_bbox is not None:
-            x, y, w, h = src_bbox
-            xs = int(x * s); ys = int(y * s); ws = int(max(8, w * s)); hs = int(max(8, h * s))
-            margin = int(0.75 * max(ws, hs))
-            rx0 = max(0, xs - margin)
-            ry0 = max(0, ys - margin)
-            rx1 = min(gray_ds.shape[1], xs + ws + margin)
-            ry1 = min(gray_ds.shape[0], ys + hs + margin)
-            if rx1 - rx0 >= 8 and ry1 - ry0 >= 8:
-                roi_img = gray_ds[ry0:ry1, rx0:rx1]
-                roi_offset = (rx0, ry0)
-                try_roi = True
 
         def run_detect_local(img: np.ndarray) -> Optional[DetectionResult]:
             dloc = None
             if self.use_gpu.get() and self.gpu_matcher is not None:
                 dloc = self.gpu_matcher.detect(img, threshold=thr)
             if dloc is None:
-                dloc = self.matcher.detect(
+                matcher = self.pyramid_matcher if self.use_pyramid.get() else self.matcher
+                dloc = matcher.detect(
                     img,
                     threshold=thr,
                     parallel=bool(self.use_parallel.get()),
@@ -1000,35 +3076,10 @@ class VideoCursorRemovalApp:
                 )
             return dloc
 
-        # Try ROI first
-        if try_roi:
-            det = run_detect_local(roi_img)
-            if det is not None:
-                ox, oy = roi_offset
-                x, y, w, h = det.bbox
-                det = DetectionResult(
-                    frame_index=self.cur_frame_idx,
-                    bbox=(x + ox, y + oy, w, h),
-                    score=det.score,
-                    template_name=det.template_name,
-                )
-        # Fallback to full frame
-        if det is None:
-            det = run_detect_local(gray_ds)
-            if det is not None:
-                det.frame_index = self.cur_frame_idx
-        if det is None:
-            return None
-        # Rescale bbox to original image coordinates if downscaled
-        if s != 1.0:
-            x, y, w, h = det.bbox
-            inv = 1.0 / s
-            det = DetectionResult(
-                frame_index=det.frame_index,
-                bbox=(int(x*inv), int(y*inv), int(w*inv), int(h*inv)),
-                score=det.score,
-                template_name=det.template_name,
-            )
+        det = tracker.search(gray_ds, fi, run_detect_local, scale=s, hint=cached_bbox)
+        if tracker.stats:
+            st = tracker.stats[-1]
+            self.dlog(f"[DETECT] f{fi} {st['mode']} tries={st['tries']} area={st['area']*100:.1f}% {st['ms']:.1f} ms")
         return det
 
     def detect_current_frame(self):
@@ -1111,27 +3162,24 @@ class VideoCursorRemovalApp:
             return
 
         print(f"[EXPORT] Writing mask video to {out_path}")
-        chunk = 64
         total = self.reader.frame_count
-        for start in range(0, total, chunk):
-            end = min(total, start + chunk)
-            frames = [self.reader.read_frame(i) for i in range(start, end)]
-            indices = list(range(start, end))
-            if self.use_parallel.get():
-                from concurrent.futures import ThreadPoolExecutor
-                with ThreadPoolExecutor(max_workers=max(2, (os.cpu_count() or 4)//2)) as ex:
-                    results = list(ex.map(self._make_mask_for_frame_or_saved, indices, frames))
+        empty = np.zeros((self.reader.h, self.reader.w), dtype=np.uint8)
+        # Load shared caches once up front, not concurrently from pipeline workers
+        self._load_detections_cache()
+        # Good frames get an empty mask, so skip decoding them entirely
+        pipeline = self._frame_pipeline(
+            self._make_mask_for_frame_or_saved,
+            need_frame=lambda i: i not in self.good_frames,
+        )
+        for i, mask in pipeline.run():
+            # Skip masks for good frames
+            if i in self.good_frames or mask is None:
+                mask_out = empty
             else:
-                results = [self._make_mask_for_frame_or_saved(i, f) for i, f in zip(indices, frames)]
-            for i, mask in zip(indices, results):
-                # Skip masks for good frames
-                if i in self.good_frames:
-                    mask_out = np.zeros((self.reader.h, self.reader.w), dtype=np.uint8)
-                else:
-                    mask_out = mask if mask is not None else np.zeros((self.reader.h, self.reader.w), dtype=np.uint8)
-                writer.write(mask_out)
-                if i % 100 == 0:
-                    print(f"[EXPORT] Mask frame {i}/{total}")
+                mask_out = mask
+            writer.write(mask_out)
+            if i % 100 == 0:
+                print(f"[EXPORT] Mask frame {i}/{total}")
         writer.release()
         print("[STEP] Masks saved.")
         self._update_progress_labels()
@@ -1151,41 +3199,31 @@ class VideoCursorRemovalApp:
 
         print(f"[EXPORT] Writing final inpainted video from cached frames to {out_path}")
         total = int(self.reader.frame_count)
-        for i in range(total):
+        H, W = self.reader.h, self.reader.w
+        store = self._inpaint_store()
+
+        def load_output_frame(i: int, src: Optional[np.ndarray]) -> np.ndarray:
             # Use source for good frames
             if i in self.good_frames:
-                frame = self.reader.read_frame(i)
-                if frame is not None:
-                    writer.write(frame)
-                else:
-                    # Write a black frame if read fails
-                    writer.write(np.zeros((self.reader.h, self.reader.w, 3), dtype=np.uint8))
-                if i % 100 == 0:
-                    print(f"[EXPORT] Frame {i}/{total} (GOOD)")
-                continue
-            # Use cached inpainted frame
-            ipath = self._inpainted_path_for_frame(i)
-            if ipath and os.path.isfile(ipath):
-                img = cv2.imread(ipath, cv2.IMREAD_COLOR)
-                if img is None or img.shape[:2] != (self.reader.h, self.reader.w):
-                    # Fallback to source dimensions
-                    src = self.reader.read_frame(i)
-                    if src is None:
-                        src = np.zeros((self.reader.h, self.reader.w, 3), dtype=np.uint8)
-                    if img is not None and img.shape[:2] != (self.reader.h, self.reader.w):
-                        img = cv2.resize(img, (self.reader.w, self.reader.h), interpolation=cv2.INTER_AREA)
-                    out = img if img is not None else src
-                else:
-                    out = img
-                writer.write(out)
-            else:
-                # If missing, fallback to source frame
-                frame = self.reader.read_frame(i)
-                if frame is None:
-                    frame = np.zeros((self.reader.h, self.reader.w, 3), dtype=np.uint8)
-                writer.write(frame)
+                return src if src is not None else np.zeros((H, W, 3), dtype=np.uint8)
+            # Cached inpaint patch pasted onto the source frame
+            img = store.get(i, src) if store is not None else None
+            if img is not None:
+                return img
+            # If missing, fallback to source frame (decoded lazily only when needed)
+            if src is None:
+                src = self.reader.read_frame(i)
+            return src if src is not None else np.zeros((H, W, 3), dtype=np.uint8)
+
+        def needs_source(i: int) -> bool:
+            # Only legacy full-frame patches can skip decoding the source
+            return i in self.good_frames or store is None or store.needs_source(i)
+
+        pipeline = self._frame_pipeline(load_output_frame, need_frame=needs_source)
+        for i, out in pipeline.run():
+            writer.write(out if out is not None else np.zeros((H, W, 3), dtype=np.uint8))
             if i % 100 == 0:
-                print(f"[EXPORT] Frame {i}/{total}")
+                print(f"[EXPORT] Frame {i}/{total}{' (GOOD)' if i in self.good_frames else ''}")
         writer.release()
         print("[EXPORT] Final inpainted video complete.")
 
@@ -1194,31 +3232,23 @@ class VideoCursorRemovalApp:
             print("[WARN] Open a video first.")
             return
         total = int(self.reader.frame_count)
-        # Build set of frames that have detections
-        seen = set()
-        p = self._detections_jsonl_path()
-        if p and os.path.isfile(p):
-            try:
-                with open(p, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            d = json.loads(line)
-                            fi = int(d.get('frame', -1))
-                            if 0 <= fi < total:
-                                seen.add(fi)
-                        except Exception:
-                            continue
-            except Exception as e:
-                print(f"[NAV] Failed to read detections: {e}")
-        # Find next index without detection cache, skipping frames marked good
-        start = self.cur_frame_idx
-        for off in range(1, total+1):
-            idx = (start + off) % total
-            if (idx not in seen) and (idx not in self.good_frames):
-                self.cur_frame_idx = idx
-                self._read_and_show()
-                print(f"[NAV] Jumped to frame without detection: {idx}")
-                return
+        if total <= 0:
+            return
+        # Frames covered by a detection or a good mark, straight from the store's flag column
+        self._load_detections_cache()
+        covered = self.detections_cache.valid_mask(total)
+        good = [g for g in self.good_frames if 0 <= g < total]
+        if good:
+            covered[good] = True
+        # Find next index without detection cache, wrapping around
+        order = np.roll(np.arange(total), -(self.cur_frame_idx + 1))
+        missing = order[~covered[order]]
+        if missing.size:
+            idx = int(missing[0])
+            self.cur_frame_idx = idx
+            self._read_and_show()
+            print(f"[NAV] Jumped to frame without detection: {idx}")
+            return
         print("[NAV] All non-good frames have detection cache.")
 
     def compute_all_uncached_inpaint(self):
@@ -1229,68 +3259,184 @@ class VideoCursorRemovalApp:
         radius = int(self.inpaint_radius.get())
         total = int(self.reader.frame_count)
         print(f"[BATCH] Computing inpaint for uncached frames using method={method}, radius={radius}")
-        for i in range(total):
-            # Skip frames marked good
-            if i in self.good_frames:
-                continue
-            outp = self._inpainted_path_for_frame(i)
-            if outp and os.path.isfile(outp):
-                continue
-            frame = self.reader.read_frame(i)
-            if frame is None:
-                continue
-            mask = self._make_mask_for_frame_or_saved(i, frame)
+        max_search = int(self.temporal_max_search.get())
+        scene_thresh = float(self.temporal_scene_thresh.get())
+        self._load_detections_cache()
+        store = self._inpaint_store()
+        if store is None:
+            print("[BATCH] No output folder available.")
+            return
+        self._mask_store()
+        # Uncached, non-good frames straight from the patch index
+        pending = ~store.presence(total)
+        good = [g for g in self.good_frames if 0 <= g < total]
+        if good:
+            pending[good] = False
+        todo = [int(i) for i in np.flatnonzero(pending)]
+        if not todo:
+            print("[BATCH] Nothing to do; all frames cached.")
+            self._update_progress_labels()
+            return
+        if method == 'temporal':
+            # One descriptor pass up front so candidate selection never decodes rejected frames
+            self.build_scene_index()
+        procs = int(self.inpaint_processes.get() or 0)
+        if procs != 1 and self.use_parallel.get():
             try:
-                if mask is None or not np.any(mask > 0):
-                    # Fallback: save original to avoid reprocessing repeatedly
-                    if outp:
-                        cv2.imwrite(outp, frame)
-                else:
-                    if method == 'temporal':
-                        out = self._compute_temporal_fill(
-                            i,
-                            frame,
-                            mask,
-                            max_search=int(self.temporal_max_search.get()),
-                            scene_thresh=float(self.temporal_scene_thresh.get()),
-                        )
-                        if out is None:
-                            out = inpaint_frame(frame, mask, method='telea', radius=radius)
-                    else:
-                        out = inpaint_frame(frame, mask, method=method, radius=radius)
-                    if outp:
-                        cv2.imwrite(outp, out)
+                self._compute_uncached_inpaint_processes(todo, method, radius, max_search, scene_thresh, procs)
+                print("[BATCH] Inpaint batch complete.")
+                self._update_progress_labels()
+                return
             except Exception as e:
-                print(f"[BATCH] Inpaint failed at frame {i}: {e}")
-            if i % 50 == 0:
-                print(f"[BATCH] Inpaint progress {i}/{total}")
+                print(f"[BATCH] Process pool failed ({e}); continuing in-process.")
+
+        def inpaint_one(i: int, frame: Optional[np.ndarray]):
+            if frame is None:
+                return None
+            mask = self._make_mask_for_frame_or_saved(i, frame)
+            if mask is None or not np.any(mask > 0):
+                # Fallback: record the original (empty patch) to avoid reprocessing repeatedly
+                return None, b""
+            if method == 'temporal':
+                out = self._compute_temporal_fill(i, frame, mask, max_search=max_search, scene_thresh=scene_thresh)
+                if out is None:
+                    out = inpaint_frame(frame, mask, method='telea', radius=radius)
+            else:
+                out = inpaint_frame(frame, mask, method=method, radius=radius)
+            # Encode on the worker thread; only the ROI that changed is kept
+            return InpaintPatchStore.encode_patch(out, frame)
+
+        for n, (i, patch) in enumerate(self._frame_pipeline(inpaint_one, indices=todo).run()):
+            if patch is not None:
+                try:
+                    store.put_patch(i, *patch)
+                except Exception as e:
+                    print(f"[BATCH] Inpaint failed at frame {i}: {e}")
+            if n % 50 == 0:
+                print(f"[BATCH] Inpaint progress {i}/{total} ({n+1}/{len(todo)} uncached)")
+        store.flush()
         print("[BATCH] Inpaint batch complete.")
         self._update_progress_labels()
 
-    # ---------- Single-frame inpaint helpers ----------
-    def _inpainted_path_for_frame(self, fi: int) -> Optional[str]:
-        root = self._output_root()
-        if root is None:
+    def _compute_uncached_inpaint_processes(self, todo: List[int], method: str, radius: int, max_search: int, scene_thresh: float, procs: int = 0):
+        """Inpaint the uncached frames on a process pool; see run_inpaint_shards()."""
+        detections: Dict[int, Tuple[int, int, int, int]] = {}
+        for fi, d in self.detections_cache.items():
+            try:
+                detections[fi] = tuple(int(v) for v in d.get('bbox', [0, 0, 0, 0]))
+            except Exception:
+                continue
+        bad_bboxes = {fi: [tuple(int(v) for v in d.get('bbox', [0, 0, 0, 0])) for d in lst] for fi, lst in self.bad_detections.items()}
+        base = InpaintJob(
+            video_path=self.video_path,
+            output_root=self._output_root(),
+            start=0,
+            end=0,
+            method=method,
+            radius=radius,
+            dilation=int(self.dilation.get()),
+            max_search=max_search,
+            scene_thresh=scene_thresh,
+            good_frames=frozenset(self.good_frames),
+            detections=detections if self.use_saved_data.get() else {},
+            bad_bboxes=bad_bboxes,
+            templates=dict(self.templates),
+            scales=list(self.scales),
+            threshold=float(self.threshold.get()),
+            detect_downscale=float(self.detect_downscale.get()),
+            use_pyramid=bool(self.use_pyramid.get()),
+            trueforms=dict(self.trueforms),
+            preset=self.active_preset.get().strip(),
+            use_trueform=bool(self.use_trueform_mask.get()),
+            scene_index_dir=self._scene_index_dir() or "",
+        )
+        run_inpaint_shards(base, todo, self._inpaint_store(), procs)
+
+    def _frame_pipeline(self, process_fn: Callable[[int, Optional[np.ndarray]], Any], indices: Optional[List[int]] = None, need_frame: Optional[Callable[[int], bool]] = None) -> FramePipeline:
+        """Streaming decode/process/encode pipeline over the open video, sized by the Use Parallel toggle."""
+        workers = max(2, (os.cpu_count() or 4) // 2) if self.use_parallel.get() else 1
+        return FramePipeline(self.video_path, process_fn, indices=indices, workers=workers, max_in_flight=max(8, workers * 4), need_frame=need_frame)
+
+    # ---------- Mask / inpaint containers ----------
+    def _mask_store(self) -> Optional[MaskSequenceStore]:
+        """Per-video mask container under <root>/masks; legacy PNGs there are imported on first open."""
+        if self.mask_store is None and self.reader:
+            root = self._output_root()
+            if root is None:
+                return None
+            self.mask_store = MaskSequenceStore(os.path.join(root, "masks"), self.reader.frame_count, self.reader.w, self.reader.h).open()
+        return self.mask_store
+
+    def _inpaint_store(self) -> Optional[InpaintPatchStore]:
+        """Per-video inpaint patch container under <root>/inpainted."""
+        if self.inpaint_store is None and self.reader:
+            root = self._output_root()
+            if root is None:
+                return None
+            self.inpaint_store = InpaintPatchStore(os.path.join(root, "inpainted"), self.reader.frame_count, self.reader.w, self.reader.h).open()
+        return self.inpaint_store
+
+    def _close_frame_stores(self):
+        for store in (self.mask_store, self.inpaint_store):
+            if store is not None:
+                store.close()
+        self.mask_store = None
+        self.inpaint_store = None
+
+    def _has_saved_mask(self, fi: int) -> bool:
+        store = self._mask_store()
+        return store is not None and fi in store
+
+    def _save_mask_for_frame(self, fi: int, mask: np.ndarray, flush: bool = True):
+        store = self._mask_store()
+        if store is None:
+            return
+        store.put(fi, mask)
+        if flush:
+            store.flush()
+
+    def _delete_saved_mask(self, fi: int) -> bool:
+        store = self._mask_store()
+        if store is None or fi not in store:
+            return False
+        store.delete(fi)
+        return True
+
+    def _has_inpainted(self, fi: int) -> bool:
+        store = self._inpaint_store()
+        return store is not None and fi in store
+
+    def _save_inpainted_frame(self, fi: int, out_bgr: np.ndarray, src_bgr: Optional[np.ndarray]) -> bool:
+        store = self._inpaint_store()
+        if store is None:
+            return False
+        store.put(fi, out_bgr, src_bgr)
+        store.flush()
+        return True
+
+    def _load_inpainted_frame(self, fi: int, src_bgr: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        store = self._inpaint_store()
+        if store is None or fi not in store:
             return None
-        idir = os.path.join(root, "inpainted")
-        os.makedirs(idir, exist_ok=True)
-        return os.path.join(idir, f"{fi:06d}.png")
+        if src_bgr is None and store.needs_source(fi):
+            src_bgr = self.reader.read_frame(fi)
+        return store.get(fi, src_bgr)
 
+    # ---------- Single-frame inpaint helpers ----------
     def inpaint_current_frame(self):
         if not self.reader or self.cur_frame is None:
             print("[INPAINT] Open a video and move to a frame.")
             return
         fi = self.cur_frame_idx
-        outp = self._inpainted_path_for_frame(fi)
-        if outp is None:
+        if self._inpaint_store() is None:
             print("[INPAINT] No output path available.")
             return
         frame = self.cur_frame
         # If marked good, just store original frame
         if fi in self.good_frames:
             try:
-                cv2.imwrite(outp, frame)
-                print(f"[INPAINT] Saved original frame as inpainted (GOOD): {outp}")
+                self._save_inpainted_frame(fi, frame, frame)
+                print(f"[INPAINT] Saved original frame as inpainted (GOOD): {fi}")
             except Exception as e:
                 print(f"[INPAINT] Failed to save inpainted frame: {e}")
             self._update_progress_labels()
@@ -1310,7 +3456,7 @@ class VideoCursorRemovalApp:
                     except Exception:
                         bb = None
                     if bb is not None and not self._is_bad_candidate(fi, bb):
-                        tfm = self._get_trueform_mask_for_bbox(bb)
+                        tfm = self._get_trueform_mask_for_bbox(bb, frame)
                         if tfm is None:
                             mask = create_mask_from_bbox((self.reader.h, self.reader.w), bb, self.dilation.get())
                         else:
@@ -1321,7 +3467,7 @@ class VideoCursorRemovalApp:
             if mask is None:
                 det = self._detect_bbox(frame)
                 if det is not None and not self._is_bad_candidate(fi, det.bbox):
-                    tfm = self._get_trueform_mask_for_bbox(det.bbox)
+                    tfm = self._get_trueform_mask_for_bbox(det.bbox, frame)
                     if tfm is None:
                         mask = create_mask_from_bbox((self.reader.h, self.reader.w), det.bbox, self.dilation.get())
                     else:
@@ -1332,7 +3478,7 @@ class VideoCursorRemovalApp:
         if mask is None:
             print("[INPAINT] No mask available; saving original frame.")
             try:
-                cv2.imwrite(outp, frame)
+                self._save_inpainted_frame(fi, frame, frame)
             except Exception as e:
                 print(f"[INPAINT] Failed to save frame: {e}")
             self._update_progress_labels()
@@ -1345,6 +3491,10 @@ class VideoCursorRemovalApp:
         try:
             if method == 'temporal':
                 t0 = time.time()
+                index = self._get_scene_index()
+                if index is not None:
+                    # Masks may have changed since the last scan (guided clicks, bad marks)
+                    index.refresh_mask_presence(self._mask_store())
                 out = self._compute_temporal_fill(
                     fi,
                     frame,
@@ -1358,8 +3508,8 @@ class VideoCursorRemovalApp:
                     out = inpaint_frame(frame, mask, method='telea', radius=radius)
             else:
                 out = inpaint_frame(frame, mask, method=method, radius=radius)
-            cv2.imwrite(outp, out)
-            print(f"[INPAINT] Saved inpainted frame: {outp}")
+            self._save_inpainted_frame(fi, out, frame)
+            print(f"[INPAINT] Saved inpainted frame: {fi}")
         except Exception as e:
             print(f"[INPAINT] Inpaint failed: {e}")
         self._update_progress_labels()
@@ -1375,105 +3525,46 @@ class VideoCursorRemovalApp:
         self.inpaint_current_frame()
 
     def _compute_temporal_fill(self, fi: int, frame_bgr: np.ndarray, mask: np.ndarray, max_search: int = 120, scene_thresh: float = 0.90) -> Optional[np.ndarray]:
-        """
-        Composite the masked region from neighboring frames that belong to the same scene.
-        Strategy:
-          1) Search backward up to max_search frames, picking frames with high scene similarity.
-          2) Copy pixels only from regions that are not masked in the candidate frame.
-          3) If region not fully filled, search forward similarly.
-          4) Return frame with filled pixels; if nothing filled, return None.
-        """
-        H, W = frame_bgr.shape[:2]
-        target = frame_bgr.copy()
-        to_fill = (mask > 0)
-        if not np.any(to_fill):
-            return target
-        # Precompute reference descriptor for scene matching
-        ref_desc = self._frame_descriptor(frame_bgr)
-        # Backward search
-        filled_any = False
-        def try_composite_from(idx: int) -> bool:
-            nonlocal target, to_fill
-            cand = self.reader.read_frame(idx)
-            if cand is None:
-                return False
-            # Scene check
-            sim = self._scene_similarity(ref_desc, self._frame_descriptor(cand))
-            if sim < scene_thresh:
-                return False
-            # Respect candidate's saved mask (avoid copying its corrupted pixels)
-            cm = self._load_saved_mask_for_frame(idx)
-            valid = np.ones((H, W), dtype=bool) if cm is None else (cm == 0)
-            # Copy only where we still need fill and candidate is valid
-            sel = to_fill & valid
-            if not np.any(sel):
-                return False
-            target[sel] = cand[sel]
-            to_fill[sel] = False
-            return True
-        # Backward
-        for k in range(1, max_search+1):
-            j = fi - k
-            if j < 0:
-                break
-            if try_composite_from(j):
-                filled_any = True
-            if not np.any(to_fill):
-                break
-        # Forward if needed
-        if np.any(to_fill):
-            for k in range(1, max_search+1):
-                j = fi + k
-                if self.reader and j >= self.reader.frame_count:
-                    break
-                if try_composite_from(j):
-                    filled_any = True
-                if not np.any(to_fill):
-                    break
-        if filled_any:
-            # For any remaining holes, do a small Telea pass on the result
-            remain = (to_fill.astype(np.uint8) * 255)
-            try:
-                out = inpaint_frame(target, remain, method='telea', radius=2)
-            except Exception:
-                out = target
-            return out
-        return None
+        """Fill the masked region from same-scene neighbours; see temporal_fill()."""
+        return temporal_fill(
+            self.reader.read_frame,
+            self._load_saved_mask_for_frame,
+            int(self.reader.frame_count) if self.reader else 0,
+            fi, frame_bgr, mask, max_search=max_search, scene_thresh=scene_thresh,
+            index=self._get_scene_index(),
+        )
+
+    def _scene_index_dir(self) -> Optional[str]:
+        root = self._output_root()
+        return os.path.join(root, "scene_index") if root else None
+
+    def _get_scene_index(self) -> Optional[SceneDescriptorStore]:
+        """Return the opened scene index for this video if one has been built, else None."""
+        if self.scene_index is None and self.reader:
+            folder = self._scene_index_dir()
+            if folder:
+                store = SceneDescriptorStore(folder, self.reader.frame_count, self.reader.w, self.reader.h)
+                if store.open():
+                    self.scene_index = store
+        return self.scene_index
+
+    def build_scene_index(self):
+        if not self.reader:
+            print("[INDEX] Open a video first.")
+            return
+        store = self.scene_index or SceneDescriptorStore(self._scene_index_dir(), self.reader.frame_count, self.reader.w, self.reader.h)
+        store.open(writable=True)
+        t0 = time.time()
+        n = store.build(self.video_path, workers=max(2, (os.cpu_count() or 4) // 2) if self.use_parallel.get() else 1)
+        store.refresh_mask_presence(self._mask_store())
+        self.scene_index = store
+        print(f"[INDEX] Scene index ready ({n} frames indexed in {time.time()-t0:.1f}s)")
 
     def _frame_descriptor(self, img_bgr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        """Return downscaled grayscale and color histogram as a scene descriptor."""
-        try:
-            small = cv2.resize(img_bgr, (128, 72), interpolation=cv2.INTER_AREA)
-        except Exception:
-            h, w = img_bgr.shape[:2]
-            small = cv2.resize(img_bgr, (max(16, w//10), max(16, h//10)), interpolation=cv2.INTER_AREA)
-        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (5,5), 0)
-        # Color histogram in HSV for robustness
-        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
-        hist = cv2.calcHist([hsv], [0,1], None, [16,16], [0,180, 0,256])
-        cv2.normalize(hist, hist, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
-        return gray, hist
+        return frame_descriptor(img_bgr)
 
     def _scene_similarity(self, ref_desc: Tuple[np.ndarray, np.ndarray], cand_desc: Tuple[np.ndarray, np.ndarray]) -> float:
-        """Combine grayscale MSE-based score and HSV histogram correlation to estimate scene similarity (0..1)."""
-        try:
-            ref_gray, ref_hist = ref_desc
-            c_gray, c_hist = cand_desc
-            # Histogram correlation in [0..1]
-            hc = float(cv2.compareHist(ref_hist, c_hist, cv2.HISTCMP_CORREL))
-            hc = max(0.0, min(1.0, hc))
-            # Grayscale similarity via normalized MSE -> convert to score in [0..1]
-            diff = cv2.absdiff(ref_gray, c_gray)
-            mse = float(np.mean(diff.astype(np.float32)**2))
-            # Normalize roughly by 255^2
-            nmse = mse / (255.0*255.0)
-            gs = max(0.0, 1.0 - nmse*10.0)  # tolerate some noise
-            # Combine (weighted)
-            score = 0.6*hc + 0.4*gs
-            return max(0.0, min(1.0, score))
-        except Exception:
-            return 0.0
+        return scene_similarity(ref_desc, cand_desc)
 
     # ---------- Persistent steps (UI buttons) ----------
     def compute_and_save_detections(self):
@@ -1483,31 +3574,38 @@ class VideoCursorRemovalApp:
         det_dir, _ = self._ensure_output_dirs()
         print(f"[STEP] Computing detections to {det_dir}...")
         total = self.reader.frame_count
-        # Reset cache so we don't count stale values
-        self.detections_cache.clear()
-        p = self._detections_jsonl_path()
-        # Ensure file exists
-        if p and not os.path.isfile(p):
-            try:
-                os.makedirs(os.path.dirname(p), exist_ok=True)
-                open(p, 'a').close()
-            except Exception:
-                pass
-        for fi in range(total):
-            if fi in self.good_frames:
-                continue
-            frame = self.reader.read_frame(fi)
+        # New results overwrite per frame; writes are batched and flushed at the end
+        self._load_detections_cache()
+        gate = MotionGate(keyframe_interval=int(self.keyframe_interval.get())) if self.motion_gate.get() else None
+        # Gated frames leave holes in the sequence; keep the track alive across them
+        tracker = CursorMotionTracker(max_misses=int(self.track_max_misses.get()), max_gap=int(self.keyframe_interval.get()) + 1)
+        prev: Optional[DetectionResult] = None
+        indices = [fi for fi in range(total) if fi not in self.good_frames]
+        # Sequential decode on a background thread; detection itself stays in frame order
+        for fi, frame in self._frame_pipeline(lambda i, f: f, indices=indices).run():
             if frame is None:
                 continue
-            det = self._detect_bbox(frame)
+            if gate is None or gate.should_detect(frame, prev.bbox if prev is not None else None):
+                det = self._detect_bbox(frame, fi, tracker)
+                source = "auto"
+                prev = det
+            else:
+                # Static frame: carry the previous result (or its absence) forward
+                det = DetectionResult(frame_index=fi, bbox=prev.bbox, score=prev.score, template_name=prev.template_name) if prev is not None else None
+                source = "motion_gate"
             if det is not None:
                 # Skip detections that overlap any known bad bbox for this frame
                 if self._is_bad_candidate(fi, det.bbox):
                     det = None
             if det is not None:
-                self._append_detection_jsonl(det, fi)
+                self._append_detection_ex(det, fi, source=source, flush=False)
             if fi % 100 == 0:
                 print(f"[STEP] Detections {fi}/{total}")
+        self.detections_cache.flush()
+        if gate is not None:
+            print(f"[STEP] Motion gate: detected {gate.detected} frames, carried {gate.skipped} static frames forward")
+        ts = tracker.summary()
+        print(f"[STEP] Tracker: {ts['frames']} searches, full-frame {ts['full_pct']:.1f}%, mean area {ts['mean_area_pct']:.1f}%, {ts['mean_ms']:.1f} ms/frame")
         print("[STEP] Detections saved.")
         self._update_progress_labels()
 
@@ -1517,18 +3615,17 @@ class VideoCursorRemovalApp:
             return
         det_dir, msk_dir = self._ensure_output_dirs()
         # Load detections
-        self.detections_cache.clear()
         self._load_detections_cache()
         print(f"[STEP] Computing masks to {msk_dir}...")
         total = self.reader.frame_count
+        tracker = CursorMotionTracker(max_misses=int(self.track_max_misses.get()), max_gap=int(self.keyframe_interval.get()) + 1)
         for fi in range(total):
             if fi in self.good_frames:
                 continue
             frame = self.reader.read_frame(fi)
             if frame is None:
                 continue
-            mp = self._mask_path_for_frame(fi)
-            if mp and os.path.isfile(mp):
+            if self._has_saved_mask(fi):
                 continue  # skip existing
             bbox = None
             if fi in self.detections_cache:
@@ -1541,13 +3638,13 @@ class VideoCursorRemovalApp:
                 if bbox is not None and self._is_bad_candidate(fi, bbox):
                     bbox = None
             else:
-                det = self._detect_bbox(frame)
+                det = self._detect_bbox(frame, fi, tracker)
                 bbox = det.bbox if det is not None else None
                 if bbox is not None and self._is_bad_candidate(fi, bbox):
                     bbox = None
             if bbox is None:
                 continue
-            tf_mask = self._get_trueform_mask_for_bbox(bbox)
+            tf_mask = self._get_trueform_mask_for_bbox(bbox, frame)
             if tf_mask is None:
                 mask = create_mask_from_bbox((self.reader.h, self.reader.w), bbox, self.dilation.get())
             else:
@@ -1555,14 +3652,16 @@ class VideoCursorRemovalApp:
                 x,y,w,h = bbox
                 tf_resized = cv2.resize(tf_mask, (w, h), interpolation=cv2.INTER_NEAREST)
                 mask[y:y+h, x:x+w] = (tf_resized > 0).astype(np.uint8) * 255
-            # Save mask
-            if mp:
-                try:
-                    cv2.imwrite(mp, mask)
-                except Exception as e:
-                    print(f"[STEP] Failed to save mask for frame {fi}: {e}")
+            # Save mask (index flushed in batches)
+            try:
+                self._save_mask_for_frame(fi, mask, flush=False)
+            except Exception as e:
+                print(f"[STEP] Failed to save mask for frame {fi}: {e}")
             if fi % 100 == 0:
                 print(f"[STEP] Masks {fi}/{total}")
+        store = self._mask_store()
+        if store is not None:
+            store.flush()
         print("[STEP] Masks saved.")
         self._update_progress_labels()
 
@@ -1588,52 +3687,42 @@ class VideoCursorRemovalApp:
         root = self._output_root()
         return os.path.join(root, "detections", "detections.jsonl") if root else None
 
-    def _mask_path_for_frame(self, fi: int) -> Optional[str]:
-        root = self._output_root()
-        if root is None:
-            return None
-        return os.path.join(root, "masks", f"{fi:06d}.png")
-
     def _load_detections_cache(self):
-        # Load JSONL detections into in-memory dict once per session
-        if self.detections_cache:
-            return
+        # Open the binary detection store once per video (imports a legacy detections.jsonl)
         p = self._detections_jsonl_path()
-        if p and os.path.isfile(p):
-            try:
-                with open(p, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            d = json.loads(line)
-                            fi = int(d.get('frame', -1))
-                            if fi >= 0:
-                                self.detections_cache[fi] = d
-                        except Exception:
-                            continue
-                print(f"[CACHE] Loaded {len(self.detections_cache)} detections from {p}")
-            except Exception as e:
-                print(f"[CACHE] Failed to load detections: {e}")
+        if not p or not self.reader:
+            return
+        folder = os.path.dirname(p)
+        if self.detections_cache.folder == folder:
+            return
+        self.detections_cache = DetectionStore(folder, self.reader.frame_count).open()
+        print(f"[CACHE] Loaded {len(self.detections_cache)} detections from {self.detections_cache.path}")
 
-    def _append_detection_jsonl(self, det: DetectionResult, frame_index: int):
-        return self._append_detection_jsonl_ex(det, frame_index, source="auto")
+    def _append_detection(self, det: DetectionResult, frame_index: int):
+        return self._append_detection_ex(det, frame_index, source="auto")
 
-    def _append_detection_jsonl_ex(self, det: DetectionResult, frame_index: int, source: str = "auto"):
-        p = self._detections_jsonl_path()
-        if not p:
+    def _append_detection_ex(self, det: DetectionResult, frame_index: int, source: str = "auto", flush: bool = True):
+        self._load_detections_cache()
+        if self.detections_cache.folder is None:
             return
-        rec = {
-            'frame': int(frame_index),
-            'bbox': [int(det.bbox[0]), int(det.bbox[1]), int(det.bbox[2]), int(det.bbox[3])],
-            'score': float(det.score),
-            'template': getattr(det, 'template_name', det.template_name if hasattr(det, 'template_name') else ""),
-            'source': source
-        }
         try:
-            os.makedirs(os.path.dirname(p), exist_ok=True)
-            with open(p, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(rec) + "\n")
+            self.detections_cache.put(frame_index, det.bbox, det.score, getattr(det, 'template_name', "") or "", source, flush=flush)
         except Exception as e:
-            print(f"[CACHE] Failed to append detection: {e}")
+            print(f"[CACHE] Failed to store detection: {e}")
+
+    def export_detections_jsonl(self):
+        if not self.reader:
+            print("[WARN] Open a video first.")
+            return
+        self._load_detections_cache()
+        out_path = filedialog.asksaveasfilename(defaultextension=".jsonl", initialfile="detections_export.jsonl", filetypes=[("JSONL", "*.jsonl"), ("All", "*.*")], title="Export Detections")
+        if not out_path:
+            return
+        try:
+            n = self.detections_cache.export_jsonl(out_path)
+            print(f"[CACHE] Exported {n} detections to {out_path}")
+        except Exception as e:
+            print(f"[CACHE] Export failed: {e}")
 
     def _bad_detections_jsonl_path(self) -> Optional[str]:
         root = self._output_root()
@@ -1676,15 +3765,7 @@ class VideoCursorRemovalApp:
                 print(f"[BAD] Failed to load bad detections: {e}")
 
     def _iou(self, a: Tuple[int,int,int,int], b: Tuple[int,int,int,int]) -> float:
-        ax, ay, aw, ah = a
-        bx, by, bw, bh = b
-        ax2, ay2 = ax+aw, ay+ah
-        bx2, by2 = bx+bw, by+bh
-        inter_w = max(0, min(ax2, bx2) - max(ax, bx))
-        inter_h = max(0, min(ay2, by2) - max(ay, by))
-        inter = inter_w * inter_h
-        ua = aw*ah + bw*bh - inter
-        return float(inter) / float(ua) if ua > 0 else 0.0
+        return bbox_iou(a, b)
 
     def _is_bad_candidate(self, frame_index: int, bbox: Tuple[int,int,int,int]) -> bool:
         bads = self.bad_detections.get(frame_index, [])
@@ -1699,66 +3780,31 @@ class VideoCursorRemovalApp:
         return False
 
     def _load_saved_mask_for_frame(self, fi: int) -> Optional[np.ndarray]:
-        mp = self._mask_path_for_frame(fi)
-        if mp and os.path.isfile(mp):
-            img = cv2.imread(mp, cv2.IMREAD_GRAYSCALE)
-            if img is not None and self.reader and img.shape[:2] == (self.reader.h, self.reader.w):
-                return (img > 0).astype(np.uint8) * 255
-        return None
+        store = self._mask_store()
+        return store.get(fi) if store is not None else None
 
     # ---------- Progress helpers ----------
     def _update_progress_labels(self):
         if not getattr(self, 'progress_label', None) or not self.reader:
             return
         total = int(self.reader.frame_count)
-        # Detections count (unique frames in JSONL)
-        det_n = 0
-        det_set = set()
-        p = self._detections_jsonl_path()
-        if p and os.path.isfile(p):
-            try:
-                seen = set()
-                with open(p, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        try:
-                            d = json.loads(line)
-                            fi = int(d.get('frame', -1))
-                            if 0 <= fi < total:
-                                seen.add(fi)
-                        except Exception:
-                            continue
-                det_n = len(seen)
-                det_set = seen
-            except Exception:
-                det_n = 0
-        # Masks count
-        mcount = 0
-        mask_set = set()
-        root = self._output_root()
-        if root:
-            mdir = os.path.join(root, "masks")
-            if os.path.isdir(mdir):
-                mfiles = glob.glob(os.path.join(mdir, "*.png"))
-                mcount = len(mfiles)
-                try:
-                    mask_set = set(int(os.path.splitext(os.path.basename(p))[0]) for p in mfiles)
-                except Exception:
-                    mask_set = set()
-        # Inpainted count (optional future)
-        icount = 0
-        inpaint_set = set()
-        if root:
-            idir = os.path.join(root, "inpainted")
-            if os.path.isdir(idir):
-                ifiles = glob.glob(os.path.join(idir, "*.png"))
-                icount = len(ifiles)
-                try:
-                    inpaint_set = set(int(os.path.splitext(os.path.basename(p))[0]) for p in ifiles)
-                except Exception:
-                    inpaint_set = set()
+        # Detections count (index lookup in the detection store)
+        self._load_detections_cache()
+        dets = self.detections_cache.valid_mask(total)
+        det_n = int(dets.sum())
+        # Masks / inpainted counts (index lookups in the frame containers)
+        mstore = self._mask_store()
+        masks = mstore.presence(total) if mstore is not None else np.zeros(total, dtype=bool)
+        mcount = int(masks.sum())
+        istore = self._inpaint_store()
+        ips = istore.presence(total) if istore is not None else np.zeros(total, dtype=bool)
+        icount = int(ips.sum())
+        good = np.zeros(total, dtype=bool)
+        good_idx = [g for g in (getattr(self, 'good_frames', set()) or set()) if 0 <= g < total]
+        if good_idx:
+            good[good_idx] = True
         pct = lambda n: int(round((n / total) * 100)) if total > 0 else 0
-        combined_set = set(getattr(self, 'good_frames', set()) or set()) | det_set | mask_set
-        combined_n = len(combined_set)
+        combined_n = int((good | dets | masks).sum())
         text = (
             f"Combined+Good: {combined_n}/{total} ({pct(combined_n)}%)  |  "
             f"Detections: {det_n}/{total} ({pct(det_n)}%)  |  Masks: {mcount}/{total} ({pct(mcount)}%)  |  Inpainted: {icount}/{total} ({pct(icount)}%)"
@@ -1769,11 +3815,11 @@ class VideoCursorRemovalApp:
             pass
         # Update timeline visualization
         try:
-            self._update_timeline(det_set, mask_set, inpaint_set)
+            self._update_timeline(good, dets, masks, ips)
         except Exception as e:
             self.dlog(f"[UI] Timeline update skipped: {e}")
 
-    def _update_timeline(self, det_set: set, mask_set: set, inpaint_set: set):
+    def _update_timeline(self, good: np.ndarray, dets: np.ndarray, masks: np.ndarray, ips: np.ndarray):
         if not hasattr(self, 'timeline_canvas') or not self.reader:
             return
         canvas = self.timeline_canvas
@@ -1789,34 +3835,26 @@ class VideoCursorRemovalApp:
             ("ip", (146,84,222)),      # purple
             ("total", (82,196,26)),    # green
         ]
-        # Build sets
-        good = getattr(self, 'good_frames', set()) or set()
-        dets = det_set
-        masks = mask_set
-        ips = inpaint_set
-        # Map index to x
-        def x_for_idx(i: int) -> int:
-            return int(i * (w-1) / max(1, total-1))
-        # Draw bars
+        flags = {
+            'good': good,
+            'det': dets,
+            'mask': masks,
+            'ip': ips,
+            'total': good | (dets & masks & ips),
+        }
+        # Map index to x; as before, the last frame landing on a column decides its colour
+        xs = (np.arange(total) * (w - 1) // max(1, total - 1)).astype(np.int64)
+        # Draw bars as runs of equal columns instead of one line per frame
         for r, (name, color) in enumerate(rows):
             y0 = r * (h_row + gap)
-            for i in range(total):
-                ok = False
-                if name == 'good':
-                    ok = (i in good)
-                elif name == 'det':
-                    ok = (i in dets)
-                elif name == 'mask':
-                    ok = (i in masks)
-                elif name == 'ip':
-                    ok = (i in ips)
-                elif name == 'total':
-                    ok = (i in good) or ((i in dets) and (i in masks) and (i in ips))
-                x = x_for_idx(i)
-                if ok:
-                    canvas.create_line(x, y0, x, y0 + h_row - 1, fill="#%02x%02x%02x" % color)
-                else:
-                    canvas.create_line(x, y0, x, y0 + h_row - 1, fill="#000000")
+            col = np.zeros(w, dtype=bool)
+            col[xs] = flags[name][:total]
+            edges = np.flatnonzero(np.diff(col.astype(np.int8))) + 1
+            starts = np.concatenate(([0], edges))
+            ends = np.concatenate((edges, [w]))
+            for x0, x1 in zip(starts, ends):
+                fill = "#%02x%02x%02x" % color if col[x0] else "#000000"
+                canvas.create_rectangle(int(x0), y0, int(x1) - 1, y0 + h_row - 1, fill=fill, outline=fill)
         # Store for click mapping
         canvas.configure(height=len(rows)*(h_row+gap)-gap)
 
@@ -1839,7 +3877,23 @@ class VideoCursorRemovalApp:
         # Skip computation for good frames
         if frame_index in self.good_frames:
             return np.zeros((self.reader.h, self.reader.w), dtype=np.uint8)
-        return self._make_mask_for_frame(frame_bgr)
+        return self._make_mask_for_frame(frame_bgr, frame_index)
+
+    def _make_mask_for_frame(self, frame_bgr: Optional[np.ndarray], frame_index: int = -1) -> Optional[np.ndarray]:
+        # Cached detection first, then live detection; trueform shape preferred over the bbox
+        bbox = None
+        if self.use_saved_data.get() and frame_index in self.detections_cache:
+            try:
+                bbox = tuple(int(v) for v in self.detections_cache[frame_index].get('bbox', [0,0,0,0]))
+            except Exception:
+                bbox = None
+        if bbox is None and frame_bgr is not None:
+            # May run on pipeline worker threads in any order: use a stateless tracker
+            det = self._detect_bbox(frame_bgr, frame_index if frame_index >= 0 else None, CursorMotionTracker())
+            bbox = det.bbox if det is not None else None
+        if bbox is None or self._is_bad_candidate(frame_index, bbox):
+            return None
+        return mask_from_bbox((self.reader.h, self.reader.w), bbox, self.dilation.get(), self._get_trueform_mask_for_bbox(bbox, frame_bgr))
 
     # ---------- Good frames marking ----------
     def _good_frames_path(self) -> Optional[str]:
@@ -1884,63 +3938,31 @@ class VideoCursorRemovalApp:
         if bb is not None:
             x, y, w, h = bb
             if x <= x_frame < x + w and y <= y_frame < y + h:
-                # Remove matching detection(s) from detections.jsonl by overlap and append to bad_detections.jsonl
-                detp = self._detections_jsonl_path()
-                if detp and os.path.isfile(detp):
+                # Flag the overlapping stored detection as bad and append it to bad_detections.jsonl
+                self._load_detections_cache()
+                fi = self.cur_frame_idx
+                d = self.detections_cache.get(fi)
+                bb2t = tuple(int(v) for v in d['bbox']) if d is not None else None
+                if bb2t is not None and self._iou(bb2t, bb) > 0.3:
+                    t0 = time.time()
+                    self.detections_cache.mark_bad(fi)
+                    self._append_bad_detection(fi, bb2t, d.get('score', None), d.get('template', ''), source="bad_click")
+                    self.dlog(f"[BAD] flag detection took {(time.time()-t0)*1000:.1f} ms")
+                    self._load_bad_detections_cache()
+                    # Remove any saved mask for this frame so it won't be used
                     try:
                         t0 = time.time()
-                        with open(detp, 'r', encoding='utf-8') as f:
-                            lines = f.readlines()
-                        self.dlog(f"[BAD] read detections.jsonl took {(time.time()-t0)*1000:.1f} ms")
-                        kept = []
-                        removed_any = False
-                        for ln in lines:
-                            try:
-                                d = json.loads(ln)
-                                if int(d.get('frame', -1)) == self.cur_frame_idx:
-                                    bb2 = d.get('bbox', [0,0,0,0])
-                                    bb2t = (int(bb2[0]), int(bb2[1]), int(bb2[2]), int(bb2[3]))
-                                    if self._iou(bb2t, bb) > 0.3:
-                                        # Move to bad file
-                                        self._append_bad_detection(self.cur_frame_idx, bb2t, d.get('score', None), d.get('template', ''), source="bad_click")
-                                        removed_any = True
-                                        continue
-                                kept.append(ln)
-                            except Exception:
-                                kept.append(ln)
-                        if removed_any:
-                            t0 = time.time()
-                            with open(detp, 'w', encoding='utf-8') as f:
-                                f.writelines(kept)
-                            self.dlog(f"[BAD] rewrite detections.jsonl took {(time.time()-t0)*1000:.1f} ms")
-                            # Clear caches and reload
-                            self.detections_cache.clear()
-                            self._load_bad_detections_cache()
-                            # Remove any saved mask for this frame so it won't be used
-                            mp = self._mask_path_for_frame(self.cur_frame_idx)
-                            if mp and os.path.isfile(mp):
-                                try:
-                                    t0 = time.time()
-                                    os.remove(mp)
-                                    self.dlog(f"[BAD] remove mask took {(time.time()-t0)*1000:.1f} ms")
-                                    print(f"[BAD] Deleted saved mask for frame {self.cur_frame_idx}")
-                                except Exception as e:
-                                    print(f"[BAD] Failed to delete mask: {e}")
-                            print(f"[BAD] Removed detection(s) at frame {self.cur_frame_idx} and recorded as bad.")
-                            try:
-                                self._update_progress_labels()
-                            except Exception:
-                                pass
-                        else:
-                            # If no record existed yet (live-only), still record as bad with the clicked bbox
-                            self._append_bad_detection(self.cur_frame_idx, bb, None, "", source="bad_click")
-                            print(f"[BAD] Marked live detection at frame {self.cur_frame_idx} as bad.")
+                        if self._delete_saved_mask(fi):
+                            self.dlog(f"[BAD] remove mask took {(time.time()-t0)*1000:.1f} ms")
+                            print(f"[BAD] Deleted saved mask for frame {fi}")
                     except Exception as e:
-                        print(f"[BAD] Failed to update bad detections: {e}")
+                        print(f"[BAD] Failed to delete mask: {e}")
+                    print(f"[BAD] Removed detection(s) at frame {fi} and recorded as bad.")
                 else:
-                    # No detections file yet; just record bad
-                    self._append_bad_detection(self.cur_frame_idx, bb, None, "", source="bad_click")
-                    print(f"[BAD] Marked live detection at frame {self.cur_frame_idx} as bad.")
+                    # If no record existed yet (live-only), still record as bad with the clicked bbox
+                    self._append_bad_detection(fi, bb, None, "", source="bad_click")
+                    self._load_bad_detections_cache()
+                    print(f"[BAD] Marked live detection at frame {fi} as bad.")
                 try:
                     self._update_progress_labels()
                 except Exception:
@@ -1963,49 +3985,19 @@ class VideoCursorRemovalApp:
         fi = self.cur_frame_idx
         self.good_frames.add(fi)
         self._save_good_frames()
-        # Remove any detections for this frame and mark them bad
-        detp = self._detections_jsonl_path()
-        if detp and os.path.isfile(detp):
-            try:
-                with open(detp, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                kept = []
-                removed = 0
-                for ln in lines:
-                    try:
-                        d = json.loads(ln)
-                        if int(d.get('frame', -1)) == fi:
-                            bb = d.get('bbox', [0,0,0,0])
-                            try:
-                                bb_t = (int(bb[0]), int(bb[1]), int(bb[2]), int(bb[3]))
-                            except Exception:
-                                bb_t = (0,0,0,0)
-                            self._append_bad_detection(fi, bb_t, d.get('score', None), d.get('template', ''), source="auto_good")
-                            removed += 1
-                            continue
-                    except Exception:
-                        pass
-                    kept.append(ln)
-                with open(detp, 'w', encoding='utf-8') as f:
-                    f.writelines(kept)
-                if removed:
-                    print(f"[GOOD] Removed {removed} detection(s) at frame {fi} and recorded as bad.")
-                # Invalidate cached detections memory
-                try:
-                    if fi in self.detections_cache:
-                        del self.detections_cache[fi]
-                except Exception:
-                    self.detections_cache = {}
-            except Exception as e:
-                print(f"[GOOD] Failed to update detections: {e}")
+        # Flag any stored detection for this frame as bad and record the frame as good
+        self._load_detections_cache()
+        d = self.detections_cache.mark_bad(fi, flush=False)
+        if d is not None:
+            self._append_bad_detection(fi, tuple(int(v) for v in d['bbox']), d.get('score', None), d.get('template', ''), source="auto_good")
+            print(f"[GOOD] Removed 1 detection(s) at frame {fi} and recorded as bad.")
+        self.detections_cache.set_good(fi, True)
         # Remove mask cache for this frame
-        mp = self._mask_path_for_frame(fi)
-        if mp and os.path.isfile(mp):
-            try:
-                os.remove(mp)
+        try:
+            if self._delete_saved_mask(fi):
                 print(f"[GOOD] Removed mask cache for frame {fi}.")
-            except Exception as e:
-                print(f"[GOOD] Failed to remove mask cache: {e}")
+        except Exception as e:
+            print(f"[GOOD] Failed to remove mask cache: {e}")
         print(f"[GOOD] Marked frame {fi} as good (skipped).")
         # Update progress and refresh preview quickly
         try:
@@ -2020,6 +4012,8 @@ class VideoCursorRemovalApp:
         if self.cur_frame_idx in self.good_frames:
             self.good_frames.remove(self.cur_frame_idx)
             self._save_good_frames()
+            self._load_detections_cache()
+            self.detections_cache.set_good(self.cur_frame_idx, False)
             print(f"[GOOD] Unmarked frame {self.cur_frame_idx}.")
         else:
             print(f"[GOOD] Frame {self.cur_frame_idx} was not marked.")
@@ -2103,7 +4097,7 @@ class VideoCursorRemovalApp:
         # Persist guided detection and mask immediately
         try:
             self._ensure_output_dirs()
-            self._append_detection_jsonl_ex(det, self.cur_frame_idx, source="guided")
+            self._append_detection_ex(det, self.cur_frame_idx, source="guided")
             # Build a mask for the guided bbox (trueform preferred)
             tf_mask = self._get_trueform_mask_for_bbox(bbox)
             if tf_mask is None:
@@ -2113,11 +4107,7 @@ class VideoCursorRemovalApp:
                 xg, yg, wg, hg = bbox
                 tf_resized = cv2.resize(tf_mask, (wg, hg), interpolation=cv2.INTER_NEAREST)
                 mask[yg:yg+hg, xg:xg+wg] = (tf_resized > 0).astype(np.uint8) * 255
-            mp = self._mask_path_for_frame(self.cur_frame_idx)
-            if mp:
-                cv2.imwrite(mp, mask)
-            # Invalidate cached detections memory so preview can pick up
-            self.detections_cache.clear()
+            self._save_mask_for_frame(self.cur_frame_idx, mask)
             self._update_progress_labels()
             print("[GUIDE] Persisted guided detection and mask.")
         except Exception as e:
@@ -2225,45 +4215,10 @@ class VideoCursorRemovalApp:
             print("[PRESET] Not enough images per orientation bin to build any trueforms. Collect more varied samples.")
 
     def _compute_trueform_enhanced(self, crops: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
-        # Determine reference size (median) and align all crops to first reference using ECC
-        hs = [c.shape[0] for c in crops]
-        ws = [c.shape[1] for c in crops]
-        H = int(np.median(hs))
-        W = int(np.median(ws))
-        ref = cv2.resize(crops[0], (W, H), interpolation=cv2.INTER_AREA)
-        aligned = [self._align_to_reference(ref, cv2.resize(c, (W, H), interpolation=cv2.INTER_AREA)) for c in crops]
-        stack = np.stack(aligned, axis=0).astype(np.float32)  # N,H,W,3
-        # Median image
-        median_img = np.median(stack, axis=0).astype(np.uint8)
-        # Robust variation (MAD) per pixel
-        med = np.median(stack, axis=0)
-        mad = np.median(np.abs(stack - med), axis=0)
-        mad_gray = np.mean(mad, axis=2)
-        # Edge consensus
-        edges = []
-        for img in aligned:
-            gray = cv2.cvtColor(img.astype(np.uint8), cv2.COLOR_BGR2GRAY)
-            e = cv2.Canny(gray, 50, 150)
-            edges.append((e > 0).astype(np.float32))
-        edge_sum = np.sum(np.stack(edges, axis=0), axis=0)  # H,W
-        edge_consensus = edge_sum / max(1, len(edges))
-        # Normalize MAD via robust scaling
-        q1, q3 = np.percentile(mad_gray, [25, 75])
-        iqr = max(1e-6, q3 - q1)
-        mad_norm = np.clip((mad_gray - q1) / iqr, 0, 3.0) / 3.0  # 0..1
-        # Combine: prefer low MAD (stable across samples) and high edge consensus (consistent edges)
-        prob = (1.0 - mad_norm) * (edge_consensus ** 0.7)
-        # Threshold adaptively
-        thr = max(0.2, np.percentile(prob, 70) * 0.7)
-        mask = (prob > thr).astype(np.uint8) * 255
-        # Cleanup
-        mask = cv2.medianBlur(mask, 3)
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3,3))
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=1)
-        return median_img, mask
+        return build_trueform_from_crops(crops, workers=0 if self.use_parallel.get() else 1)
 
-    def _get_trueform_mask_for_bbox(self, bbox: Tuple[int,int,int,int]) -> Optional[np.ndarray]:
+    def _get_trueform_mask_for_bbox(self, bbox: Tuple[int,int,int,int], frame_bgr: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Trueform mask for bbox; variants are matched against frame_bgr (default: the displayed frame)."""
         if not self.use_trueform_mask.get():
             return None
         name = self.active_preset.get().strip()
@@ -2272,8 +4227,8 @@ class VideoCursorRemovalApp:
         # Try exact preset match first
         if name in self.trueforms:
             return self.trueforms[name]['mask']
-        # Otherwise select the variant that best matches current frame crop via template matching
-        return self._select_best_trueform_by_match(name, bbox)
+        # Otherwise select the variant that best matches the frame crop via template matching
+        return self._select_best_trueform_by_match(name, bbox, frame_bgr)
 
     def _compute_orientation_bin(self, img: np.ndarray) -> str:
         # Use edge orientation via PCA to determine primary direction, map to bins
@@ -2299,30 +4254,7 @@ class VideoCursorRemovalApp:
             return 'up'
 
     def _align_to_reference(self, ref: np.ndarray, img: np.ndarray) -> np.ndarray:
-        # Robust ECC alignment with fallbacks and normalization to avoid NaNs.
-        ref_gray = cv2.cvtColor(ref, cv2.COLOR_BGR2GRAY)
-        img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        # Normalize to [0,1] float32 and blur slightly to reduce noise
-        ref_f = cv2.GaussianBlur(ref_gray, (3,3), 0).astype(np.float32) / 255.0
-        img_f = cv2.GaussianBlur(img_gray, (3,3), 0).astype(np.float32) / 255.0
-        # Replace any NaNs/Infs just in case
-        ref_f = np.nan_to_num(ref_f, nan=0.0, posinf=1.0, neginf=0.0)
-        img_f = np.nan_to_num(img_f, nan=0.0, posinf=1.0, neginf=0.0)
-        # Try Euclidean first, then translation
-        for warp_mode in (cv2.MOTION_EUCLIDEAN, cv2.MOTION_TRANSLATION):
-            warp_matrix = np.eye(2, 3, dtype=np.float32)
-            try:
-                criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 150, 1e-6)
-                cc, warp_matrix = cv2.findTransformECC(ref_f, img_f, warp_matrix, warp_mode, criteria)
-                if not np.isfinite(warp_matrix).all():
-                    raise ValueError("warp_matrix not finite")
-                aligned = cv2.warpAffine(img, warp_matrix, (ref.shape[1], ref.shape[0]), flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REFLECT)
-                return aligned
-            except Exception as e:
-                print(f"[PRESET] ECC alignment failed ({'EUCLIDEAN' if warp_mode==cv2.MOTION_EUCLIDEAN else 'TRANSLATION'}): {e}")
-                continue
-        # Fallback: return original resized image if alignment fails
-        return img
+        return align_to_reference(ref, img)
 
     def harvest_samples_from_video(self):
         if not self.reader or self.cur_frame is None:
@@ -2385,35 +4317,9 @@ class VideoCursorRemovalApp:
             print(f"[PRESET] GrabCut refinement failed: {e}")
             return init_mask
 
-    def _select_best_trueform_by_match(self, base_name: str, bbox: Tuple[int,int,int,int]) -> Optional[np.ndarray]:
-        if self.cur_frame is None:
-            return None
-        x, y, w, h = bbox
-        crop = self.cur_frame[y:y+h, x:x+w]
-        if crop.size == 0:
-            return None
-        crop_gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-        best_score = -1.0
-        best_mask = None
-        for key, data in self.trueforms.items():
-            if not (key == base_name or key.startswith(base_name + "_")):
-                continue
-            median = data['median']
-            mask = data['mask']
-            if median is None or mask is None:
-                continue
-            med_gray = cv2.cvtColor(median, cv2.COLOR_BGR2GRAY)
-            med_resized = cv2.resize(med_gray, (w, h), interpolation=cv2.INTER_AREA)
-            # Use normalized cross-correlation
-            try:
-                res = cv2.matchTemplate(crop_gray, med_resized, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, _ = cv2.minMaxLoc(res)
-                if max_val > best_score:
-                    best_score = max_val
-                    best_mask = cv2.resize(mask, (w, h), interpolation=cv2.INTER_NEAREST)
-            except Exception as e:
-                continue
-        return best_mask
+    def _select_best_trueform_by_match(self, base_name: str, bbox: Tuple[int,int,int,int],
+                                       frame_bgr: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        return select_trueform_mask(frame_bgr if frame_bgr is not None else self.cur_frame, bbox, self.trueforms, base_name)
 
     def _load_crops_from_dataset(self) -> List[np.ndarray]:
         crops: List[np.ndarray] = []
@@ -2466,6 +4372,7 @@ class VideoCursorRemovalApp:
         # Refresh CPU matcher cache
         try:
             self.matcher.refresh_templates(self.templates)
+            self.pyramid_matcher.refresh_templates(self.templates)
         except Exception:
             pass
         # Refresh GPU templates if enabled
@@ -2528,5 +4435,8 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Any arguments select the headless CLI; none opens the GUI
+    if len(sys.argv) > 1:
+        sys.exit(cli_main())
     main()
 
@@ -12,30 +12,50 @@ Features:
 - randomized-sampling offset search with scoring
 - Exports metrics report JSON  
 - CLI mode for batch processing
+- Benchmark harness: synthetic pairs with known offsets, per-strategy time / memory / error as JSON
 
 Usage:
     GUI (default):  python VIDEO_music_sync.py , or launch from launch tools 
     CLI:            python VIDEO_music_sync.py --video input.mp4 --audio target.wav --out synced.mp4
+    Batch:          python VIDEO_music_sync.py --video-dir clips/ --audio-dir mixes/ --out-dir synced/ --jobs 4
+                    python VIDEO_music_sync.py --batch pairs.csv --batch-report report.csv
+    Benchmark:      python VIDEO_music_sync.py --benchmark bench.json [--benchmark-clip song.wav] [--benchmark-baseline old.json]
 
 STATUS:: working  
 VERSION::20251004
 """
 
 import os
+import io
+import re
 import sys
+import csv
 import json
+import tempfile
+import tracemalloc
+import contextlib
+import hashlib
+import shutil
+import subprocess
 import argparse
-from dataclasses import dataclass, asdict
-from typing import Optional, Tuple
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import numpy as np
 import librosa
 import soundfile as sf
 import scipy.signal as _spsig
-import pygame
 import threading
 import time
 
+# Optional low-latency callback output for the preview player (falls back to pygame,
+# which is imported only when that backend is opened)
+try:
+    import sounddevice as sd
+except Exception:
+    sd = None
+
 # ======================== Compatibility Shims ========================
 
 # MoviePy import fallback for different versions
@@ -70,6 +90,142 @@ except AttributeError:
 # PyQt5 import 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
+class PeakPyramid:
+    """Multi-resolution min/max summary of a waveform for drawing.
+    Level 0 holds the min/max of every `base_block` samples; each further level halves the
+    resolution. columns() picks the level matching the requested samples-per-column, so the
+    cost of a query depends on the number of columns, not on the audio length."""
+
+    def __init__(self, y: np.ndarray, sr: int, base_block: int = 128):
+        self.sr = int(sr)
+        self.base_block = int(base_block)
+        y = np.asarray(y, dtype=np.float32).ravel()
+        self.num_samples = len(y)
+        self.peak = float(np.max(np.abs(y))) if len(y) else 0.0
+        self.levels = []
+        if not len(y):
+            return
+        full = (len(y) // self.base_block) * self.base_block
+        blocks = y[:full].reshape(-1, self.base_block)
+        mins, maxs = blocks.min(axis=1), blocks.max(axis=1)
+        if full < len(y):
+            mins = np.append(mins, y[full:].min())
+            maxs = np.append(maxs, y[full:].max())
+        self.levels.append((mins, maxs))
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+            mins = np.minimum(mins[0::2], mins[1::2])
+            maxs = np.maximum(maxs[0::2], maxs[1::2])
+            self.levels.append((mins, maxs))
+
+    @property
+    def duration_s(self) -> float:
+        return self.num_samples / float(max(self.sr, 1))
+
+    def columns(self, start_sample: float, samples_per_column: float, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(mins, maxs, valid) for `count` columns, column i covering samples
+        [start + i * spc, start + (i + 1) * spc). Columns outside the audio are invalid."""
+        mins_out = np.zeros(count, dtype=np.float32)
+        maxs_out = np.zeros(count, dtype=np.float32)
+        if not self.levels or count <= 0:
+            return mins_out, maxs_out, np.zeros(count, dtype=bool)
+        level = int(np.clip(np.floor(np.log2(max(samples_per_column / self.base_block, 1.0))), 0, len(self.levels) - 1))
+        mins, maxs = self.levels[level]
+        block = float(self.base_block << level)
+        edges = start_sample + np.arange(count + 1) * float(samples_per_column)
+        lo = np.floor(edges[:-1] / block).astype(np.int64)
+        hi = np.maximum(np.ceil(edges[1:] / block).astype(np.int64), lo + 1)
+        valid = (hi > 0) & (lo < len(mins)) & (edges[1:] > 0) & (edges[:-1] < self.num_samples)
+        lo = np.clip(lo, 0, len(mins) - 1)
+        hi = np.clip(hi, lo + 1, len(mins))
+        mins_out[:] = mins[lo]
+        maxs_out[:] = maxs[lo]
+        span = hi - lo
+        for k in range(1, int(span.max()) if len(span) else 1):
+            more = span > k
+            mins_out[more] = np.minimum(mins_out[more], mins[lo[more] + k])
+            maxs_out[more] = np.maximum(maxs_out[more], maxs[lo[more] + k])
+        return mins_out, maxs_out, valid
+
+class BeatIndex:
+    """Beat times kept sorted for binary-search queries: visible ranges while painting,
+    neighbours for snapping and nearest-beat distances."""
+
+    def __init__(self, times=None):
+        self.times = np.sort(np.asarray(times if times is not None else [], dtype=np.float64).ravel())
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def range(self, start_s: float, end_s: float) -> np.ndarray:
+        """Beats with start_s <= t <= end_s (a view, no copy)."""
+        lo = np.searchsorted(self.times, start_s, side='left')
+        hi = np.searchsorted(self.times, end_s, side='right')
+        return self.times[lo:hi]
+
+    def nearest(self, t: float) -> Optional[float]:
+        if not len(self.times):
+            return None
+        i = int(np.searchsorted(self.times, t))
+        candidates = self.times[max(0, i - 1):i + 1]
+        return float(candidates[np.argmin(np.abs(candidates - t))])
+
+    def before(self, t: float) -> Optional[float]:
+        """Last beat strictly before t."""
+        i = int(np.searchsorted(self.times, t, side='left'))
+        return float(self.times[i - 1]) if i > 0 else None
+
+    def after(self, t: float) -> Optional[float]:
+        """First beat strictly after t."""
+        i = int(np.searchsorted(self.times, t, side='right'))
+        return float(self.times[i]) if i < len(self.times) else None
+
+    def nearest_distance(self, times: np.ndarray) -> np.ndarray:
+        """Distance from each of `times` to its nearest beat (inf when the index is empty)."""
+        times = np.asarray(times, dtype=np.float64)
+        if not len(self.times):
+            return np.full(times.shape, np.inf)
+        right = np.clip(np.searchsorted(self.times, times), 0, len(self.times) - 1)
+        left = np.clip(right - 1, 0, len(self.times) - 1)
+        return np.minimum(np.abs(self.times[right] - times), np.abs(self.times[left] - times))
+
+# Similarity colour bands: (lower bound exclusive, colour); columns <= 0.0 use the first entry
+WAVEFORM_BAND_COLORS = (
+    (None, (20, 20, 20, 200)),    # Black - poor match
+    (0.0, (80, 60, 120, 180)),    # Dark purple - weak match
+    (0.4, (60, 80, 140, 200)),    # Dark blue - medium match
+    (0.7, (0, 255, 0, 200)),      # Green - strong match
+)
+TIME_TICK_STEPS_S = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+def windowed_correlation(a: np.ndarray, b: np.ndarray, half_window: int) -> np.ndarray:
+    """Pearson correlation of a and b over the window [i - half_window, i + half_window] around
+    every index (clipped at the ends), from prefix sums in one vectorized pass. Windows with
+    fewer than two samples or zero variance score 0, as the per-window np.corrcoef loop did."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n = min(len(a), len(b))
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+    a, b = a[:n], b[:n]
+
+    def _prefix(x):
+        return np.concatenate([[0.0], np.cumsum(x)])
+
+    index = np.arange(n)
+    lo = np.maximum(index - half_window, 0)
+    hi = np.minimum(index + half_window + 1, n)
+    count = (hi - lo).astype(np.float64)
+    sa, sb, saa, sbb, sab = [prefix[hi] - prefix[lo] for prefix in map(_prefix, (a, b, a * a, b * b, a * b))]
+    var_a = count * saa - sa * sa
+    var_b = count * sbb - sb * sb
+    # Relative threshold: prefix-sum cancellation leaves ~1e-16 noise on constant windows
+    valid = (count > 1) & (var_a > 1e-12 * count * saa) & (var_b > 1e-12 * count * sbb)
+    result = np.zeros(n, dtype=np.float64)
+    result[valid] = (count * sab - sa * sb)[valid] / np.sqrt(var_a[valid] * var_b[valid])
+    return np.clip(result, -1.0, 1.0)
+
 class WaveformWidget(QtWidgets.QWidget):
     """Custom widget for rendering waveforms with color-coded similarity."""
     
@@ -78,34 +234,86 @@ class WaveformWidget(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumHeight(400)
-        self.video_waveform = None
-        self.target_waveform = None
+        self.video_peaks = None
+        self.target_peaks = None
         self.similarity = None
-        self.time_axis = None
+        self.similarity_rate = 20.0
+        self.duration_s = 0.0
         self.offset = 0.0
         self.video_beats = None
         self.target_beats = None
         
-    def set_waveforms(self, video_data, target_data, similarity_data, time_data, offset, video_beats=None, target_beats=None):
-        """Update waveform data and trigger repaint."""
-        self.video_waveform = video_data
-        self.target_waveform = target_data
-        self.similarity = similarity_data
-        self.time_axis = time_data
+    def set_waveforms(self, video_peaks, target_peaks, similarity_data, duration_s, offset,
+                      video_beats=None, target_beats=None, similarity_rate=20.0):
+        """Update waveform data and trigger repaint.
+        video_peaks/target_peaks are PeakPyramids; similarity_data is sampled at similarity_rate Hz
+        on the video timeline; the target is drawn shifted by offset seconds. Beats are BeatIndex
+        instances (plain arrays are indexed here, which sorts them on every call)."""
+        self.video_peaks = video_peaks
+        self.target_peaks = target_peaks
+        self.similarity = None if similarity_data is None else np.asarray(similarity_data, dtype=np.float64)
+        self.similarity_rate = float(similarity_rate)
+        self.duration_s = float(duration_s)
         self.offset = offset
-        self.video_beats = video_beats
-        self.target_beats = target_beats
+        self.video_beats = video_beats if isinstance(video_beats, BeatIndex) or video_beats is None else BeatIndex(video_beats)
+        self.target_beats = target_beats if isinstance(target_beats, BeatIndex) or target_beats is None else BeatIndex(target_beats)
         self.update()  # Trigger paintEvent
+
+    def _column_bands(self, width: int) -> np.ndarray:
+        """Colour band index per pixel column from the mean similarity under the column."""
+        if self.similarity is None or not len(self.similarity):
+            return np.zeros(width, dtype=np.int64)
+        edges = (np.arange(width + 1) * (self.duration_s / width) * self.similarity_rate).astype(np.int64)
+        edges = np.clip(edges, 0, len(self.similarity))
+        hi = np.maximum(edges[1:], np.minimum(edges[:-1] + 1, len(self.similarity)))
+        cumulative = np.concatenate([[0.0], np.cumsum(self.similarity)])
+        counts = np.maximum(hi - edges[:-1], 1)
+        column_similarity = (cumulative[hi] - cumulative[edges[:-1]]) / counts
+        thresholds = [bound for bound, _color in WAVEFORM_BAND_COLORS[1:]]
+        return np.digitize(column_similarity, thresholds, right=True)
+
+    def _draw_peaks(self, painter, peaks, bands, y_offset: int, section_height: int, shift_s: float) -> None:
+        """Draw one vertical min/max span per pixel column, batched into one path per colour band."""
+        width = self.width()
+        if peaks is None or width <= 0 or self.duration_s <= 0:
+            return
+        samples_per_column = self.duration_s * peaks.sr / width
+        mins, maxs, valid = peaks.columns(-shift_s * peaks.sr, samples_per_column, width)
+        scale = (section_height // 2) / (peaks.peak + 1e-8)
+        center = y_offset + section_height // 2
+        tops = (center - maxs * scale).astype(np.int64)
+        bottoms = (center - mins * scale).astype(np.int64)
+        for band_index, (_bound, rgba) in enumerate(WAVEFORM_BAND_COLORS):
+            columns = np.flatnonzero(valid & (bands == band_index))
+            if not len(columns):
+                continue
+            path = QtGui.QPainterPath()
+            for x, top, bottom in zip(columns.tolist(), tops[columns].tolist(), bottoms[columns].tolist()):
+                path.moveTo(x + 0.5, top)
+                path.lineTo(x + 0.5, bottom + 1)
+            painter.setPen(QtGui.QPen(QtGui.QColor(*rgba), 1))
+            painter.drawPath(path)
+    
+    def _draw_beat_markers(self, painter, beat_times: np.ndarray, width: int, y_top: int, y_bottom: int, color) -> None:
+        """Short vertical markers at the given (visible) beat times, batched into one path."""
+        if not len(beat_times):
+            return
+        columns = np.unique((beat_times * (width / self.duration_s)).astype(np.int64))
+        path = QtGui.QPainterPath()
+        for x in columns.tolist():
+            path.moveTo(x + 0.5, y_top)
+            path.lineTo(x + 0.5, y_bottom)
+        painter.setPen(QtGui.QPen(color, 1))  # 1px wide
+        painter.drawPath(path)
     
     def paintEvent(self, event):
         """Paint the waveforms."""
         painter = QtGui.QPainter(self)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
         
         # Background
         painter.fillRect(self.rect(), QtGui.QColor(30, 30, 30))
         
-        if self.video_waveform is None or self.target_waveform is None:
+        if self.video_peaks is None or self.target_peaks is None or self.duration_s <= 0:
             # Draw placeholder text
             painter.setPen(QtGui.QColor(100, 100, 100))
             painter.drawText(self.rect(), QtCore.Qt.AlignCenter, 
@@ -114,6 +322,7 @@ class WaveformWidget(QtWidgets.QWidget):
         
         width = self.width()
         height = self.height()
+        max_time = self.duration_s
         
         # Split into two sections (top = video, bottom = target) with NO gap
         video_height = height // 2
@@ -121,92 +330,54 @@ class WaveformWidget(QtWidgets.QWidget):
         video_y_offset = 0
         target_y_offset = height // 2
         
+        # Draw waveforms: one span per pixel column, cost independent of audio length
+        bands = self._column_bands(width)
+        self._draw_peaks(painter, self.video_peaks, bands, video_y_offset, video_height, 0.0)
+        self._draw_peaks(painter, self.target_peaks, bands, target_y_offset, target_height, self.offset)
+        
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
         # Draw labels
         painter.setPen(QtGui.QColor(200, 200, 200))
         painter.drawText(10, video_y_offset + 15, f"VIDEO AUDIO (offset={self.offset:+.3f}s)")
         painter.drawText(10, target_y_offset + 15, "TARGET AUDIO")
         
-        # Draw waveforms
-        num_samples = len(self.video_waveform)
-        
-        for i in range(num_samples - 1):
-            x1 = int((i / num_samples) * width)
-            x2 = int(((i + 1) / num_samples) * width)
-            
-            # Get similarity color
-            sim = self.similarity[i] if i < len(self.similarity) else 0.0
-            if sim > 0.7:
-                color = QtGui.QColor(0, 255, 0, 200)  # Green - strong match
-            elif sim > 0.4:
-                color = QtGui.QColor(60, 80, 140, 200)  # Dark blue - medium match
-            elif sim > 0.0:
-                color = QtGui.QColor(80, 60, 120, 180)  # Dark purple - weak match
-            else:
-                color = QtGui.QColor(20, 20, 20, 200)  # Black - poor match
-            
-            painter.setPen(QtGui.QPen(color, 1))
-            
-            # Video waveform
-            v1 = self.video_waveform[i]
-            v2 = self.video_waveform[i + 1]
-            y1_video = int(video_y_offset + video_height // 2 - v1 * video_height // 2)
-            y2_video = int(video_y_offset + video_height // 2 - v2 * video_height // 2)
-            painter.drawLine(x1, y1_video, x2, y2_video)
-            
-            # Target waveform
-            t1 = self.target_waveform[i]
-            t2 = self.target_waveform[i + 1]
-            y1_target = int(target_y_offset + target_height // 2 - t1 * target_height // 2)
-            y2_target = int(target_y_offset + target_height // 2 - t2 * target_height // 2)
-            painter.drawLine(x1, y1_target, x2, y2_target)
-        
         # Draw center lines
         painter.setPen(QtGui.QColor(80, 80, 80))
         painter.drawLine(0, video_y_offset + video_height // 2, width, video_y_offset + video_height // 2)
         painter.drawLine(0, target_y_offset + target_height // 2, width, target_y_offset + target_height // 2)
         
-        # Draw beat markers as single-pixel lines at edges for alignment checking
+        # Draw beat markers as single-pixel lines at edges for alignment checking; only beats in
+        # the visible range are fetched, and at most one marker is drawn per pixel column
         # Video beats at BOTTOM of video waveform section
-        if self.video_beats is not None and self.time_axis is not None and len(self.time_axis) > 0:
-            max_time = self.time_axis[-1]
-            painter.setPen(QtGui.QPen(QtGui.QColor(0, 200, 255), 1))  # Cyan, 1px wide
+        if self.video_beats is not None:
             video_beat_y = video_y_offset + video_height  # Bottom edge of video waveform
-            for beat_time in self.video_beats:
-                if 0 <= beat_time <= max_time:
-                    x = int((beat_time / max_time) * width)
-                    # Draw single pixel line at bottom of video waveform
-                    painter.drawLine(x, video_beat_y - 5, x, video_beat_y)
+            self._draw_beat_markers(painter, self.video_beats.range(0.0, max_time), width,
+                                    video_beat_y - 5, video_beat_y, QtGui.QColor(0, 200, 255))  # Cyan
         
         # Target beats at TOP of target waveform section
-        if self.target_beats is not None and self.time_axis is not None and len(self.time_axis) > 0:
-            max_time = self.time_axis[-1]
-            painter.setPen(QtGui.QPen(QtGui.QColor(255, 0, 255), 1))  # Magenta, 1px wide
+        if self.target_beats is not None:
             target_beat_y = target_y_offset  # Top edge of target waveform
-            for beat_time in self.target_beats:
-                adjusted_beat = beat_time + self.offset
-                if 0 <= adjusted_beat <= max_time:
-                    x = int((adjusted_beat / max_time) * width)
-                    # Draw single pixel line at top of target waveform
-                    painter.drawLine(x, target_beat_y, x, target_beat_y + 5)
-        
-        # Draw time markers
+            visible = self.target_beats.range(-self.offset, max_time - self.offset) + self.offset
+            self._draw_beat_markers(painter, visible, width,
+                                    target_beat_y, target_beat_y + 5, QtGui.QColor(255, 0, 255))  # Magenta
+        
+        # Draw time markers (spacing adapts so labels stay ~80px apart on long tracks)
         painter.setPen(QtGui.QColor(150, 150, 150))
-        if self.time_axis is not None and len(self.time_axis) > 0:
-            max_time = self.time_axis[-1]
-            for t in range(0, int(max_time) + 1, 10):  # Every 10 seconds
-                x = int((t / max_time) * width)
-                painter.drawLine(x, 0, x, height)
-                painter.drawText(x + 2, height - 5, f"{t}s")
+        tick_s = next((step for step in TIME_TICK_STEPS_S if step * width / max_time >= 80), TIME_TICK_STEPS_S[-1])
+        for t in range(0, int(max_time) + 1, tick_s):
+            x = int((t / max_time) * width)
+            painter.drawLine(x, 0, x, height)
+            label = f"{t}s" if t < 60 else f"{t // 60}:{t % 60:02d}"
+            painter.drawText(x + 2, height - 5, label)
         
     
     def mousePressEvent(self, event):
         """Handle mouse clicks to set playhead position."""
-        if self.time_axis is not None and len(self.time_axis) > 0:
+        if self.duration_s > 0:
             # Calculate time from click position
             x = event.x()
             width = self.width()
-            max_time = self.time_axis[-1]
-            clicked_time = (x / width) * max_time
+            clicked_time = (x / width) * self.duration_s
             
             # Emit signal with the clicked time
             self.clicked_time.emit(clicked_time)
@@ -272,6 +443,7 @@ class SyncWorker(QtCore.QThread):
                 sr=int(self.params.get('sr', 22050)),
                 hop_length=int(self.params.get('hop', 512)),
                 max_seek_s=float(self.params.get('max_seek', 10.0)),
+                precision_s=float(self.params.get('precision', 0.01)),
             )
             self.finished_ok.emit(result)
         except Exception as e:
@@ -279,6 +451,187 @@ class SyncWorker(QtCore.QThread):
         finally:
             sys.stdout = old_stdout
 
+# ========================= Preview playback =========================
+
+class PreviewMixer:
+    """Mixes video audio (left) and offset target audio (right) block by block from memory.
+    Offset, mute and seek changes are picked up at the next render() call, i.e. at the next
+    output buffer boundary."""
+
+    def __init__(self, video_audio: np.ndarray, target_audio: np.ndarray, sr: int,
+                 offset_s: float = 0.0, gain: Optional[float] = None):
+        self.video_audio = video_audio
+        self.target_audio = target_audio
+        self.sr = int(sr)
+        if gain is None:
+            peak = max(float(np.max(np.abs(video_audio))) if len(video_audio) else 0.0,
+                       float(np.max(np.abs(target_audio))) if len(target_audio) else 0.0)
+            gain = 0.8 / (peak + 1e-8)
+        self.gain = float(gain)
+        self._lock = threading.Lock()
+        self.position = 0
+        self.offset_samples = int(round(offset_s * self.sr))
+        self.video_muted = False
+        self.target_muted = False
+
+    def set_offset(self, offset_s: float) -> None:
+        with self._lock:
+            self.offset_samples = int(round(offset_s * self.sr))
+
+    def set_mute(self, video: Optional[bool] = None, target: Optional[bool] = None) -> None:
+        with self._lock:
+            if video is not None:
+                self.video_muted = bool(video)
+            if target is not None:
+                self.target_muted = bool(target)
+
+    def seek(self, seconds: float) -> None:
+        with self._lock:
+            position = int(seconds * self.sr)
+            self.position = position if 0 <= position < self._end() else 0
+
+    def _end(self) -> int:
+        # Same span as the old full-buffer playback: until either track runs out
+        return max(0, min(len(self.video_audio), len(self.target_audio) + self.offset_samples))
+
+    @property
+    def position_s(self) -> float:
+        return self.position / float(self.sr)
+
+    @property
+    def finished(self) -> bool:
+        with self._lock:
+            return self.position >= self._end()
+
+    @staticmethod
+    def _copy_span(source: np.ndarray, start: int, destination: np.ndarray) -> None:
+        lo = max(start, 0)
+        hi = min(start + len(destination), len(source))
+        if hi > lo:
+            destination[lo - start:hi - start] = source[lo:hi]
+
+    def render(self, frames: int) -> np.ndarray:
+        """Next `frames` stereo float32 samples; silence past the end."""
+        with self._lock:
+            position, offset = self.position, self.offset_samples
+            video_muted, target_muted = self.video_muted, self.target_muted
+            end = self._end()
+            self.position = position + frames
+        block = np.zeros((frames, 2), dtype=np.float32)
+        available = max(0, min(frames, end - position))
+        if available:
+            if not video_muted:
+                self._copy_span(self.video_audio, position, block[:available, 0])
+            if not target_muted:
+                self._copy_span(self.target_audio, position - offset, block[:available, 1])
+            block *= self.gain
+        return block
+
+class _CallbackPreviewOutput:
+    """sounddevice callback stream pulling blocks from the mixer."""
+
+    def __init__(self, mixer: PreviewMixer, block_size: int = 512):
+        self.mixer = mixer
+        self.stream = sd.OutputStream(samplerate=mixer.sr, channels=2, dtype='float32',
+                                      blocksize=block_size, callback=self._callback)
+
+    def _callback(self, outdata, frames, time_info, status):
+        outdata[:] = self.mixer.render(frames)
+        if self.mixer.finished:
+            raise sd.CallbackStop()
+
+    def start(self) -> None:
+        self.stream.start()
+
+    def stop(self) -> None:
+        self.stream.abort()
+        self.stream.close()
+
+    def is_active(self) -> bool:
+        return bool(self.stream.active)
+
+class _ThreadedPreviewOutput:
+    """Feeds mixer blocks from a thread: into a pygame channel queue, or (null device) nowhere,
+    at real-time pace. The null device keeps the full pipeline testable without audio hardware."""
+
+    def __init__(self, mixer: PreviewMixer, block_size: int = 2048, null_device: bool = False, realtime: bool = True):
+        self.mixer = mixer
+        self.block_size = int(block_size)
+        self.null_device = null_device
+        self.realtime = realtime
+        self.blocks_rendered = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _next_sound(self):
+        import pygame
+        block = np.clip(self.mixer.render(self.block_size), -1.0, 1.0)
+        return pygame.sndarray.make_sound(np.ascontiguousarray((block * 32767).astype(np.int16)))
+
+    def _run(self) -> None:
+        block_s = self.block_size / float(self.mixer.sr)
+        if self.null_device:
+            next_time = time.perf_counter()
+            while not self._stop_event.is_set() and not self.mixer.finished:
+                self.mixer.render(self.block_size)
+                self.blocks_rendered += 1
+                if self.realtime:
+                    next_time += block_s
+                    self._stop_event.wait(max(0.0, next_time - time.perf_counter()))
+            return
+        import pygame
+        channel = pygame.mixer.find_channel(True)
+        channel.play(self._next_sound())
+        self.blocks_rendered += 1
+        # Keep exactly one block queued behind the playing one
+        while not self._stop_event.is_set() and not self.mixer.finished:
+            if channel.get_queue() is None:
+                channel.queue(self._next_sound())
+                self.blocks_rendered += 1
+            self._stop_event.wait(block_s / 4.0)
+        while not self._stop_event.is_set() and channel.get_busy():
+            self._stop_event.wait(block_s / 4.0)
+        channel.stop()
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def is_active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+def _init_pygame_mixer(sr: int) -> None:
+    """Import pygame and (re)initialise its mixer for stereo int16 at sr."""
+    import pygame
+    current = pygame.mixer.get_init()
+    if current and current[0] != int(sr):
+        pygame.mixer.quit()
+        current = None
+    if not current:
+        pygame.mixer.init(frequency=int(sr), size=-16, channels=2, buffer=512)
+
+def open_preview_output(mixer: PreviewMixer, backend: str = 'auto', block_size: Optional[int] = None):
+    """Output for a PreviewMixer: 'sounddevice' (callback stream), 'pygame' (queued channel),
+    'null' (no audio device, real-time pacing) or 'auto' (sounddevice when installed, else pygame)."""
+    if backend == 'auto':
+        backend = 'sounddevice' if sd is not None else 'pygame'
+    if backend == 'sounddevice':
+        if sd is None:
+            raise RuntimeError("sounddevice is not installed")
+        return _CallbackPreviewOutput(mixer, block_size or 512)
+    if backend == 'pygame':
+        _init_pygame_mixer(mixer.sr)
+        return _ThreadedPreviewOutput(mixer, block_size or 2048)
+    if backend == 'null':
+        return _ThreadedPreviewOutput(mixer, block_size or 1024, null_device=True)
+    raise ValueError(f"Unknown preview backend: {backend}")
+
 class VideoMusicSyncGUI(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
@@ -290,18 +643,26 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         # Store loaded audio for visualization
         self.video_audio = None
         self.target_audio = None
+        self.video_peaks = None
+        self.target_peaks = None
+        self._viz_decimated = None
         self.video_beats = None
         self.target_beats = None
+        self.video_beat_index: Optional[BeatIndex] = None
+        self.target_beat_index: Optional[BeatIndex] = None
         self.sr = 22050
         self.current_offset = 0.0
         
-        # Audio playback
-        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+        # Audio playback (streamed from PreviewMixer; pygame mixer is the fallback output)
         self.is_playing = False
         self.video_muted = False
         self.target_muted = False
-        self.playback_thread = None
+        self.preview_mixer: Optional[PreviewMixer] = None
+        self.preview_output = None
         self.playhead_position = 0.0  # seconds
+        self.playback_timer = QtCore.QTimer(self)
+        self.playback_timer.setInterval(100)
+        self.playback_timer.timeout.connect(self._poll_playback)
         
         # Auto-sync results
         self.sync_results = []  # Store all randomized sampling results
@@ -644,13 +1005,23 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         
         settings_layout.addWidget(QtWidgets.QLabel('  Max Search Offset (s):'))
         self.dsp_maxseek = QtWidgets.QDoubleSpinBox()
-        self.dsp_maxseek.setRange(0.0, 120.0)
+        self.dsp_maxseek.setRange(0.0, 1800.0)
         self.dsp_maxseek.setSingleStep(0.5)
         self.dsp_maxseek.setDecimals(2)
         self.dsp_maxseek.setValue(30.0)
         self.dsp_maxseek.setMinimumWidth(70)
         settings_layout.addWidget(self.dsp_maxseek)
         
+        settings_layout.addWidget(QtWidgets.QLabel('  Precision (s):'))
+        self.dsp_precision = QtWidgets.QDoubleSpinBox()
+        self.dsp_precision.setRange(0.001, 0.5)
+        self.dsp_precision.setSingleStep(0.005)
+        self.dsp_precision.setDecimals(3)
+        self.dsp_precision.setValue(0.01)
+        self.dsp_precision.setToolTip(f'Offset precision of the coarse-to-fine search (used from {AUTO_COARSE_TO_FINE_SEEK_S:.0f}s max seek); the exhaustive search refines peaks to sub-frame')
+        self.dsp_precision.setMinimumWidth(70)
+        settings_layout.addWidget(self.dsp_precision)
+        
         settings_layout.addStretch(1)
         autosync_layout.addLayout(settings_layout)
         
@@ -830,6 +1201,7 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
             'sr': int(self.spin_sr.value()),
             'hop': int(self.spin_hop.value()),
             'max_seek': float(self.dsp_maxseek.value()),
+            'precision': float(self.dsp_precision.value()),
         }
 
         self.txt_log.clear()
@@ -975,23 +1347,26 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         
         try:
             self._append_log('[LOAD] Loading video audio...\n')
-            self.video_audio, _, _ = load_audio_from_video(video, self.sr)
+            self.video_audio, _, _ = load_source_audio(video, self.sr, is_video=True)
             
             self._append_log('[LOAD] Loading target audio...\n')
-            self.target_audio, _, _ = load_audio_from_any(audio, self.sr)
+            self.target_audio, _, _ = load_source_audio(audio, self.sr)
             
-            # Detect beats
+            # Detect beats (cached per file, shared with the sync search)
             self._append_log('[ANALYZE] Detecting beats in video audio...\n')
-            onset_env = librosa.onset.onset_strength(y=self.video_audio, sr=self.sr, hop_length=512, aggregate=np.median)
-            _, video_beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=self.sr, hop_length=512)
-            self.video_beats = librosa.frames_to_time(video_beat_frames, sr=self.sr, hop_length=512)
+            _, self.video_beats = compute_beat_analysis(self.video_audio, self.sr, 512, source_path=video)
             
             self._append_log('[ANALYZE] Detecting beats in target audio...\n')
-            onset_env = librosa.onset.onset_strength(y=self.target_audio, sr=self.sr, hop_length=512, aggregate=np.median)
-            _, target_beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=self.sr, hop_length=512)
-            self.target_beats = librosa.frames_to_time(target_beat_frames, sr=self.sr, hop_length=512)
+            _, self.target_beats = compute_beat_analysis(self.target_audio, self.sr, 512, source_path=audio)
+            self.video_beat_index = BeatIndex(self.video_beats)
+            self.target_beat_index = BeatIndex(self.target_beats)
             
             self._append_log(f'[SUCCESS] Audio loaded. Found {len(self.video_beats)} video beats, {len(self.target_beats)} target beats\n')
+            # Peak pyramids are built once per load; repaints only query them per pixel column
+            self.video_peaks = PeakPyramid(self.video_audio, self.sr)
+            self.target_peaks = PeakPyramid(self.target_audio, self.sr)
+            self.spin_playhead.setMaximum(max(120.0, self.video_peaks.duration_s))
+            self._viz_decimated = None
             self.visualize_waveforms()
             
         except Exception as e:
@@ -1002,12 +1377,15 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         if self.video_audio is None or self.target_audio is None:
             return
         
-        # Downsample for visualization (show first 120 seconds)
-        max_duration = 120.0  # seconds
+        # Similarity track at 20 samples/sec over the whole video; the waveforms themselves are
+        # drawn from the peak pyramids built in load_waveforms
         downsample_factor = int(self.sr * 0.05)  # 1 sample per 0.05s = 20 samples/sec
         
-        video_viz = self.video_audio[::downsample_factor]
-        target_viz = self.target_audio[::downsample_factor]
+        # Decimated tracks only change on load; offset changes reuse them
+        if self._viz_decimated is None:
+            self._viz_decimated = (np.asarray(self.video_audio[::downsample_factor], dtype=np.float64),
+                                   np.asarray(self.target_audio[::downsample_factor], dtype=np.float64))
+        video_viz, target_viz = self._viz_decimated
         
         # Apply current offset
         offset_samples = int(self.current_offset * self.sr / downsample_factor)
@@ -1016,45 +1394,26 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         elif offset_samples < 0:
             target_viz = target_viz[abs(offset_samples):]
         
-        # Limit to max duration
-        max_samples = int(max_duration * 20)  # 20 samples per second
-        video_viz = video_viz[:max_samples]
-        target_viz = target_viz[:max_samples]
-        
         # Match lengths
         min_len = min(len(video_viz), len(target_viz))
         video_viz = video_viz[:min_len]
         target_viz = target_viz[:min_len]
         
-        # Normalize to [-1, 1]
-        video_viz = video_viz / (np.max(np.abs(video_viz)) + 1e-8)
-        target_viz = target_viz / (np.max(np.abs(target_viz)) + 1e-8)
-        
-        # Compute local similarity for color coding
+        # Compute local similarity for color coding (one vectorized pass over the whole track)
         window_size = 10  # 0.5 second window
-        similarity = []
-        for i in range(len(video_viz)):
-            start = max(0, i - window_size // 2)
-            end = min(len(video_viz), i + window_size // 2 + 1)
-            v_seg = video_viz[start:end]
-            t_seg = target_viz[start:end]
-            if len(v_seg) > 1 and len(t_seg) > 1:
-                corr = np.corrcoef(v_seg, t_seg)[0, 1]
-                similarity.append(corr if not np.isnan(corr) else 0.0)
-            else:
-                similarity.append(0.0)
-        
-        # Create time axis
-        time_axis = np.arange(len(video_viz)) * 0.05  # 0.05 seconds per sample
+        similarity = windowed_correlation(video_viz, target_viz, window_size // 2)
         
         # Update the waveform widget with beats
+        if self.video_peaks is None or self.target_peaks is None:
+            self.video_peaks = PeakPyramid(self.video_audio, self.sr)
+            self.target_peaks = PeakPyramid(self.target_audio, self.sr)
         self.waveform_widget.set_waveforms(
-            video_viz, target_viz, similarity, time_axis, self.current_offset,
-            self.video_beats, self.target_beats
+            self.video_peaks, self.target_peaks, similarity, self.video_peaks.duration_s, self.current_offset,
+            self.video_beat_index, self.target_beat_index, similarity_rate=self.sr / float(downsample_factor)
         )
         
         # Update similarity score
-        avg_similarity = np.mean(similarity)
+        avg_similarity = float(np.mean(similarity)) if len(similarity) else 0.0
         self.lbl_similarity.setText(f'Similarity: {avg_similarity:.3f}')
         if avg_similarity > 0.7:
             self.lbl_similarity.setStyleSheet('color: #0a0; font-weight: bold;')
@@ -1066,6 +1425,8 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
     def on_manual_offset_changed(self, value):
         """Update visualization when manual offset changes."""
         self.current_offset = value
+        if self.preview_mixer is not None:
+            self.preview_mixer.set_offset(value)  # heard from the next buffer
         if self.video_audio is not None and self.target_audio is not None:
             self.visualize_waveforms()
     
@@ -1074,74 +1435,48 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         self.spin_playhead.setValue(time_seconds)
         self._append_log(f'[PLAYHEAD] Set to {time_seconds:.2f}s (click on waveform)\n')
     
-    def snap_to_prev_beat(self):
-        """Snap offset to align with previous beat pair."""
-        if self.video_beats is None or self.target_beats is None:
+    def _snap_to_beat(self, direction: int):
+        """Step the offset to the previous (-1) / next (+1) alignment of a target beat onto the
+        video beat nearest the playhead. A target beat t lands on video beat v at offset v - t
+        (the waveform view draws target beats at t + offset), so neighbouring alignments are one
+        target beat apart and come from a single binary search."""
+        if self.video_beat_index is None or self.target_beat_index is None:
             self._append_log('[ERROR] Please load waveforms first\n')
             return
         
-        if len(self.video_beats) == 0 or len(self.target_beats) == 0:
+        if len(self.video_beat_index) == 0 or len(self.target_beat_index) == 0:
             self._append_log('[ERROR] No beats detected\n')
             return
         
-        # Find the best previous beat alignment
+        anchor = self.video_beat_index.nearest(self.spin_playhead.value())
         current_offset = self.current_offset
-        
-        # Generate all possible offsets from beat pairs
-        possible_offsets = []
-        for v_beat in self.video_beats[:50]:  # Check first 50 beats
-            for t_beat in self.target_beats[:50]:
-                offset = t_beat - v_beat
-                # Only consider offsets less than current (previous)
-                if offset < current_offset - 0.01:  # Small epsilon to avoid same beat
-                    possible_offsets.append(offset)
-        
-        if not possible_offsets:
-            self._append_log('[BEAT SNAP] No previous beat alignment found\n')
+        label = 'previous' if direction < 0 else 'next'
+        # offset = anchor - t, so a smaller offset needs a later target beat and vice versa
+        epsilon = 0.01  # Small epsilon to avoid same beat
+        if direction < 0:
+            target_beat = self.target_beat_index.after(anchor - current_offset + epsilon)
+        else:
+            target_beat = self.target_beat_index.before(anchor - current_offset - epsilon)
+        if target_beat is None:
+            self._append_log(f'[BEAT SNAP] No {label} beat alignment found\n')
             return
         
-        # Find the closest offset to current
-        possible_offsets.sort(reverse=True)  # Sort descending
-        best_offset = possible_offsets[0]  # Largest offset that's still less than current
-        
+        best_offset = anchor - target_beat
         self.spin_manual_offset.setValue(best_offset)
-        self._append_log(f'[BEAT SNAP] Snapped to previous beat alignment: {best_offset:+.3f}s\n')
+        self._append_log(f'[BEAT SNAP] Snapped to {label} beat alignment: {best_offset:+.3f}s '
+                         f'(target beat {target_beat:.2f}s -> video beat {anchor:.2f}s)\n')
+    
+    def snap_to_prev_beat(self):
+        """Snap offset to align with previous beat pair."""
+        self._snap_to_beat(-1)
     
     def snap_to_next_beat(self):
         """Snap offset to align with next beat pair."""
-        if self.video_beats is None or self.target_beats is None:
-            self._append_log('[ERROR] Please load waveforms first\n')
-            return
-        
-        if len(self.video_beats) == 0 or len(self.target_beats) == 0:
-            self._append_log('[ERROR] No beats detected\n')
-            return
-        
-        # Find the best next beat alignment
-        current_offset = self.current_offset
-        
-        # Generate all possible offsets from beat pairs
-        possible_offsets = []
-        for v_beat in self.video_beats[:50]:  # Check first 50 beats
-            for t_beat in self.target_beats[:50]:
-                offset = t_beat - v_beat
-                # Only consider offsets greater than current (next)
-                if offset > current_offset + 0.01:  # Small epsilon to avoid same beat
-                    possible_offsets.append(offset)
-        
-        if not possible_offsets:
-            self._append_log('[BEAT SNAP] No next beat alignment found\n')
-            return
-        
-        # Find the closest offset to current
-        possible_offsets.sort()  # Sort ascending
-        best_offset = possible_offsets[0]  # Smallest offset that's still greater than current
-        
-        self.spin_manual_offset.setValue(best_offset)
-        self._append_log(f'[BEAT SNAP] Snapped to next beat alignment: {best_offset:+.3f}s\n')
+        self._snap_to_beat(+1)
     
     def start_playback(self):
-        """Start playing both audio tracks with current offset from playhead position."""
+        """Stream both audio tracks with the current offset from the playhead position.
+        Offset and mute changes apply at the next buffer while playing."""
         if self.video_audio is None or self.target_audio is None:
             self._append_log('[ERROR] Please load waveforms first\n')
             return
@@ -1149,80 +1484,51 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         if self.is_playing:
             return  # Already playing
         
+        self.playhead_position = self.spin_playhead.value()
+        try:
+            peak = max(p.peak for p in (self.video_peaks, self.target_peaks)) if self.video_peaks and self.target_peaks else None
+            self.preview_mixer = PreviewMixer(self.video_audio, self.target_audio, self.sr, self.current_offset,
+                                              gain=(0.8 / (peak + 1e-8)) if peak is not None else None)
+            self.preview_mixer.set_mute(video=self.video_muted, target=self.target_muted)
+            self.preview_mixer.seek(self.playhead_position)
+            self.preview_output = open_preview_output(self.preview_mixer)
+            self.preview_output.start()
+        except Exception as e:
+            self._append_log(f'[ERROR] Playback failed: {e}\n')
+            self.preview_mixer = None
+            self.preview_output = None
+            return
+        
         self.is_playing = True
         self.btn_play.setEnabled(False)
         self.btn_pause.setEnabled(True)
-        self.playhead_position = self.spin_playhead.value()
-        
-        # Create mixed audio for playback
-        def playback_worker():
-            try:
-                # Apply offset to target
-                offset_samples = int(self.current_offset * self.sr)
-                if offset_samples > 0:
-                    target_aligned = np.pad(self.target_audio, (offset_samples, 0), mode='constant')
-                elif offset_samples < 0:
-                    target_aligned = self.target_audio[abs(offset_samples):]
-                else:
-                    target_aligned = self.target_audio
-                
-                # Match lengths
-                min_len = min(len(self.video_audio), len(target_aligned))
-                video_clip = self.video_audio[:min_len]
-                target_clip = target_aligned[:min_len]
-                
-                # Start from playhead position
-                start_sample = int(self.playhead_position * self.sr)
-                if start_sample >= min_len:
-                    start_sample = 0
-                video_clip = video_clip[start_sample:]
-                target_clip = target_clip[start_sample:]
-                
-                # Apply muting
-                if self.video_muted:
-                    video_clip = np.zeros_like(video_clip)
-                if self.target_muted:
-                    target_clip = np.zeros_like(target_clip)
-                
-                # Mix to stereo (video=left, target=right for separation)
-                stereo = np.column_stack((video_clip, target_clip))
-                
-                # Normalize
-                stereo = stereo / (np.max(np.abs(stereo)) + 1e-8) * 0.8
-                stereo = (stereo * 32767).astype(np.int16)
-                
-                # Play using pygame
-                sound = pygame.sndarray.make_sound(stereo)
-                sound.play()
-                
-                # Wait for playback to finish or stop
-                while pygame.mixer.get_busy() and self.is_playing:
-                    time.sleep(0.1)
-                
-                # Reset buttons
-                self.btn_play.setEnabled(True)
-                self.btn_pause.setEnabled(False)
-                self.is_playing = False
-                
-            except Exception as e:
-                self._append_log(f'[ERROR] Playback failed: {e}\n')
-                self.is_playing = False
-                self.btn_play.setEnabled(True)
-                self.btn_pause.setEnabled(False)
-        
-        self.playback_thread = threading.Thread(target=playback_worker, daemon=True)
-        self.playback_thread.start()
+        self.playback_timer.start()
+    
+    def _poll_playback(self):
+        """Reset the transport buttons once the stream has played to the end."""
+        if self.preview_output is not None and self.preview_output.is_active():
+            return
+        self.stop_playback()
     
     def stop_playback(self):
         """Stop audio playback."""
+        self.playback_timer.stop()
+        if self.preview_output is not None:
+            try:
+                self.preview_output.stop()
+            except Exception as e:
+                self._append_log(f'[WARN] Stopping playback: {e}\n')
+        self.preview_output = None
+        self.preview_mixer = None
         self.is_playing = False
-        pygame.mixer.stop()
         self.btn_play.setEnabled(True)
         self.btn_pause.setEnabled(False)
     
     def toggle_video_mute(self):
         """Toggle video audio mute."""
         self.video_muted = self.btn_mute_video.isChecked()
+        if self.preview_mixer is not None:
+            self.preview_mixer.set_mute(video=self.video_muted)
         if self.video_muted:
             self.btn_mute_video.setText('🔇 Video Audio (Muted)')
         else:
@@ -1231,6 +1537,8 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
     def toggle_target_mute(self):
         """Toggle target audio mute."""
         self.target_muted = self.btn_mute_target.isChecked()
+        if self.preview_mixer is not None:
+            self.preview_mixer.set_mute(target=self.target_muted)
         if self.target_muted:
             self.btn_mute_target.setText('🔇 Target Audio (Muted)')
         else:
@@ -1259,10 +1567,12 @@ class VideoMusicSyncGUI(QtWidgets.QWidget):
         try:
             self._append_log(f'[EXPORT] Exporting with offset: {self.current_offset:+.3f}s\n')
             
-            # Load video to get duration
-            video_clip = mpe.VideoFileClip(video)
-            video_duration = float(video_clip.duration)
-            video_clip.close()
+            # Video duration (ffprobe, falling back to moviepy)
+            video_duration = probe_duration(video)
+            if video_duration is None:
+                video_clip = mpe.VideoFileClip(video)
+                video_duration = float(video_clip.duration)
+                video_clip.close()
             
             # Apply offset
             offset_samples = int(self.current_offset * self.sr)
@@ -1316,17 +1626,128 @@ class SyncResult:
     video_path: str
     audio_path: str
     output_path: str
-    video_duration_s: float
+    video_duration_s: Optional[float]  # None: unknown (windowed load without a probed duration)
     target_audio_duration_s: float
     final_offset_s: float
     sync_points: list  # List of SyncPoint dicts
     offset_method: str  # 'median', 'weighted_average', 'single_peak'
     sync_quality: str  # 'excellent', 'ok', 'fair', 'poor'
     notes: str = ""
-
-def load_audio_from_video(video_path: str, sr: int) -> Tuple[np.ndarray, int, float]:
-    """Extract audio from video using moviepy and resample to sr with librosa.
-    Returns (mono_audio, sr, duration_seconds)."""
+    timings: dict = field(default_factory=dict)  # stage -> seconds
+
+FFMPEG_DEFAULT_PATH = r"C:/TOOLS/ffmpeg.exe"
+_ffmpeg_paths = {}
+_FFMPEG_DURATION_RE = re.compile(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)')
+
+def find_ffmpeg(tool: str = 'ffmpeg') -> Optional[str]:
+    """Locate ffmpeg/ffprobe: $VIDEO_SYNC_FFMPEG folder or exe, PATH, C:/TOOLS, then imageio-ffmpeg (moviepy's copy)."""
+    if tool in _ffmpeg_paths:
+        return _ffmpeg_paths[tool]
+    candidates = []
+    env_path = os.environ.get('VIDEO_SYNC_FFMPEG', '')
+    if env_path:
+        env_dir = env_path if os.path.isdir(env_path) else os.path.dirname(env_path)
+        candidates += [os.path.join(env_dir, tool + '.exe'), os.path.join(env_dir, tool)]
+    candidates.append(shutil.which(tool))
+    candidates.append(os.path.join(os.path.dirname(FFMPEG_DEFAULT_PATH), tool + '.exe'))
+    if tool == 'ffmpeg':
+        try:
+            import imageio_ffmpeg
+            candidates.append(imageio_ffmpeg.get_ffmpeg_exe())
+        except Exception:
+            pass
+    found = next((c for c in candidates if c and os.path.isfile(c)), None)
+    _ffmpeg_paths[tool] = found
+    return found
+
+def probe_duration(path: str) -> Optional[float]:
+    """Container duration in seconds via ffprobe, else from the 'Duration:' line ffmpeg prints for
+    its input (imageio-ffmpeg ships no ffprobe), or None when unavailable."""
+    ffprobe = find_ffmpeg('ffprobe')
+    if ffprobe:
+        cmd = [ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', path]
+        try:
+            return float(subprocess.check_output(cmd, stderr=subprocess.DEVNULL, universal_newlines=True).strip())
+        except Exception:
+            pass
+    ffmpeg = find_ffmpeg('ffmpeg')
+    if not ffmpeg:
+        return None
+    try:
+        # No output file: ffmpeg prints the input header and exits with an error
+        completed = subprocess.run([ffmpeg, '-hide_banner', '-nostdin', '-i', path], stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, universal_newlines=True, errors='replace', timeout=30)
+    except Exception:
+        return None
+    match = _FFMPEG_DURATION_RE.search(completed.stderr or '')
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600.0 + int(minutes) * 60.0 + float(seconds)
+
+def ffmpeg_load_audio(path: str, sr: int, start_s: Optional[float] = None, duration_s: Optional[float] = None,
+                      source_duration_s: Optional[float] = None) -> Tuple[np.ndarray, int, Optional[float]]:
+    """Decode the first audio stream of path to mono float32 at sr by piping f32le PCM from ffmpeg.
+    No temp files; start_s/duration_s restrict decoding to a time window. The buffer is
+    preallocated from the probed duration and filled in place with readinto.
+    Returns (mono_audio, sr, source_duration_seconds); the duration is None when it cannot be
+    probed and only a window was decoded."""
+    ffmpeg = find_ffmpeg('ffmpeg')
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found (set VIDEO_SYNC_FFMPEG or add it to PATH)")
+    if source_duration_s is None:
+        source_duration_s = probe_duration(path)
+    cmd = [ffmpeg, '-nostdin', '-v', 'error']
+    if start_s:
+        cmd += ['-ss', f"{float(start_s):.3f}"]
+    cmd += ['-i', path]
+    if duration_s:
+        cmd += ['-t', f"{float(duration_s):.3f}"]
+    cmd += ['-map', '0:a:0', '-vn', '-ac', '1', '-ar', str(int(sr)), '-acodec', 'pcm_f32le', '-f', 'f32le', 'pipe:1']
+
+    expected_s = duration_s or max(0.0, (source_duration_s or 0.0) - float(start_s or 0.0))
+    buffer = np.empty(int(expected_s * sr) + int(sr), dtype=np.float32)
+    filled_bytes = 0
+    stderr_chunks = []
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+    try:
+        while True:
+            view = memoryview(buffer).cast('B')
+            if filled_bytes >= len(view):
+                buffer = np.concatenate([buffer, np.empty(max(len(buffer) // 2, int(sr)), dtype=np.float32)])
+                continue
+            count = process.stdout.readinto(view[filled_bytes:])
+            if not count:
+                break
+            filled_bytes += count
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+        stderr_thread.join(timeout=5.0)
+    if return_code != 0:
+        message = b''.join(stderr_chunks).decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"ffmpeg failed to decode audio from {os.path.basename(path)}: {message or return_code}")
+    samples = filled_bytes // 4
+    if samples == 0:
+        raise RuntimeError("Video has no audio track.")
+    audio_waveform = buffer[:samples]
+    if samples < len(buffer) // 2:
+        audio_waveform = audio_waveform.copy()
+    if source_duration_s:
+        return audio_waveform, int(sr), float(source_duration_s)
+    # Unprobed: the decoded length is the source duration only when the whole stream was read
+    return audio_waveform, int(sr), (None if (start_s or duration_s) else samples / float(sr))
+
+def load_audio_from_video(video_path: str, sr: int, start_s: Optional[float] = None,
+                          duration_s: Optional[float] = None) -> Tuple[np.ndarray, int, Optional[float]]:
+    """Extract mono audio at sr from a video. Streams PCM from ffmpeg when available, otherwise
+    falls back to moviepy + temp WAV + librosa. start_s/duration_s load only a time window.
+    Returns (mono_audio, sr, duration_seconds) where duration is that of the whole video
+    (None if a windowed ffmpeg load could not determine it)."""
+    if find_ffmpeg('ffmpeg'):
+        return ffmpeg_load_audio(video_path, sr, start_s=start_s, duration_s=duration_s)
     video_clip = mpe.VideoFileClip(video_path)
     if video_clip.audio is None:
         raise RuntimeError("Video has no audio track.")
@@ -1335,7 +1756,8 @@ def load_audio_from_video(video_path: str, sr: int) -> Tuple[np.ndarray, int, fl
     temporary_wav_path = os.path.join(temp_dir, f"_temp_extract_{os.getpid()}.wav")
     try:
         video_clip.audio.write_audiofile(temporary_wav_path, fps=sr, codec="pcm_s16le", logger=None)
-        audio_waveform, output_sample_rate = librosa.load(temporary_wav_path, sr=sr, mono=True)
+        audio_waveform, output_sample_rate = librosa.load(temporary_wav_path, sr=sr, mono=True,
+                                                          offset=float(start_s or 0.0), duration=duration_s)
     finally:
         duration_seconds = float(video_clip.duration)
         video_clip.close()
@@ -1352,16 +1774,138 @@ def load_audio_file(audio_path: str, sr: int) -> Tuple[np.ndarray, int, float]:
     audio_waveform, output_sample_rate = librosa.load(audio_path, sr=sr, mono=True)
     return audio_waveform, output_sample_rate, float(len(audio_waveform) / max(output_sample_rate, 1))
 
+SYNC_VIDEO_EXTS = ('.mp4', '.mov', '.mkv', '.avi', '.webm')
+SYNC_AUDIO_EXTS = ('.wav', '.mp3', '.flac', '.ogg', '.m4a', '.aac', '.aif', '.aiff') + SYNC_VIDEO_EXTS
+
 def load_audio_from_any(path: str, sr: int) -> Tuple[np.ndarray, int, float]:
     """Load audio from an audio file, or extract audio from a video if a video is provided."""
     file_extension = os.path.splitext(path)[1].lower()
-    video_extensions = {'.mp4', '.mov', '.mkv', '.avi', '.webm'}
-    if file_extension in video_extensions:
+    if file_extension in SYNC_VIDEO_EXTS:
         print(f"[LOAD] Target is a video; extracting audio: {path}")
         return load_audio_from_video(path, sr)
     else:
         return load_audio_file(path, sr)
 
+FEATURE_CACHE_DIRNAME = '.video_sync_cache'
+
+class AudioFeatureCache:
+    """On-disk cache of decoded waveforms and analysis features.
+    Entries are keyed by (file hash, sr, hop_length, feature type) and stored as .npy files in a
+    FEATURE_CACHE_DIRNAME folder next to the source (or under `root`), loaded back as read-only
+    memmaps. The file hash covers the size and modification time plus head/middle/tail samples of
+    the content, so multi-GB recordings are keyed without reading them in full, and a re-rendered
+    file of the same length that differs only outside the samples still gets a new key."""
+
+    HASH_CHUNK = 1 << 20
+
+    def __init__(self, root: Optional[str] = None, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def file_hash(self, path: str) -> str:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        memo_key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if memo_key in self._hashes:
+                return self._hashes[memo_key]
+        digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode('ascii'))
+        with open(path, 'rb') as f:
+            for start in sorted({0, max(0, stat.st_size // 2 - self.HASH_CHUNK // 2), max(0, stat.st_size - self.HASH_CHUNK)}):
+                f.seek(start)
+                digest.update(f.read(self.HASH_CHUNK))
+        file_key = digest.hexdigest()[:20]
+        with self._lock:
+            self._hashes[memo_key] = file_key
+        return file_key
+
+    def _entry_path(self, source_path: str, name: str) -> str:
+        folder = self.root or os.path.join(os.path.dirname(os.path.abspath(source_path)), FEATURE_CACHE_DIRNAME)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f"{self.file_hash(source_path)}_{name}")
+
+    @staticmethod
+    def _save_array(path: str, array: np.ndarray) -> None:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _load_array(path: str) -> Optional[np.ndarray]:
+        if not os.path.isfile(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except Exception as e:
+            print(f"[CACHE] Ignoring unreadable cache entry {os.path.basename(path)}: {e}")
+            return None
+
+    def waveform(self, source_path: str, sr: int, loader) -> Tuple[np.ndarray, int, float]:
+        """Cached loader(source_path, sr) -> (y, sr, duration_s)."""
+        if not self.enabled:
+            return loader(source_path, sr)
+        base = self._entry_path(source_path, f"sr{int(sr)}_waveform")
+        meta_path = base + '.json'
+        if os.path.isfile(meta_path):
+            waveform = self._load_array(base + '.npy')
+            if waveform is not None:
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    print(f"[CACHE] Waveform hit: {os.path.basename(source_path)} @ {sr} Hz")
+                    return waveform, int(meta['sr']), float(meta['duration_s'])
+                except Exception as e:
+                    print(f"[CACHE] Ignoring waveform metadata for {os.path.basename(source_path)}: {e}")
+        waveform, out_sr, duration_s = loader(source_path, sr)
+        try:
+            self._save_array(base + '.npy', np.asarray(waveform, dtype=np.float32))
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'source': os.path.abspath(source_path), 'sr': int(out_sr), 'duration_s': float(duration_s)}, f)
+            os.replace(meta_path + '.tmp', meta_path)
+        except Exception as e:
+            print(f"[CACHE] Failed to store waveform: {e}")
+        return waveform, out_sr, duration_s
+
+    def has_feature(self, source_path: str, sr: int, hop_length: int, name: str) -> bool:
+        """True when feature() would be served from disk without running its builder."""
+        return self.enabled and os.path.isfile(self._entry_path(source_path, f"sr{int(sr)}_hop{int(hop_length)}_{name}.npy"))
+
+    def feature(self, source_path: str, sr: int, hop_length: int, name: str, builder, y: np.ndarray) -> np.ndarray:
+        """Cached builder(y, sr, hop_length) for the audio of source_path."""
+        if not self.enabled:
+            return builder(y, sr, hop_length)
+        path = self._entry_path(source_path, f"sr{int(sr)}_hop{int(hop_length)}_{name}.npy")
+        cached = self._load_array(path)
+        if cached is not None:
+            return cached
+        value = builder(y, sr, hop_length)
+        try:
+            self._save_array(path, value)
+        except Exception as e:
+            print(f"[CACHE] Failed to store {name}: {e}")
+        return value
+
+_feature_cache = AudioFeatureCache()
+
+def get_feature_cache() -> AudioFeatureCache:
+    return _feature_cache
+
+def configure_feature_cache(root: Optional[str] = None, enabled: bool = True) -> AudioFeatureCache:
+    """Replace the module-wide feature cache (used by the CLI's --cache-dir / --no-cache)."""
+    global _feature_cache
+    _feature_cache = AudioFeatureCache(root=root, enabled=enabled)
+    return _feature_cache
+
+def load_source_audio(path: str, sr: int, is_video: bool = False) -> Tuple[np.ndarray, int, float]:
+    """Load the video's audio (is_video=True) or a target audio/video through the feature cache."""
+    extension = os.path.splitext(path)[1].lower()
+    # A plain audio file can stand in for the video (benchmarks, audio-only references)
+    audio_only = extension in SYNC_AUDIO_EXTS and extension not in SYNC_VIDEO_EXTS
+    loader = load_audio_from_video if is_video and not audio_only else load_audio_from_any
+    return get_feature_cache().waveform(path, sr, loader)
+
 def onset_envelope(y: np.ndarray, sr: int, hop_length: int) -> np.ndarray:
     envelope = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
     # Normalize for robust cross-correlation
@@ -1370,6 +1914,31 @@ def onset_envelope(y: np.ndarray, sr: int, hop_length: int) -> np.ndarray:
         envelope = envelope / (np.max(np.abs(envelope)) + 1e-8)
     return envelope
 
+def compute_beat_analysis(y: np.ndarray, sr: int, hop_length: int = 512,
+                          source_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Onset envelope and beat times (seconds) for the waveform view and beat snapping.
+    With source_path both go through the feature cache; the envelope is the search's cached
+    'onset' feature, so after a search only the beat tracking itself is left to compute."""
+    cache = get_feature_cache() if source_path else None
+    envelope = cache.feature(source_path, sr, hop_length, 'onset', onset_envelope, y) if cache else onset_envelope(y, sr, hop_length)
+
+    def _beats(audio, rate, hop):
+        _, beat_frames = librosa.beat.beat_track(onset_envelope=np.asarray(envelope), sr=rate, hop_length=hop)
+        return librosa.frames_to_time(beat_frames, sr=rate, hop_length=hop).astype(np.float64)
+
+    beat_times = cache.feature(source_path, sr, hop_length, 'beat_times', _beats, y) if cache else _beats(y, sr, hop_length)
+    return envelope, np.asarray(beat_times, dtype=np.float64)
+
+def beat_alignment_error(video_beats: np.ndarray, target_beats: np.ndarray, offset_s: float,
+                         duration_s: Optional[float] = None) -> Optional[float]:
+    """Median distance (s) from each offset target beat inside the video to the nearest video beat."""
+    video_index = video_beats if isinstance(video_beats, BeatIndex) else BeatIndex(video_beats)
+    shifted = np.asarray(target_beats, dtype=np.float64) + offset_s
+    shifted = shifted[(shifted >= 0) & (shifted <= (duration_s if duration_s else np.inf))]
+    if len(video_index) == 0 or len(shifted) == 0:
+        return None
+    return float(np.median(video_index.nearest_distance(shifted)))
+
 def compute_chromagram(y: np.ndarray, sr: int, hop_length: int) -> np.ndarray:
     """Compute chromagram (pitch class profile) for harmonic content matching."""
     chroma = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=hop_length)
@@ -1385,110 +1954,405 @@ def compute_mfcc(y: np.ndarray, sr: int, hop_length: int, n_mfcc: int = 13) -> n
     mfcc = librosa.feature.mfcc(y=y, sr=sr, hop_length=hop_length, n_mfcc=n_mfcc)
     return mfcc
 
+def _feature_prefix_sums(feature: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame prefix sums of x and x^2 summed over channels, with a leading zero."""
+    feature = np.atleast_2d(np.asarray(feature, dtype=np.float64))
+    sum_x = np.concatenate([[0.0], np.cumsum(feature.sum(axis=0))])
+    sum_xx = np.concatenate([[0.0], np.cumsum((feature * feature).sum(axis=0))])
+    return sum_x, sum_xx
+
+def _pearson_from_lag_dots(video_feature: np.ndarray, target_feature: np.ndarray,
+                           lags: np.ndarray, dot: np.ndarray, target_start: int = 0,
+                           target_frames: Optional[int] = None) -> np.ndarray:
+    """Pearson correlation per lag given the lagged dot products (pad/trim semantics as corrcoef).
+    target_feature may be frames target_start.. of a target target_frames long, as long as it
+    holds every target frame the lags compare."""
+    channels, video_frames = video_feature.shape
+    if target_frames is None:
+        target_frames = target_start + target_feature.shape[1]
+    # Compared length, and the slice of the target that falls inside it
+    length = np.clip(np.minimum(video_frames, target_frames + lags), 0, video_frames)
+    target_lo = np.clip(-lags, 0, target_frames)
+    target_hi = np.clip(length - lags, target_lo, target_frames)
+    target_lo = np.clip(target_lo - target_start, 0, target_feature.shape[1])
+    target_hi = np.clip(target_hi - target_start, target_lo, target_feature.shape[1])
+
+    video_sum, video_sq = _feature_prefix_sums(video_feature)
+    target_sum, target_sq = _feature_prefix_sums(target_feature)
+    sv, svv = video_sum[length], video_sq[length]
+    st = target_sum[target_hi] - target_sum[target_lo]
+    stt = target_sq[target_hi] - target_sq[target_lo]
+    n = channels * length.astype(np.float64)
+
+    video_var = n * svv - sv * sv
+    target_var = n * stt - st * st
+    # Treat cancellation noise on (near-)constant windows as zero variance, like corrcoef's nan
+    valid = (length > 0) & (video_var > 1e-9 * n * svv) & (target_var > 1e-9 * n * stt)
+    correlations = np.zeros(len(lags), dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlations[valid] = (n * dot - sv * st)[valid] / np.sqrt(video_var[valid] * target_var[valid])
+    return np.clip(correlations, -1.0, 1.0)
+
+def lagged_feature_correlation(video_feature: np.ndarray, target_feature: np.ndarray,
+                               max_lag_frames: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pearson correlation of video vs target features for every lag in [-max_lag, +max_lag] frames.
+    Same semantics as padding/trimming the target and calling np.corrcoef on the flattened
+    matrices: a positive lag pads the target with zeros at the start (padding counts), a negative
+    lag trims it, and both are cut to the shorter length. All lagged dot products come from one
+    FFT cross-correlation summed over channels; window sums come from prefix sums.
+    Returns (lags, correlations)."""
+    video_feature = np.atleast_2d(np.asarray(video_feature, dtype=np.float64))
+    target_feature = np.atleast_2d(np.asarray(target_feature, dtype=np.float64))
+    channels, video_frames = video_feature.shape
+    target_frames = target_feature.shape[1]
+    lags = np.arange(-int(max_lag_frames), int(max_lag_frames) + 1)
+    if video_frames == 0 or target_frames == 0:
+        return lags, np.zeros(len(lags), dtype=np.float64)
+
+    fft_size = 1 << int(np.ceil(np.log2(video_frames + target_frames - 1)))
+    spectrum = (np.fft.rfft(video_feature, n=fft_size, axis=1)
+                * np.conj(np.fft.rfft(target_feature, n=fft_size, axis=1))).sum(axis=0)
+    cross = np.fft.irfft(spectrum, n=fft_size)
+
+    # cross[k] = sum_j v[j + k] * t[j]; negative lags wrap to the end of the buffer
+    in_range = (lags > -target_frames) & (lags < video_frames)
+    dot = np.where(in_range, cross[lags % fft_size], 0.0)
+
+    return lags, _pearson_from_lag_dots(video_feature, target_feature, lags, dot)
+
+def feature_correlation_at_lags(video_feature: np.ndarray, target_feature: np.ndarray,
+                                lags: np.ndarray, target_start: int = 0,
+                                target_frames: Optional[int] = None) -> np.ndarray:
+    """Same scores as lagged_feature_correlation, evaluated directly at an arbitrary set of lags.
+    Cheaper than the FFT when only a few short lag windows are needed. target_feature may be the
+    slice starting at frame target_start of a target target_frames long (see _pearson_from_lag_dots)."""
+    video_feature = np.atleast_2d(np.asarray(video_feature, dtype=np.float64))
+    target_feature = np.atleast_2d(np.asarray(target_feature, dtype=np.float64))
+    video_frames = video_feature.shape[1]
+    if target_frames is None:
+        target_frames = target_start + target_feature.shape[1]
+    lags = np.asarray(lags, dtype=np.int64)
+    dot = np.zeros(len(lags), dtype=np.float64)
+    for i, lag in enumerate(lags.tolist()):
+        length = min(video_frames, target_frames + lag)
+        video_lo = max(lag, 0)
+        if length - video_lo <= 0:
+            continue
+        # Video frame j meets target frame j - lag
+        target_lo = video_lo - lag - target_start
+        dot[i] = np.einsum('ij,ij->', video_feature[:, video_lo:length], target_feature[:, target_lo:target_lo + length - video_lo])
+    return _pearson_from_lag_dots(video_feature, target_feature, lags, dot, target_start, target_frames)
+
+def decimate_envelope(envelope: np.ndarray, factor: int) -> np.ndarray:
+    """Block-mean downsample of an envelope (1-D) or feature matrix (along frames, the last axis)
+    by an integer factor (last partial block kept)."""
+    envelope = np.asarray(envelope, dtype=np.float64)
+    if envelope.ndim != 2:
+        envelope = envelope.ravel()
+    factor = max(1, int(factor))
+    frames = envelope.shape[-1]
+    if factor == 1 or frames == 0:
+        return envelope
+    starts = np.arange(0, frames, factor)
+    counts = np.diff(np.append(starts, frames))
+    return np.add.reduceat(envelope, starts, axis=-1) / counts
+
+def _parabolic_peak(curve: np.ndarray, index: int) -> float:
+    """Sub-frame offset (-0.5..0.5) of the vertex of the parabola through curve[index-1..index+1]."""
+    if index <= 0 or index >= len(curve) - 1:
+        return 0.0
+    left, mid, right = curve[index - 1], curve[index], curve[index + 1]
+    denom = left - 2.0 * mid + right
+    if denom >= 0:
+        return 0.0
+    return float(np.clip(0.5 * (left - right) / denom, -0.5, 0.5))
+
+def _quadratic_sample(curve: np.ndarray, index: int, delta: float) -> float:
+    """Evaluate the parabola through curve[index-1..index+1] at index + delta."""
+    if delta == 0.0 or index <= 0 or index >= len(curve) - 1:
+        return float(curve[index])
+    left, mid, right = curve[index - 1], curve[index], curve[index + 1]
+    return float(mid + 0.5 * delta * (right - left) + 0.5 * delta * delta * (left - 2.0 * mid + right))
+
+def _top_local_maxima(curve: np.ndarray, count: int) -> list:
+    """Indices of the `count` highest local maxima of curve (plateaus count once)."""
+    if len(curve) == 0:
+        return []
+    padded = np.concatenate([[-np.inf], curve, [-np.inf]])
+    peaks = np.flatnonzero((padded[1:-1] > padded[:-2]) & (padded[1:-1] >= padded[2:]))
+    return peaks[np.argsort(curve[peaks])[::-1][:count]].tolist()
+
+SEARCH_FEATURE_WEIGHTS = (
+    ('chroma_corr', 0.35),    # Harmonic content (melody/chords)
+    ('contrast_corr', 0.25),  # Timbre
+    ('mfcc_corr', 0.20),      # Timbre detail
+    ('onset_corr', 0.20),     # Rhythm
+)
+
+SEARCH_FEATURE_BUILDERS = {
+    'chroma_corr': ('chromagram', compute_chromagram),
+    'contrast_corr': ('spectral contrast', compute_spectral_contrast),
+    'mfcc_corr': ('MFCC', compute_mfcc),
+    'onset_corr': ('onset envelope', onset_envelope),
+}
+
+# Coarse stage of coarse_to_fine_offset_search: onsets and STFT chroma of a 5.5 kHz copy, a small
+# fraction of the cost of the full-rate CQT chroma / contrast / MFCC features
+COARSE_SEARCH_SR = 5512
+AUTO_COARSE_TO_FINE_SEEK_S = 30.0  # search_sync_offset strategy='auto' switches to coarse_to_fine from here
+SEARCH_SLICE_MARGIN_S = 2.0  # Extra audio either side of a target slice for the full-resolution features
+COARSE_MIN_PEAK_Z = 3.0  # Coarse best peak in std devs above the curve median; below it, search exhaustively
+COARSE_ONSET_HOP = 128  # ~23 ms onset frames at COARSE_SEARCH_SR, block-averaged to the coarse step
+COARSE_FEATURE_WEIGHTS = (
+    ('chroma_corr', 0.5),
+    ('onset_corr', 0.5),
+)
+
+def compute_coarse_search_features(y: np.ndarray, sr: int, coarse_resolution_s: float, label: str,
+                                   source_path: Optional[str] = None) -> Tuple[dict, float]:
+    """Cheap features for the coarse stage, keyed like COARSE_FEATURE_WEIGHTS, at one frame per
+    ~coarse_resolution_s. Returns (features, frame step in seconds); with source_path they go
+    through the feature cache (stored as one matrix, chroma rows then the onset row)."""
+    factor = max(1, int(round(coarse_resolution_s * COARSE_SEARCH_SR / COARSE_ONSET_HOP)))
+    coarse_hop = factor * COARSE_ONSET_HOP
+
+    def _build(audio, _rate, _hop):
+        small = librosa.resample(np.asarray(audio, dtype=np.float32), orig_sr=sr, target_sr=COARSE_SEARCH_SR)
+        onsets = librosa.onset.onset_strength(y=small, sr=COARSE_SEARCH_SR, hop_length=COARSE_ONSET_HOP, n_fft=512)
+        chroma = librosa.feature.chroma_stft(y=small, sr=COARSE_SEARCH_SR, n_fft=2048, hop_length=coarse_hop, tuning=0.0)
+        onsets = decimate_envelope(onsets, factor)
+        frames = min(chroma.shape[1], onsets.shape[-1])
+        return np.vstack([chroma[:, :frames], onsets[None, :frames]]).astype(np.float32)
+
+    if source_path:
+        print(f"[FEATURES] Coarse chroma/onsets for {label} audio (cached)...")
+        stacked = get_feature_cache().feature(source_path, COARSE_SEARCH_SR, coarse_hop, 'coarse', _build, y)
+    else:
+        print(f"[FEATURES] Computing coarse chroma/onsets for {label} audio...")
+        stacked = _build(y, sr, coarse_hop)
+    stacked = np.asarray(stacked)
+    return {'chroma_corr': stacked[:-1], 'onset_corr': stacked[-1]}, coarse_hop / float(COARSE_SEARCH_SR)
+
+def compute_search_features(y: np.ndarray, sr: int, hop_length: int, label: str, names=None,
+                            source_path: Optional[str] = None) -> dict:
+    """Compute the search features for one track, keyed like SEARCH_FEATURE_WEIGHTS.
+    With source_path the features go through the on-disk feature cache."""
+    features = {}
+    for name, (title, builder) in SEARCH_FEATURE_BUILDERS.items():
+        if names is not None and name not in names:
+            continue
+        if source_path:
+            print(f"[FEATURES] {title} for {label} audio (cached)...")
+            features[name] = get_feature_cache().feature(source_path, sr, hop_length, name.replace('_corr', ''), builder, y)
+        else:
+            print(f"[FEATURES] Computing {title} for {label} audio...")
+            features[name] = builder(y, sr, hop_length)
+    return features
+
+def _scored_entry(curves: dict, index: int, delta: float, offset_s: float) -> dict:
+    """Result dict for curves[...][index + delta] (quadratic interpolation for sub-frame deltas)."""
+    entry = {'offset_s': float(offset_s)}
+    for name, _weight in SEARCH_FEATURE_WEIGHTS:
+        entry[name] = _quadratic_sample(curves[name], index, delta) if name in curves else 0.0
+    entry['combined_score'] = float(sum(w * entry[n] for n, w in SEARCH_FEATURE_WEIGHTS))
+    return entry
+
 def randomized_sampling_offset_search(video_y: np.ndarray, target_y: np.ndarray, sr: int, hop_length: int,
-                               max_offset_s: float = 10.0, step_s: float = 0.1) -> list:
-    """randomized sampling search for best offset using multiple similarity metrics.
-    Tests offsets from -max_offset_s to +max_offset_s in step_s increments.
-    Returns list of (offset_s, scores_dict) tuples.
+                               max_offset_s: float = 10.0, step_s: float = 0.1, refine_peaks: int = 5,
+                               timings: Optional[dict] = None, video_source: Optional[str] = None,
+                               target_source: Optional[str] = None) -> list:
+    """Exhaustive offset search using multiple similarity metrics.
+    Every frame lag in -max_offset_s..+max_offset_s is scored at once per feature with an FFT
+    cross-correlation; results are reported on a step_s grid, plus sub-frame refined entries
+    around the top `refine_peaks` peaks of the combined and chroma curves.
+    Returns list of dicts with offset_s, chroma_corr, contrast_corr, mfcc_corr, onset_corr, combined_score.
+    Stage durations (seconds) are added to `timings` when given; features of video_source /
+    target_source paths are read from and written to the feature cache.
     """
-    print(f"[randomized sampling] Testing offsets from {-max_offset_s:.1f}s to +{max_offset_s:.1f}s in {step_s:.2f}s steps...")
-    
-    # Compute features for video audio 
-    print("[FEATURES] Computing chromagram for video audio...")
-    video_chroma = compute_chromagram(video_y, sr, hop_length)
-    print("[FEATURES] Computing spectral contrast for video audio...")
-    video_contrast = compute_spectral_contrast(video_y, sr, hop_length)
-    print("[FEATURES] Computing MFCC for video audio...")
-    video_mfcc = compute_mfcc(video_y, sr, hop_length)
-    print("[FEATURES] Computing onset envelope for video audio...")
-    video_onset = onset_envelope(video_y, sr, hop_length)
-    
-    # Compute features for target audio
-    print("[FEATURES] Computing chromagram for target audio...")
-    target_chroma = compute_chromagram(target_y, sr, hop_length)
-    print("[FEATURES] Computing spectral contrast for target audio...")
-    target_contrast = compute_spectral_contrast(target_y, sr, hop_length)
-    print("[FEATURES] Computing MFCC for target audio...")
-    target_mfcc = compute_mfcc(target_y, sr, hop_length)
-    print("[FEATURES] Computing onset envelope for target audio...")
-    target_onset = onset_envelope(target_y, sr, hop_length)
-    
-    # Test different offsets
-    offset_step_frames = int(step_s * sr / hop_length)
+    print(f"[randomized sampling] Scoring offsets from {-max_offset_s:.1f}s to +{max_offset_s:.1f}s (reporting {step_s:.2f}s steps)...")
+    timings = timings if timings is not None else {}
+
+    stage_start = time.perf_counter()
+    video_features = compute_search_features(video_y, sr, hop_length, 'video', source_path=video_source)
+    target_features = compute_search_features(target_y, sr, hop_length, 'target', source_path=target_source)
+    timings['features'] = time.perf_counter() - stage_start
+
+    feature_pairs = {name: (video_features[name], target_features[name]) for name in video_features}
+    stage_start = time.perf_counter()
+    results = score_feature_offsets(feature_pairs, sr, hop_length, max_offset_s, step_s, refine_peaks)
+    timings['score'] = time.perf_counter() - stage_start
+    return results
+
+def score_feature_offsets(feature_pairs: dict, sr: int, hop_length: int, max_offset_s: float,
+                          step_s: float = 0.1, refine_peaks: int = 5) -> list:
+    """Score all lags for precomputed (video, target) feature pairs keyed like SEARCH_FEATURE_WEIGHTS.
+    Returns result dicts on the step_s grid plus sub-frame refined peak entries."""
+    frame_s = hop_length / float(sr)
     max_offset_frames = int(max_offset_s * sr / hop_length)
-    
-    results = []
-    test_offsets = range(-max_offset_frames, max_offset_frames + 1, offset_step_frames)
-    
-    print(f"[randomized sampling] Testing {len(test_offsets)} different offsets...")
-    
-    for offset_frames in test_offsets:
-        offset_s = float(offset_frames * hop_length / sr)
-        
-        # Align features by offset
-        if offset_frames >= 0:
-            # Target starts later - pad target at beginning
-            v_chroma = video_chroma
-            t_chroma = np.pad(target_chroma, ((0, 0), (offset_frames, 0)), mode='constant')
-            v_contrast = video_contrast
-            t_contrast = np.pad(target_contrast, ((0, 0), (offset_frames, 0)), mode='constant')
-            v_mfcc = video_mfcc
-            t_mfcc = np.pad(target_mfcc, ((0, 0), (offset_frames, 0)), mode='constant')
-            v_onset = video_onset
-            t_onset = np.pad(target_onset, (offset_frames, 0), mode='constant')
+    offset_step_frames = max(1, int(step_s * sr / hop_length))
+
+    start_time = time.perf_counter()
+    curves = {}
+    lags = np.arange(-max_offset_frames, max_offset_frames + 1)
+    for name, (video_feature, target_feature) in feature_pairs.items():
+        lags, curves[name] = lagged_feature_correlation(video_feature, target_feature, max_offset_frames)
+    combined = np.zeros(len(lags), dtype=np.float64)
+    for name, weight in SEARCH_FEATURE_WEIGHTS:
+        if name in curves:
+            combined += weight * curves[name]
+    curves['combined_score'] = combined
+
+    def _entry(index: int, delta: float = 0.0) -> dict:
+        return _scored_entry(curves, index, delta, (lags[index] + delta) * frame_s)
+
+    # Grid entries keep the historical step_s spacing (offset 0 always on the grid)
+    grid = np.flatnonzero(lags % offset_step_frames == 0)
+    results = [_entry(int(i)) for i in grid]
+
+    # Sub-frame refinement around the strongest combined and chroma peaks
+    on_grid = set(grid.tolist())
+    refined_keys = set()
+    for curve_name in ('combined_score', 'chroma_corr'):
+        if curve_name not in curves:
+            continue
+        for index in _top_local_maxima(curves[curve_name], refine_peaks):
+            delta = _parabolic_peak(curves[curve_name], index)
+            key = (index, round(delta, 3))
+            if (delta == 0.0 and index in on_grid) or key in refined_keys:
+                continue
+            refined_keys.add(key)
+            results.append(_entry(index, delta))
+    refined = len(refined_keys)
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000.0
+    print(f"[randomized sampling] Scored {len(lags)} lags x {len(feature_pairs)} features in {elapsed_ms:.1f} ms "
+          f"({len(grid)} grid offsets, {refined} refined peaks)")
+    return results
+
+def coarse_to_fine_offset_search(video_y: np.ndarray, target_y: np.ndarray, sr: int, hop_length: int,
+                                 max_offset_s: float = 120.0, coarse_resolution_s: float = 0.1,
+                                 top_k: int = 3, precision_s: float = 0.01,
+                                 timings: Optional[dict] = None, video_source: Optional[str] = None,
+                                 target_source: Optional[str] = None) -> list:
+    """Hierarchical offset search for long seek ranges.
+    1. coarse: cheap chroma + onset features (compute_coarse_search_features) at ~coarse_resolution_s
+       frames, every lag scored by FFT; keep the top_k local maxima of the weighted curve.
+    2. fine: the full-resolution search features of the video, and of only the target audio behind
+       the candidate windows (two coarse steps either side of each candidate), scored at every
+       frame lag in those windows (or every precision_s when that is coarser than a frame). The
+       whole target is used instead when its features are cached or the windows cover most of it.
+    3. refine: parabolic sub-frame refinement of each window's best lag when precision_s is finer
+       than a frame; offsets are rounded to precision_s.
+    When the coarse best peak stands less than COARSE_MIN_PEAK_Z std devs above the curve median
+    (heavy noise, near-repeating music) the candidates are unreliable and the exhaustive search
+    runs instead. Feature work grows with the video length and top_k, not with max_offset_s. Returns result
+    dicts like randomized_sampling_offset_search; stage durations go into `timings` and
+    video_source / target_source enable the feature cache.
+    """
+    timings = timings if timings is not None else {}
+    frame_s = hop_length / float(sr)
+    max_offset_frames = int(max_offset_s * sr / hop_length)
+
+    # Stage 1: candidate lags from the cheap coarse features
+    stage_start = time.perf_counter()
+    video_coarse, coarse_step_s = compute_coarse_search_features(video_y, sr, coarse_resolution_s, 'video', video_source)
+    target_coarse, _ = compute_coarse_search_features(target_y, sr, coarse_resolution_s, 'target', target_source)
+    timings['coarse_features'] = time.perf_counter() - stage_start
+    print(f"[COARSE-TO-FINE] Seek +-{max_offset_s:.1f}s: coarse step {coarse_step_s:.3f}s, "
+          f"top {top_k} candidates, precision {precision_s:.3f}s")
+
+    stage_start = time.perf_counter()
+    coarse_max_lag = int(np.ceil(max_offset_s / coarse_step_s))
+    coarse_curve = 0.0
+    for name, weight in COARSE_FEATURE_WEIGHTS:
+        coarse_lags, curve = lagged_feature_correlation(video_coarse[name], target_coarse[name], coarse_max_lag)
+        coarse_curve = coarse_curve + weight * curve
+    peaks = _top_local_maxima(coarse_curve, top_k)
+    peak_z = (coarse_curve[peaks[0]] - np.median(coarse_curve)) / (np.std(coarse_curve) + 1e-9) if peaks else 0.0
+    candidates = [int(round(coarse_lags[i] * coarse_step_s / frame_s)) for i in peaks]
+    timings['coarse_search'] = time.perf_counter() - stage_start
+    if peak_z < COARSE_MIN_PEAK_Z:
+        print(f"[COARSE-TO-FINE] Coarse peak not distinct (z={peak_z:.2f} < {COARSE_MIN_PEAK_Z}), searching exhaustively")
+        return randomized_sampling_offset_search(video_y, target_y, sr, hop_length, max_offset_s=max_offset_s, step_s=0.1,
+                                                 timings=timings, video_source=video_source, target_source=target_source)
+    print(f"[COARSE] {len(coarse_lags)} coarse lags -> candidates at "
+          f"{', '.join(f'{c * frame_s:+.2f}s' for c in candidates)}")
+
+    # Candidate windows in full-resolution frame lags, overlapping ones merged
+    stride = max(1, int(precision_s / frame_s))
+    half_window = 2 * int(np.ceil(coarse_step_s / frame_s)) + stride
+    spans = sorted((max(-max_offset_frames, c - half_window), min(max_offset_frames, c + half_window)) for c in candidates)
+    merged: List[List[int]] = []
+    for lo, hi in spans:
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
         else:
-            # Target starts earlier - trim target from beginning
-            trim_frames = abs(offset_frames)
-            v_chroma = video_chroma
-            t_chroma = target_chroma[:, trim_frames:]
-            v_contrast = video_contrast
-            t_contrast = target_contrast[:, trim_frames:]
-            v_mfcc = video_mfcc
-            t_mfcc = target_mfcc[:, trim_frames:]
-            v_onset = video_onset
-            t_onset = target_onset[trim_frames:]
-        
-        # Match lengths
-        min_len = min(v_chroma.shape[1], t_chroma.shape[1])
-        v_chroma = v_chroma[:, :min_len]
-        t_chroma = t_chroma[:, :min_len]
-        v_contrast = v_contrast[:, :min_len]
-        t_contrast = t_contrast[:, :min_len]
-        v_mfcc = v_mfcc[:, :min_len]
-        t_mfcc = t_mfcc[:, :min_len]
-        v_onset = v_onset[:min_len]
-        t_onset = t_onset[:min_len]
-        
-        # Compute similarity scores for each feature
-        # Chromagram correlation (harmonic similarity)
-        chroma_corr = np.corrcoef(v_chroma.flatten(), t_chroma.flatten())[0, 1]
-        
-        # Spectral contrast correlation (timbral similarity)
-        contrast_corr = np.corrcoef(v_contrast.flatten(), t_contrast.flatten())[0, 1]
-        
-        # MFCC correlation (timbral similarity)
-        mfcc_corr = np.corrcoef(v_mfcc.flatten(), t_mfcc.flatten())[0, 1]
-        
-        # Onset envelope correlation (rhythmic similarity)
-        onset_corr = np.corrcoef(v_onset, t_onset)[0, 1]
-        
-        # Combined score (weighted average)
-        combined_score = (
-            0.35 * chroma_corr +      # Harmonic content (melody/chords)
-            0.25 * contrast_corr +     # Timbre
-            0.20 * mfcc_corr +         # Timbre detail
-            0.20 * onset_corr          # Rhythm
-        )
-        
-        results.append({
-            'offset_s': offset_s,
-            'chroma_corr': float(chroma_corr),
-            'contrast_corr': float(contrast_corr),
-            'mfcc_corr': float(mfcc_corr),
-            'onset_corr': float(onset_corr),
-            'combined_score': float(combined_score)
-        })
-    
+            merged.append([lo, hi])
+
+    # Stage 2: full-resolution features for the video and the target slices behind the windows
+    stage_start = time.perf_counter()
+    video_features = compute_search_features(video_y, sr, hop_length, 'video', source_path=video_source)
+    video_frames = min(np.atleast_2d(feature).shape[1] for feature in video_features.values())
+    target_frames = 1 + len(target_y) // hop_length
+    # Target frames compared by lags lo..hi: from -hi up to video_frames - lo (see _pearson_from_lag_dots)
+    needed = [(max(0, -hi), min(target_frames, video_frames - lo)) for lo, hi in merged]
+    needed_frames = sum(max(0, b - a) for a, b in needed)
+    cached = bool(target_source) and all(get_feature_cache().has_feature(target_source, sr, hop_length, name.replace('_corr', ''))
+                                         for name in SEARCH_FEATURE_BUILDERS)
+    # Features near a slice edge see less context than in the whole track; the margin absorbs that
+    margin_frames = int(np.ceil(SEARCH_SLICE_MARGIN_S / frame_s))
+    target_slices = []
+    if cached or needed_frames + 2 * margin_frames * len(needed) >= 0.8 * target_frames:
+        features = compute_search_features(target_y, sr, hop_length, 'target', source_path=target_source)
+        target_slices = [(0, features, None)] * len(merged)
+        sliced_s = len(target_y) / float(sr)
+    else:
+        sliced_s = 0.0
+        for first, last in needed:
+            start_frame = max(0, first - margin_frames)
+            end_frame = min(target_frames, max(last, first) + margin_frames)
+            piece = target_y[start_frame * hop_length:end_frame * hop_length]
+            features = compute_search_features(piece, sr, hop_length, f'target {start_frame * frame_s:.1f}s+')
+            keep = max(first, start_frame) - start_frame
+            target_slices.append((start_frame + keep, {name: np.atleast_2d(feature)[:, keep:] for name, feature in features.items()},
+                                  target_frames))
+            sliced_s += len(piece) / float(sr)
+    timings['fine_features'] = time.perf_counter() - stage_start
+    print(f"[COARSE-TO-FINE] Full-resolution target features over {sliced_s:.1f}s of {len(target_y) / float(sr):.1f}s")
+
+    # Stage 3: score every window lag at full resolution
+    stage_start = time.perf_counter()
+    window_curves = []
+    results = []
+    for (lo, hi), (slice_start, slice_features, slice_total) in zip(merged, target_slices):
+        lags = np.arange(lo, hi + 1, stride)
+        curves = {name: feature_correlation_at_lags(video_features[name], slice_features[name], lags,
+                                                    target_start=slice_start, target_frames=slice_total)
+                  for name in video_features}
+        combined = np.zeros(len(lags), dtype=np.float64)
+        for name, weight in SEARCH_FEATURE_WEIGHTS:
+            combined += weight * curves[name]
+        curves['combined_score'] = combined
+        results += [_scored_entry(curves, i, 0.0, lags[i] * frame_s) for i in range(len(lags))]
+        window_curves.append((lags, curves))
+    timings['fine_rescore'] = time.perf_counter() - stage_start
+
+    # Stage 4: sub-frame refinement of each window's best combined/chroma lag
+    stage_start = time.perf_counter()
+    refined = 0
+    if stride == 1 and precision_s < frame_s:
+        for lags, curves in window_curves:
+            for curve_name in ('combined_score', 'chroma_corr'):
+                best = int(np.argmax(curves[curve_name]))
+                delta = _parabolic_peak(curves[curve_name], best)
+                if delta == 0.0:
+                    continue
+                offset_s = round((lags[best] + delta) * frame_s / precision_s) * precision_s
+                results.append(_scored_entry(curves, best, delta, offset_s))
+                refined += 1
+    timings['refine'] = time.perf_counter() - stage_start
+
+    print(f"[COARSE-TO-FINE] Scored {len(results) - refined} fine lags in {len(merged)} windows, {refined} refined peaks")
     return results
 
 def compute_consensus_offset(sync_points: list) -> Tuple[float, str, str]:
@@ -1541,6 +2405,39 @@ def compute_consensus_offset(sync_points: list) -> Tuple[float, str, str]:
     
     return final_offset, method, quality
 
+def segmented_sync_points(video_y: np.ndarray, target_y: np.ndarray, sr: int, hop_length: int,
+                          max_offset_s: float = 10.0, segment_s: float = 15.0) -> List[SyncPoint]:
+    """Independent offset estimates from consecutive video segments, for compute_consensus_offset.
+    Each segment is scored against the whole target: a segment starting at start_s that matches
+    at local offset o implies a video offset of o + start_s, so local lags cover
+    +-(max_offset_s + start_s) and only offsets within +-max_offset_s are kept.
+    Confidence follows the best combined score: high > 0.5, medium > 0.3, else low."""
+    video_features = compute_search_features(video_y, sr, hop_length, 'video')
+    target_features = compute_search_features(target_y, sr, hop_length, 'target')
+    frame_s = hop_length / float(sr)
+    segment_frames = max(1, int(round(segment_s / frame_s)))
+    total_frames = min(np.atleast_2d(feature).shape[1] for feature in video_features.values())
+
+    sync_points = []
+    for start_frame in range(0, total_frames, segment_frames):
+        end_frame = min(start_frame + segment_frames, total_frames)
+        if end_frame - start_frame < segment_frames // 2:
+            break  # Trailing segment too short to be reliable
+        start_s = start_frame * frame_s
+        feature_pairs = {name: (np.atleast_2d(video_features[name])[:, start_frame:end_frame], target_features[name])
+                         for name in video_features}
+        results = score_feature_offsets(feature_pairs, sr, hop_length, max_offset_s + start_s, refine_peaks=3)
+        candidates = [r for r in results if abs(r['offset_s'] + start_s) <= max_offset_s]
+        if not candidates:
+            continue
+        best = max(candidates, key=lambda r: r['combined_score'])
+        score = float(best['combined_score'])
+        confidence = 'high' if score > 0.5 else 'medium' if score > 0.3 else 'low'
+        sync_points.append(SyncPoint(segment_start_s=start_s, offset_s=float(best['offset_s'] + start_s),
+                                     correlation=score, confidence=confidence))
+        print(f"[SEGMENTS] {start_s:6.1f}s: offset={best['offset_s'] + start_s:+.3f}s score={score:.3f} ({confidence})")
+    return sync_points
+
 def apply_offset(y: np.ndarray, sr: int, offset_s: float) -> np.ndarray:
     """Apply offset by padding (offset>0) or trimming (offset<0)."""
     if abs(offset_s) < 1e-6:
@@ -1561,7 +2458,101 @@ def trim_or_pad_to_duration(y: np.ndarray, sr: int, duration_s: float) -> np.nda
     padding_samples = target_length_samples - current_length_samples
     return np.concatenate([y, np.zeros(padding_samples, dtype=y.dtype)], axis=0)
 
-def export_video_with_audio(video_path: str, audio_waveform: np.ndarray, sr: int, out_path: str) -> None:
+# Video codecs each output container can hold as a stream copy (None = anything; unknown ext = try copy)
+CONTAINER_VIDEO_CODECS = {
+    '.mp4': {'h264', 'hevc', 'mpeg4', 'av1', 'vp9'},
+    '.m4v': {'h264', 'hevc', 'mpeg4'},
+    '.mov': {'h264', 'hevc', 'mpeg4', 'prores', 'mjpeg'},
+    '.webm': {'vp8', 'vp9', 'av1'},
+    '.avi': {'mpeg4', 'h264', 'mjpeg', 'msmpeg4v3'},
+    '.mkv': None,
+}
+# Audio encoder per container (default aac) and the video encoder used when re-encoding is required
+CONTAINER_AUDIO_ARGS = {
+    '.webm': ['-c:a', 'libopus', '-b:a', '160k', '-ar', '48000'],
+    '.avi': ['-c:a', 'libmp3lame', '-b:a', '256k'],
+}
+DEFAULT_AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '256k']
+CONTAINER_REENCODE_ARGS = {
+    '.webm': ['-c:v', 'libvpx-vp9', '-crf', '30', '-b:v', '0'],
+}
+DEFAULT_REENCODE_ARGS = ['-c:v', 'libx264', '-crf', '16', '-preset', 'medium', '-pix_fmt', 'yuv420p']
+
+def probe_video_codec(path: str) -> Optional[str]:
+    """codec_name of the first video stream via ffprobe, or None when unavailable."""
+    ffprobe = find_ffmpeg('ffprobe')
+    if not ffprobe:
+        return None
+    cmd = [ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'stream=codec_name',
+           '-of', 'default=noprint_wrappers=1:nokey=1', path]
+    try:
+        return subprocess.check_output(cmd, stderr=subprocess.DEVNULL, universal_newlines=True).strip().lower() or None
+    except Exception:
+        return None
+
+def _ffmpeg_mux_audio(video_path: str, audio_waveform: np.ndarray, sr: int, out_path: str, copy_video: bool) -> None:
+    """Mux video_path's video stream with audio_waveform (fed as f32le over stdin) into out_path."""
+    extension = os.path.splitext(out_path)[1].lower()
+    video_args = ['-c:v', 'copy'] if copy_video else CONTAINER_REENCODE_ARGS.get(extension, DEFAULT_REENCODE_ARGS)
+    cmd = [find_ffmpeg('ffmpeg'), '-y', '-v', 'error',
+           '-i', video_path,
+           '-f', 'f32le', '-ar', str(int(sr)), '-ac', '1', '-i', 'pipe:0',
+           '-map', '0:v:0', '-map', '1:a:0']
+    cmd += video_args + CONTAINER_AUDIO_ARGS.get(extension, DEFAULT_AUDIO_ARGS) + [out_path]
+
+    audio_bytes = memoryview(np.ascontiguousarray(audio_waveform, dtype=np.float32)).cast('B')
+    stderr_chunks = []
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+    try:
+        chunk = 1 << 20
+        for start in range(0, len(audio_bytes), chunk):
+            process.stdin.write(audio_bytes[start:start + chunk])
+        process.stdin.close()
+    except (BrokenPipeError, OSError):
+        pass  # ffmpeg exited early; its stderr is reported below
+    return_code = process.wait()
+    stderr_thread.join(timeout=5.0)
+    if return_code != 0:
+        try:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+        except Exception:
+            pass
+        message = b''.join(stderr_chunks).decode('utf-8', errors='replace').strip()
+        raise RuntimeError(message.splitlines()[-1] if message else f"ffmpeg exit code {return_code}")
+
+def export_video_with_audio(video_path: str, audio_waveform: np.ndarray, sr: int, out_path: str,
+                            reencode: bool = False) -> None:
+    """Replace the audio track of video_path with audio_waveform and write out_path.
+    With ffmpeg the original video stream is copied bit-for-bit (-c:v copy) and the new audio is
+    piped in; the video is only re-encoded when reencode=True, the source codec does not fit the
+    output container, or the stream copy fails. Without ffmpeg this re-encodes through moviepy."""
+    if not find_ffmpeg('ffmpeg'):
+        print("[EXPORT] ffmpeg not found; re-encoding through moviepy")
+        _export_video_with_audio_moviepy(video_path, audio_waveform, sr, out_path)
+        return
+    extension = os.path.splitext(out_path)[1].lower()
+    copy_video = not reencode
+    if copy_video:
+        codec = probe_video_codec(video_path)
+        allowed = CONTAINER_VIDEO_CODECS.get(extension)
+        if codec and allowed is not None and codec not in allowed:
+            print(f"[EXPORT] {codec} video cannot be stream-copied into {extension}; re-encoding")
+            copy_video = False
+    start_time = time.perf_counter()
+    if copy_video:
+        try:
+            _ffmpeg_mux_audio(video_path, audio_waveform, sr, out_path, copy_video=True)
+            print(f"[EXPORT] Stream-copied video, encoded audio in {time.perf_counter() - start_time:.1f}s")
+            return
+        except RuntimeError as e:
+            print(f"[EXPORT] Stream copy failed ({e}); re-encoding video")
+    _ffmpeg_mux_audio(video_path, audio_waveform, sr, out_path, copy_video=False)
+    print(f"[EXPORT] Re-encoded video and audio in {time.perf_counter() - start_time:.1f}s")
+
+def _export_video_with_audio_moviepy(video_path: str, audio_waveform: np.ndarray, sr: int, out_path: str) -> None:
     """Replace audio track in video using moviepy by writing temp wav and setting new audio."""
     video_clip = mpe.VideoFileClip(video_path)
     # Use local temp directory instead of AppData
@@ -1606,23 +2597,77 @@ def search_sync_offset(
     sr: int = 22050,
     hop_length: int = 512,
     max_seek_s: float = 10.0,
+    strategy: str = 'auto',
+    coarse_resolution_s: float = 0.1,
+    top_k: int = 3,
+    precision_s: float = 0.01,
+    video_window: Optional[Tuple[float, float]] = None,
+    beat_check: bool = False,
 ):
-    """Search for best sync offset without exporting. Returns SyncResult with candidates."""
+    """Search for best sync offset without exporting. Returns SyncResult with candidates.
+    strategy: 'exhaustive' (full-resolution features of both inputs, every lag scored),
+    'coarse_to_fine' (cheap coarse features pick top_k candidates; full-resolution features only
+    for the target audio behind them) or 'auto' (coarse_to_fine from AUTO_COARSE_TO_FINE_SEEK_S
+    of seek range, where the target is long enough for that to pay off; exhaustive below).
+    video_window=(start_s, duration_s) decodes only that part of the video; offsets are searched
+    within +-max_seek_s of start_s and reported relative to the full video.
+    beat_check=True also tracks beats in both inputs and reports the median beat error at the
+    chosen offset (diagnostic only; it does not change the result)."""
+    timings = {}
+    search_start = time.perf_counter()
     # Load sources
     print(f"[LOAD] Video: {video_path}")
-    video_audio_waveform, video_audio_sample_rate, video_duration_seconds = load_audio_from_video(video_path, sr)
+    stage_start = time.perf_counter()
+    window_start_s = 0.0
+    video_feature_source = video_path
+    if video_window:
+        window_start_s, window_duration_s = float(video_window[0]), float(video_window[1])
+        print(f"[LOAD] Video window: {window_start_s:.1f}s + {window_duration_s:.1f}s (not cached)")
+        video_audio_waveform, video_audio_sample_rate, video_duration_seconds = load_audio_from_video(
+            video_path, sr, start_s=window_start_s, duration_s=window_duration_s)
+        video_feature_source = None
+    else:
+        video_audio_waveform, video_audio_sample_rate, video_duration_seconds = load_source_audio(video_path, sr, is_video=True)
+    timings['load_video'] = time.perf_counter() - stage_start
     print(f"[LOAD] Target audio/video: {target_audio_path}")
-    target_audio_waveform, target_audio_sample_rate, target_duration_seconds = load_audio_from_any(target_audio_path, sr)
-
-    # randomized sampling offset search with similarity scoring
-    print("\n[ANALYZE] Performing offset search...")
-    search_results = randomized_sampling_offset_search(
-        video_audio_waveform,
-        target_audio_waveform,
-        sr, hop_length,
-        max_offset_s=max_seek_s,
-        step_s=0.1
-    )
+    stage_start = time.perf_counter()
+    target_audio_waveform, target_audio_sample_rate, target_duration_seconds = load_source_audio(target_audio_path, sr)
+    timings['load_target'] = time.perf_counter() - stage_start
+
+    if strategy == 'auto':
+        strategy = 'coarse_to_fine' if max_seek_s >= AUTO_COARSE_TO_FINE_SEEK_S else 'exhaustive'
+    print(f"\n[ANALYZE] Performing offset search (strategy={strategy})...")
+    if strategy == 'coarse_to_fine':
+        search_results = coarse_to_fine_offset_search(
+            video_audio_waveform,
+            target_audio_waveform,
+            sr, hop_length,
+            max_offset_s=max_seek_s,
+            coarse_resolution_s=coarse_resolution_s,
+            top_k=top_k,
+            precision_s=precision_s,
+            timings=timings,
+            video_source=video_feature_source,
+            target_source=target_audio_path,
+        )
+    elif strategy == 'exhaustive':
+        search_results = randomized_sampling_offset_search(
+            video_audio_waveform,
+            target_audio_waveform,
+            sr, hop_length,
+            max_offset_s=max_seek_s,
+            step_s=0.1,
+            timings=timings,
+            video_source=video_feature_source,
+            target_source=target_audio_path,
+        )
+    else:
+        raise ValueError(f"Unknown search strategy: {strategy}")
+    if not search_results:
+        raise RuntimeError("Offset search produced no candidates (audio too short or silent?)")
+    if window_start_s:
+        for result in search_results:
+            result['offset_s'] += window_start_s
     
     # selection: prioritize chroma (harmonic content) for music matching
     # Sort by chroma correlation first (most important for melody/harmony matching)
@@ -1704,6 +2749,24 @@ def search_sync_offset(
             sync_quality = 'poor'
     
     print(f"\n[RESULT] Selected offset: {final_offset_s:+.3f}s (method={offset_method}, quality={sync_quality}, score={best_score:.3f})")
+
+    # Optional beat check at the chosen offset (beat tracking costs more than the search itself)
+    beat_note = ""
+    if beat_check:
+        stage_start = time.perf_counter()
+        try:
+            _, video_beats = compute_beat_analysis(video_audio_waveform, sr, hop_length, source_path=video_feature_source)
+            _, target_beats = compute_beat_analysis(target_audio_waveform, sr, hop_length, source_path=target_audio_path)
+            if window_start_s:
+                video_beats = video_beats + window_start_s
+            beat_error = beat_alignment_error(video_beats, target_beats, final_offset_s, video_duration_seconds)
+            if beat_error is not None:
+                print(f"[BEATS] {len(video_beats)} video / {len(target_beats)} target beats, "
+                      f"median beat error at offset: {beat_error * 1000.0:.0f} ms")
+                beat_note = f" Median beat error at offset: {beat_error * 1000.0:.0f} ms."
+        except Exception as beat_exception:
+            print(f"[BEATS] Beat analysis failed: {beat_exception}")
+        timings['beats'] = time.perf_counter() - stage_start
     
     # Convert top results to sync_points format for JSON report
     # Use sorted_by_combined for report (shows all scoring methods)
@@ -1720,7 +2783,9 @@ def search_sync_offset(
     ]
 
     # Return result  
+    timings['total'] = time.perf_counter() - search_start
     print(f"\n[SEARCH COMPLETE] Found best offset: {final_offset_s:+.3f}s")
+    print("[TIMING] " + ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items()))
     print("[INFO] Use 'Export Video' button to create output with chosen offset")
 
     synchronization_result = SyncResult(
@@ -1733,9 +2798,10 @@ def search_sync_offset(
         sync_points=sync_points,  # Top 10 candidates with all scores
         offset_method=offset_method,
         sync_quality=sync_quality,
-        notes=f"Multi-feature randomized-sampling search: tested {len(search_results)} offsets. "
+        notes=f"Multi-feature {strategy} search: tested {len(search_results)} offsets. "
               f"Features: chromagram (harmonic), spectral contrast (timbre), MFCC (timbre detail), onset (rhythm). "
-              f"Best score: {best_score:.3f}. No export performed - use Export button."
+              f"Best score: {best_score:.3f}.{beat_note} No export performed - use Export button.",
+        timings=timings,
     )
 
     return synchronization_result
@@ -1748,14 +2814,30 @@ def sync_audio_to_video(
     sr: int = 22050,
     hop_length: int = 512,
     max_seek_s: float = 10.0,
+    strategy: str = 'auto',
+    coarse_resolution_s: float = 0.1,
+    top_k: int = 3,
+    precision_s: float = 0.01,
+    video_window: Optional[Tuple[float, float]] = None,
+    reencode: bool = False,
+    beat_check: bool = False,
 ):
     """Full sync with export - calls search_sync_offset then exports."""
     # Do search
-    result = search_sync_offset(video_path, target_audio_path, sr, hop_length, max_seek_s)
+    result = search_sync_offset(video_path, target_audio_path, sr, hop_length, max_seek_s,
+                                strategy=strategy, coarse_resolution_s=coarse_resolution_s,
+                                top_k=top_k, precision_s=precision_s, video_window=video_window,
+                                beat_check=beat_check)
     
-    # Load audio again for export
-    video_audio_waveform, _, video_duration_seconds = load_audio_from_video(video_path, sr)
-    target_audio_waveform, _, _ = load_audio_from_any(target_audio_path, sr)
+    # The search already decoded both sources; only the target waveform and video duration are needed
+    video_duration_seconds = result.video_duration_s
+    if video_duration_seconds is None:
+        # Windowed search could not probe the container; never trim the export to the window
+        video_clip = mpe.VideoFileClip(video_path)
+        video_duration_seconds = float(video_clip.duration)
+        video_clip.close()
+        result.video_duration_s = video_duration_seconds
+    target_audio_waveform, _, _ = load_source_audio(target_audio_path, sr)
     
     # Apply offset and export
     print("[PROCESS] Applying offset and matching duration…")
@@ -1763,7 +2845,7 @@ def sync_audio_to_video(
     target_audio_final_waveform = trim_or_pad_to_duration(target_audio_time_aligned_waveform, sr, video_duration_seconds)
 
     print(f"[EXPORT] Writing video with replaced audio -> {output_path}")
-    export_video_with_audio(video_path, target_audio_final_waveform, sr, output_path)
+    export_video_with_audio(video_path, target_audio_final_waveform, sr, output_path, reencode=reencode)
     print("[DONE] Export complete.")
     
     # Update result with output path
@@ -1779,6 +2861,453 @@ def sync_audio_to_video(
 
     return result
 
+# ========================= Batch sync =========================
+
+BATCH_REPORT_FIELDS = ('video', 'audio', 'output', 'status', 'offset_s', 'offset_method', 'sync_quality',
+                       'top_score', 'search_s', 'total_s', 'error')
+
+def load_batch_manifest(manifest_path: str) -> List[Dict[str, str]]:
+    """Read pairs from a .csv (header: video,audio[,out]) or .json (list of {video, audio[, out]}) manifest.
+    Relative paths are resolved against the manifest's folder."""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    if manifest_path.lower().endswith('.json'):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        if isinstance(entries, dict):
+            entries = entries.get('pairs', [])
+    else:
+        with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+            entries = list(csv.DictReader(f))
+    pairs = []
+    for entry in entries:
+        video, audio = (entry.get('video') or '').strip(), (entry.get('audio') or '').strip()
+        if not video or not audio:
+            print(f"[BATCH] Skipping manifest entry without video/audio: {entry}")
+            continue
+        pair = {'video': os.path.join(base_dir, video), 'audio': os.path.join(base_dir, audio)}
+        if (entry.get('out') or '').strip():
+            pair['out'] = os.path.join(base_dir, entry['out'].strip())
+        pairs.append(pair)
+    return pairs
+
+def pair_folders(video_dir: str, audio_dir: str) -> List[Dict[str, str]]:
+    """Pair each video in video_dir with the file in audio_dir that has the same base name."""
+    audio_by_stem = {}
+    for name in sorted(os.listdir(audio_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in SYNC_AUDIO_EXTS:
+            audio_by_stem.setdefault(stem.lower(), os.path.join(audio_dir, name))
+    pairs = []
+    for name in sorted(os.listdir(video_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in SYNC_VIDEO_EXTS:
+            continue
+        audio = audio_by_stem.get(stem.lower())
+        if audio is None or os.path.abspath(audio) == os.path.abspath(os.path.join(video_dir, name)):
+            print(f"[BATCH] No matching audio for {name}")
+            continue
+        pairs.append({'video': os.path.join(video_dir, name), 'audio': audio})
+    return pairs
+
+def load_batch_report(report_path: str) -> List[dict]:
+    """Rows of an existing JSON/CSV batch report (empty if missing or unreadable)."""
+    if not report_path or not os.path.isfile(report_path):
+        return []
+    try:
+        if report_path.lower().endswith('.csv'):
+            with open(report_path, 'r', encoding='utf-8', newline='') as f:
+                return list(csv.DictReader(f))
+        with open(report_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get('pairs', []) if isinstance(data, dict) else list(data)
+    except Exception as e:
+        print(f"[BATCH] Could not read existing report {report_path}: {e}")
+        return []
+
+def save_batch_report(report_path: str, rows: List[dict], settings: Optional[dict] = None) -> None:
+    """Write rows as CSV (by extension) or JSON, atomically."""
+    tmp_path = report_path + '.tmp'
+    if report_path.lower().endswith('.csv'):
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=BATCH_REPORT_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated': time.strftime('%Y-%m-%d %H:%M:%S'), 'settings': settings or {}, 'pairs': rows}, f, indent=2)
+    os.replace(tmp_path, report_path)
+
+def _batch_key(video: str, audio: str) -> Tuple[str, str]:
+    return os.path.normcase(os.path.abspath(video)), os.path.normcase(os.path.abspath(audio))
+
+def _batch_worker_init(cache_root: Optional[str], cache_enabled: bool) -> None:
+    """Process-pool initializer: configure the cache and import librosa's lazy submodules once per worker."""
+    configure_feature_cache(root=cache_root, enabled=cache_enabled)
+    for submodule in ('feature', 'onset', 'beat'):
+        getattr(librosa, submodule)
+
+def sync_pair_job(job: dict) -> dict:
+    """Run sync_audio_to_video for one {video, audio, out, options} job; returns a report row."""
+    row = {'video': os.path.abspath(job['video']), 'audio': os.path.abspath(job['audio']),
+           'output': os.path.abspath(job['out']), 'status': 'failed', 'offset_s': None, 'offset_method': '',
+           'sync_quality': '', 'top_score': None, 'search_s': None, 'total_s': None, 'error': ''}
+    start_time = time.perf_counter()
+    try:
+        result = sync_audio_to_video(video_path=job['video'], target_audio_path=job['audio'],
+                                     output_path=job['out'], **job.get('options', {}))
+        row.update({
+            'status': 'ok',
+            'offset_s': round(float(result.final_offset_s), 4),
+            'offset_method': result.offset_method,
+            'sync_quality': result.sync_quality,
+            'top_score': round(float(result.sync_points[0]['combined_score']), 4) if result.sync_points else None,
+            'search_s': round(float(result.timings.get('total', 0.0)), 2),
+        })
+    except Exception as e:
+        row['error'] = str(e)
+        print(f"[BATCH] Failed {os.path.basename(job['video'])} + {os.path.basename(job['audio'])}: {e}")
+    row['total_s'] = round(time.perf_counter() - start_time, 2)
+    return row
+
+def run_sync_batch(pairs: List[Dict[str, str]], report_path: str, workers: int = 1, out_dir: Optional[str] = None,
+                   force: bool = False, **sync_options) -> List[dict]:
+    """Sync many (video, audio) pairs, `workers` at a time in separate processes.
+    Pairs already marked ok in report_path (with their output present) are skipped unless force;
+    the report is rewritten after every finished pair so an interrupted run resumes cleanly."""
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    video_counts = {}
+    for pair in pairs:
+        video_key = os.path.normcase(os.path.abspath(pair['video']))
+        video_counts[video_key] = video_counts.get(video_key, 0) + 1
+
+    jobs = []
+    for pair in pairs:
+        out_path = pair.get('out')
+        if not out_path:
+            video_stem = os.path.splitext(os.path.basename(pair['video']))[0]
+            # Same video against several target mixes -> include the target name
+            if video_counts[os.path.normcase(os.path.abspath(pair['video']))] > 1:
+                video_stem += '_' + os.path.splitext(os.path.basename(pair['audio']))[0]
+            out_path = os.path.join(out_dir or os.path.dirname(os.path.abspath(pair['video'])), video_stem + '_synced.mp4')
+        jobs.append({'video': pair['video'], 'audio': pair['audio'], 'out': out_path, 'options': dict(sync_options)})
+
+    rows = {}
+    for row in load_batch_report(report_path):
+        if row.get('video') and row.get('audio'):
+            rows[_batch_key(row['video'], row['audio'])] = row
+    pending = []
+    for job in jobs:
+        previous = rows.get(_batch_key(job['video'], job['audio']))
+        if not force and previous and previous.get('status') == 'ok' and os.path.isfile(previous.get('output') or ''):
+            print(f"[BATCH] Skipping completed pair: {os.path.basename(job['video'])} + {os.path.basename(job['audio'])}")
+            continue
+        pending.append(job)
+    print(f"[BATCH] {len(jobs)} pairs, {len(jobs) - len(pending)} already done, {len(pending)} to run with {workers} worker(s)")
+
+    job_keys = [_batch_key(job['video'], job['audio']) for job in jobs]
+
+    def _ordered_rows():
+        # Pairs of this run in job order, then rows kept from earlier runs of other pairs
+        known = set(job_keys)
+        return [rows[key] for key in job_keys if key in rows] + [row for key, row in rows.items() if key not in known]
+
+    def _record(row):
+        rows[_batch_key(row['video'], row['audio'])] = row
+        save_batch_report(report_path, _ordered_rows(), sync_options)
+        finished = sum(1 for job in pending if _batch_key(job['video'], job['audio']) in done_keys)
+        print(f"[BATCH] {finished}/{len(pending)} pairs finished ({row['status']}, offset={row['offset_s']})")
+
+    done_keys = set()
+    cache = get_feature_cache()
+    if workers <= 1 or len(pending) <= 1:
+        for job in pending:
+            row = sync_pair_job(job)
+            done_keys.add(_batch_key(job['video'], job['audio']))
+            _record(row)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init,
+                                 initargs=(cache.root, cache.enabled)) as executor:
+            futures = {executor.submit(sync_pair_job, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                done_keys.add(_batch_key(job['video'], job['audio']))
+                _record(future.result())
+    if not os.path.isfile(report_path):
+        save_batch_report(report_path, _ordered_rows(), sync_options)
+    return _ordered_rows()
+
+# ========================= Benchmark =========================
+
+BENCHMARK_STRATEGIES = ('exhaustive', 'coarse_to_fine', 'randomized_sampling', 'consensus')
+
+# Degradations applied to every source: (name, target time-stretch rate, video SNR in dB or None)
+BENCHMARK_VARIANTS = (
+    ('clean', 1.0, None),
+    ('noise_10db', 1.0, 10.0),
+    ('noise_0db', 1.0, 0.0),
+    ('stretch_0.5pct', 1.005, 20.0),
+)
+
+def synthesize_test_music(duration_s: float, sr: int, seed: int = 0, bpm: float = 120.0) -> np.ndarray:
+    """Non-repeating synthetic track: chord pads, random harmonic notes and kick/hi-hat beats, so
+    the chroma, timbre and onset features all carry alignment information."""
+    rng = np.random.default_rng(seed)
+    total_samples = int(duration_s * sr)
+    y = np.zeros(total_samples, dtype=np.float64)
+    beat_s = 60.0 / bpm
+    scale = np.array([0, 2, 4, 5, 7, 9, 11])
+
+    def _tone(midi: int, length_s: float, decay_s: float, harmonics: int = 4) -> np.ndarray:
+        t = np.arange(int(length_s * sr)) / float(sr)
+        freq = 440.0 * 2.0 ** ((midi - 69) / 12.0)
+        wave = sum(np.sin(2.0 * np.pi * freq * k * t) / k for k in range(1, harmonics + 1))
+        return wave * np.exp(-t / decay_s)
+
+    def _add(start_s: float, signal: np.ndarray, gain: float) -> None:
+        start = int(start_s * sr)
+        signal = signal[:max(0, total_samples - start)]
+        y[start:start + len(signal)] += gain * signal
+
+    kick_t = np.arange(int(0.15 * sr)) / float(sr)
+    kick = np.sin(2.0 * np.pi * 60.0 * kick_t) * np.exp(-kick_t / 0.05)
+    hat_length = int(0.04 * sr)
+    hat_envelope = np.exp(-np.arange(hat_length) / (0.01 * sr))
+    for beat in range(int(duration_s / beat_s)):
+        start_s = beat * beat_s
+        if beat % 4 == 0:
+            root = 45 + int(rng.choice(scale))
+            for interval in (0, 4, 7):
+                _add(start_s, _tone(root + interval, beat_s * 4, 1.5, 3), 0.08)
+        _add(start_s, kick, 0.5 if beat % 2 == 0 else 0.25)
+        _add(start_s + beat_s / 2, rng.standard_normal(hat_length) * hat_envelope, 0.1)
+        for step in range(int(rng.integers(1, 3))):
+            note = 60 + int(rng.choice(scale)) + 12 * int(rng.integers(0, 2))
+            _add(start_s + step * beat_s / 2, _tone(note, beat_s, 0.3), 0.15)
+    return (y / (np.max(np.abs(y)) + 1e-9) * 0.8).astype(np.float32)
+
+def make_benchmark_pair(source_y: np.ndarray, sr: int, offset_s: float, video_duration_s: float,
+                        stretch: float = 1.0, snr_db: Optional[float] = None,
+                        seed: int = 0) -> Tuple[np.ndarray, np.ndarray, float]:
+    """(video_y, target_y, expected_offset_s) from one source track.
+    The video holds the source shifted by offset_s (the convention of apply_offset) plus white
+    noise at snr_db; the target is the whole source, time-stretched by `stretch`. A stretched
+    target drifts, so the expected offset is the local one at the middle of the video."""
+    target_y = source_y if stretch == 1.0 else librosa.effects.time_stretch(source_y, rate=stretch)
+    video_y = trim_or_pad_to_duration(apply_offset(source_y, sr, offset_s), sr, video_duration_s).astype(np.float32)
+    if snr_db is not None:
+        rms = float(np.sqrt(np.mean(np.square(video_y, dtype=np.float64))))
+        noise = np.random.default_rng(seed).standard_normal(len(video_y)) * rms / (10.0 ** (snr_db / 20.0))
+        video_y = (video_y + noise).astype(np.float32)
+    # Target time s plays at video time s * stretch + offset_s
+    middle_target_s = (video_duration_s / 2.0 - offset_s) / stretch
+    expected_offset_s = offset_s + (stretch - 1.0) * middle_target_s
+    return video_y, np.asarray(target_y, dtype=np.float32), float(expected_offset_s)
+
+def build_benchmark_cases(sr: int, clips: Optional[List[str]] = None, max_offset_s: float = 10.0,
+                          video_duration_s: float = 30.0, seed: int = 0) -> List[dict]:
+    """Benchmark cases: every source (two synthetic tracks, or the given audio clips) under every
+    BENCHMARK_VARIANTS degradation, each at a random known offset within 80% of max_offset_s.
+    Positive offsets delay the music inside the video, so they stay below half the video length;
+    larger ones would leave a silent video when max_offset_s exceeds it."""
+    rng = np.random.default_rng(seed)
+    source_duration_s = video_duration_s + 2.0 * max_offset_s + 5.0
+    sources = []
+    if clips:
+        for clip_path in clips:
+            clip_y, _, clip_duration_s = load_audio_from_any(clip_path, sr)
+            # Negative offsets need max_offset_s of source beyond the end of the video
+            clip_video_duration_s = min(video_duration_s, clip_duration_s - max_offset_s - 1.0)
+            if clip_video_duration_s < 5.0:
+                print(f"[BENCHMARK] Skipping {clip_path}: too short for a {max_offset_s:.0f}s seek range")
+                continue
+            sources.append((os.path.splitext(os.path.basename(clip_path))[0], clip_y, clip_video_duration_s))
+    else:
+        for index, bpm in enumerate((120.0, 96.0)):
+            sources.append((f'synthetic{index}_{bpm:.0f}bpm', synthesize_test_music(source_duration_s, sr, seed + index, bpm),
+                            video_duration_s))
+
+    cases = []
+    for source_name, source_y, source_video_duration_s in sources:
+        for variant_name, stretch, snr_db in BENCHMARK_VARIANTS:
+            offset_s = round(float(rng.uniform(-0.8 * max_offset_s, min(0.8 * max_offset_s, 0.5 * source_video_duration_s))), 3)
+            video_y, target_y, expected_offset_s = make_benchmark_pair(
+                source_y, sr, offset_s, source_video_duration_s, stretch, snr_db, seed=int(rng.integers(1 << 31)))
+            cases.append({
+                'name': f'{source_name}/{variant_name}',
+                'offset_s': offset_s,
+                'expected_offset_s': round(expected_offset_s, 4),
+                'stretch': stretch,
+                'snr_db': snr_db,
+                'video_duration_s': round(source_video_duration_s, 3),
+                'video': video_y,
+                'target': target_y,
+            })
+    return cases
+
+def _benchmark_search(strategy: str, case: dict, paths: Tuple[str, str], sr: int, hop_length: int,
+                      max_seek_s: float, search_options: dict) -> Tuple[Optional[float], str]:
+    """Run one strategy on one case; returns (offset_s or None, detail)."""
+    if strategy in ('exhaustive', 'coarse_to_fine'):
+        result = search_sync_offset(paths[0], paths[1], sr=sr, hop_length=hop_length, max_seek_s=max_seek_s,
+                                    strategy=strategy, **search_options)
+        return float(result.final_offset_s), f'{result.offset_method}/{result.sync_quality}'
+    if strategy == 'randomized_sampling':
+        results = randomized_sampling_offset_search(case['video'], case['target'], sr, hop_length, max_offset_s=max_seek_s)
+        best = max(results, key=lambda r: r['combined_score'])
+        return float(best['offset_s']), f"combined={best['combined_score']:.3f}"
+    if strategy == 'consensus':
+        # Four segments per video, so short benchmark videos still give several sync points
+        sync_points = segmented_sync_points(case['video'], case['target'], sr, hop_length, max_offset_s=max_seek_s,
+                                            segment_s=case['video_duration_s'] / 4.0)
+        offset_s, method, quality = compute_consensus_offset(sync_points)
+        high = sum(1 for sp in sync_points if sp.confidence == 'high')
+        detail = f'{method}/{quality} ({high}/{len(sync_points)} high)'
+        return (None if method in ('none', 'insufficient_confidence', 'inconsistent_offsets') else float(offset_s)), detail
+    raise ValueError(f"Unknown benchmark strategy: {strategy}")
+
+def _git_revision() -> Optional[str]:
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                   capture_output=True, text=True, timeout=10)
+        return completed.stdout.strip() or None
+    except Exception:
+        return None
+
+def summarize_benchmark(runs: List[dict], tolerance_s: float) -> Dict[str, dict]:
+    """Per-strategy hit rate (error <= tolerance_s), error statistics, mean wall time and peak memory."""
+    summary = {}
+    for strategy in dict.fromkeys(run['strategy'] for run in runs):
+        strategy_runs = [run for run in runs if run['strategy'] == strategy]
+        errors = np.array([run['error_s'] for run in strategy_runs if run['error_s'] is not None], dtype=np.float64)
+        walls = [run['wall_s'] for run in strategy_runs if run['wall_s'] is not None]
+        peaks = [run['peak_mb'] for run in strategy_runs if run['peak_mb'] is not None]
+        summary[strategy] = {
+            'runs': len(strategy_runs),
+            'hits': int(np.sum(errors <= tolerance_s)),
+            'hit_rate': round(float(np.sum(errors <= tolerance_s)) / max(1, len(strategy_runs)), 3),
+            'failures': sum(1 for run in strategy_runs if run['status'] in ('error', 'no_offset')),
+            'mean_error_s': round(float(np.mean(errors)), 4) if len(errors) else None,
+            'median_error_s': round(float(np.median(errors)), 4) if len(errors) else None,
+            'max_error_s': round(float(np.max(errors)), 4) if len(errors) else None,
+            'mean_wall_s': round(float(np.mean(walls)), 3) if walls else None,
+            'max_peak_mb': round(float(np.max(peaks)), 1) if peaks else None,
+        }
+    return summary
+
+def compare_benchmark_reports(report: dict, baseline_path: str) -> None:
+    """Print per-strategy changes in hit rate, mean error and mean wall time against a saved report."""
+    try:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except Exception as e:
+        print(f"[BENCHMARK] Could not read baseline {baseline_path}: {e}")
+        return
+    print(f"[BENCHMARK] Compared with {baseline_path} (revision {baseline.get('revision')}):")
+    for strategy, current in report['summary'].items():
+        previous = baseline.get('summary', {}).get(strategy)
+        if not previous:
+            print(f"  {strategy:20s} not in baseline")
+            continue
+        changes = []
+        for key, label in (('hit_rate', 'hit rate'), ('mean_error_s', 'mean error'), ('mean_wall_s', 'wall'),
+                           ('max_peak_mb', 'peak MB')):
+            if current.get(key) is not None and previous.get(key) is not None:
+                changes.append(f"{label} {previous[key]} -> {current[key]} ({current[key] - previous[key]:+.3g})")
+        print(f"  {strategy:20s} " + ", ".join(changes))
+
+def run_sync_benchmark(report_path: str, clips: Optional[List[str]] = None, strategies=BENCHMARK_STRATEGIES,
+                       sr: int = 22050, hop_length: int = 512, max_seek_s: float = 10.0,
+                       video_duration_s: float = 30.0, seed: int = 0, tolerance_s: float = 0.05,
+                       trace_memory: bool = True, verbose: bool = False, baseline_path: Optional[str] = None,
+                       **search_options) -> dict:
+    """Time every strategy on every benchmark case and save the results as JSON.
+    Wall time comes from a plain run; peak memory (tracemalloc, which sees numpy buffers) from a
+    second traced run, so tracing overhead stays out of the timings. The feature cache is off
+    for the whole benchmark so every run does the full work. search_options (coarse_resolution_s,
+    top_k, precision_s) go to search_sync_offset."""
+    global _feature_cache
+    previous_cache = get_feature_cache()
+    configure_feature_cache(enabled=False)
+    settings = dict(sr=sr, hop_length=hop_length, max_seek_s=max_seek_s, video_duration_s=video_duration_s,
+                    seed=seed, tolerance_s=tolerance_s, clips=list(clips or []), strategies=list(strategies),
+                    **search_options)
+    runs = []
+    try:
+        cases = build_benchmark_cases(sr, clips, max_seek_s, video_duration_s, seed)
+        print(f"[BENCHMARK] {len(cases)} cases x {len(strategies)} strategies")
+        with tempfile.TemporaryDirectory(prefix='video_sync_bench_') as temp_dir:
+            case_paths = []
+            for case_index, case in enumerate(cases):
+                paths = (os.path.join(temp_dir, f'case{case_index}_video.wav'), os.path.join(temp_dir, f'case{case_index}_target.wav'))
+                sf.write(paths[0], case['video'], sr)
+                sf.write(paths[1], case['target'], sr)
+                case_paths.append(paths)
+            # Untimed warm-up so librosa's JIT compilation is not billed to the first strategy
+            if cases:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for strategy in strategies:
+                        try:
+                            _benchmark_search(strategy, cases[0], case_paths[0], sr, hop_length, max_seek_s, search_options)
+                        except Exception:
+                            pass
+            for case, paths in zip(cases, case_paths):
+                for strategy in strategies:
+                    run = {'case': case['name'], 'strategy': strategy, 'offset_s': case['offset_s'],
+                           'expected_offset_s': case['expected_offset_s'], 'found_offset_s': None, 'error_s': None,
+                           'wall_s': None, 'peak_mb': None, 'status': 'error', 'detail': ''}
+                    log = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+                    try:
+                        with log:
+                            start_time = time.perf_counter()
+                            found_offset_s, run['detail'] = _benchmark_search(strategy, case, paths, sr, hop_length,
+                                                                              max_seek_s, search_options)
+                            run['wall_s'] = round(time.perf_counter() - start_time, 4)
+                            if trace_memory:
+                                tracemalloc.start()
+                                try:
+                                    _benchmark_search(strategy, case, paths, sr, hop_length, max_seek_s, search_options)
+                                    run['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0), 2)
+                                finally:
+                                    tracemalloc.stop()
+                        if found_offset_s is None:
+                            run['status'] = 'no_offset'
+                        else:
+                            run['found_offset_s'] = round(found_offset_s, 4)
+                            run['error_s'] = round(abs(found_offset_s - case['expected_offset_s']), 4)
+                            run['status'] = 'ok' if run['error_s'] <= tolerance_s else 'miss'
+                    except Exception as e:
+                        run['detail'] = str(e)
+                    runs.append(run)
+                    found_text = f"{run['found_offset_s']:+.3f}s" if run['found_offset_s'] is not None else '-'
+                    print(f"[BENCHMARK] {case['name']:32s} {strategy:20s} expected={case['expected_offset_s']:+.3f}s "
+                          f"found={found_text} status={run['status']} wall={run['wall_s']}s peak={run['peak_mb']}MB")
+    finally:
+        _feature_cache = previous_cache
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'librosa': librosa.__version__,
+        'settings': settings,
+        'summary': summarize_benchmark(runs, tolerance_s),
+        'runs': runs,
+    }
+    tmp_path = report_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, report_path)
+
+    print(f"[BENCHMARK] Summary (hit = error <= {tolerance_s * 1000.0:.0f} ms) -> {report_path}")
+    for strategy, stats in report['summary'].items():
+        print(f"  {strategy:20s} hits={stats['hits']}/{stats['runs']} mean_err={stats['mean_error_s']}s "
+              f"max_err={stats['max_error_s']}s wall={stats['mean_wall_s']}s peak={stats['max_peak_mb']}MB")
+    if baseline_path:
+        compare_benchmark_reports(report, baseline_path)
+    return report
+
 def _positive_float(val: str) -> float:
     f = float(val)
     if f <= 0:
@@ -1789,18 +3318,100 @@ def cli_main(argv=None):
     parser = argparse.ArgumentParser(
         description="Sync a target audio track to a video's timing using multi-point waveform analysis.",
     )
-    parser.add_argument("--video", required=True, help="Path to input video file")
-    parser.add_argument("--audio", required=True, help="Path to target audio OR video (audio will be extracted) to sync")
+    parser.add_argument("--video", default=None, help="Path to input video file")
+    parser.add_argument("--audio", default=None, help="Path to target audio OR video (audio will be extracted) to sync")
     parser.add_argument("--out", required=False, default=None, help="Path to output video (default: <video>_synced.mp4)")
     parser.add_argument("--report", required=False, default=None, help="Optional JSON report path for sync metrics")
     parser.add_argument("--sr", type=_positive_float, default=22050, help="Processing sample rate (Hz), default 22050")
     parser.add_argument("--hop", type=int, default=512, help="Onset/beat hop_length, default 512")
     parser.add_argument("--max-seek", type=float, default=10.0, help="Max absolute offset to search (seconds), default 10.0")
+    parser.add_argument("--strategy", choices=("auto", "exhaustive", "coarse_to_fine"), default="auto",
+                        help=f"Offset search strategy; auto = coarse_to_fine from --max-seek {AUTO_COARSE_TO_FINE_SEEK_S:.0f}, else exhaustive")
+    parser.add_argument("--coarse-res", type=_positive_float, default=0.1, help="Coarse stage resolution (seconds), default 0.1")
+    parser.add_argument("--top-k", type=int, default=3, help="Coarse candidates re-scored at full resolution, default 3")
+    parser.add_argument("--precision", type=_positive_float, default=0.01, help="Target offset precision (seconds), default 0.01")
+    parser.add_argument("--video-window", type=float, nargs=2, metavar=("START", "DURATION"), default=None,
+                        help="Only analyse this part of the video (seconds); offsets are searched around START")
+    parser.add_argument("--reencode", action="store_true", help="Re-encode the video instead of stream-copying it on export")
+    parser.add_argument("--beat-check", action="store_true", help="Also track beats and report the median beat error at the chosen offset")
+    parser.add_argument("--cache-dir", default=None, help=f"Feature cache folder (default: {FEATURE_CACHE_DIRNAME} next to each input)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the on-disk waveform/feature cache")
+    batch_group = parser.add_argument_group("batch mode")
+    batch_group.add_argument("--batch", default=None, help="Manifest of pairs: .csv with video,audio[,out] columns or .json list")
+    batch_group.add_argument("--video-dir", default=None, help="Folder of videos, paired by base name with --audio-dir")
+    batch_group.add_argument("--audio-dir", default=None, help="Folder of target audio files (same base names as the videos)")
+    batch_group.add_argument("--out-dir", default=None, help="Folder for synced outputs (default: next to each video)")
+    batch_group.add_argument("--jobs", type=int, default=1, help="Pairs processed in parallel (processes), default 1")
+    batch_group.add_argument("--batch-report", default=None, help="Batch report .json or .csv (default: sync_batch_report.json in --out-dir or cwd)")
+    batch_group.add_argument("--force", action="store_true", help="Re-run pairs already marked ok in the batch report")
+    bench_group = parser.add_argument_group("benchmark")
+    bench_group.add_argument("--benchmark", default=None, metavar="REPORT.json",
+                             help="Benchmark the search strategies on synthetic pairs with known offsets and save JSON results")
+    bench_group.add_argument("--benchmark-clip", action="append", default=None, metavar="AUDIO",
+                             help="Build benchmark pairs from this clip instead of synthetic tracks (repeatable)")
+    bench_group.add_argument("--benchmark-strategies", nargs="+", choices=BENCHMARK_STRATEGIES, default=list(BENCHMARK_STRATEGIES),
+                             help="Strategies to benchmark (default: all)")
+    bench_group.add_argument("--benchmark-duration", type=_positive_float, default=30.0, help="Benchmark video length (seconds), default 30")
+    bench_group.add_argument("--benchmark-baseline", default=None, metavar="OLD.json", help="Earlier benchmark report to compare against")
+    bench_group.add_argument("--benchmark-no-memory", action="store_true", help="Skip the traced peak-memory runs")
 
     args = parser.parse_args(argv)
+    configure_feature_cache(root=args.cache_dir, enabled=not args.no_cache)
+    sync_options = dict(
+        sr=int(args.sr),
+        hop_length=int(args.hop),
+        max_seek_s=float(args.max_seek),
+        strategy=args.strategy,
+        coarse_resolution_s=float(args.coarse_res),
+        top_k=max(1, int(args.top_k)),
+        precision_s=float(args.precision),
+        video_window=tuple(args.video_window) if args.video_window else None,
+        reencode=bool(args.reencode),
+        beat_check=bool(args.beat_check),
+    )
+
+    if args.benchmark:
+        run_sync_benchmark(
+            args.benchmark,
+            clips=args.benchmark_clip,
+            strategies=args.benchmark_strategies,
+            sr=sync_options['sr'],
+            hop_length=sync_options['hop_length'],
+            max_seek_s=sync_options['max_seek_s'],
+            video_duration_s=float(args.benchmark_duration),
+            trace_memory=not args.benchmark_no_memory,
+            baseline_path=args.benchmark_baseline,
+            coarse_resolution_s=sync_options['coarse_resolution_s'],
+            top_k=sync_options['top_k'],
+            precision_s=sync_options['precision_s'],
+        )
+        sys.exit(0)
+
+    if args.batch or args.video_dir or args.audio_dir:
+        if args.batch:
+            if not os.path.isfile(args.batch):
+                print(f"[ERROR] Manifest not found: {args.batch}")
+                sys.exit(2)
+            pairs = load_batch_manifest(args.batch)
+        elif args.video_dir and args.audio_dir and os.path.isdir(args.video_dir) and os.path.isdir(args.audio_dir):
+            pairs = pair_folders(args.video_dir, args.audio_dir)
+        else:
+            print("[ERROR] Batch mode needs --batch MANIFEST or both --video-dir and --audio-dir folders")
+            sys.exit(2)
+        if not pairs:
+            print("[ERROR] No video/audio pairs found")
+            sys.exit(2)
+        report_path = args.batch_report or os.path.join(args.out_dir or os.getcwd(), "sync_batch_report.json")
+        rows = run_sync_batch(pairs, report_path, workers=max(1, int(args.jobs)), out_dir=args.out_dir,
+                              force=bool(args.force), **sync_options)
+        failed = [row for row in rows if row.get('status') != 'ok']
+        print(f"[BATCH] Done: {len(rows) - len(failed)} ok, {len(failed)} failed -> {report_path}")
+        sys.exit(1 if failed else 0)
 
     video_path = args.video
     audio_path = args.audio
+    if not video_path or not audio_path:
+        parser.error("--video and --audio are required (or use --batch / --video-dir + --audio-dir)")
     if not os.path.isfile(video_path):
         print(f"[ERROR] Video not found: {video_path}")
         sys.exit(2)
@@ -1819,13 +3430,14 @@ def cli_main(argv=None):
             target_audio_path=audio_path,
             output_path=out_path,
             report_path=args.report,
-            sr=int(args.sr),
-            hop_length=int(args.hop),
-            max_seek_s=float(args.max_seek),
+            **sync_options,
         )
     except Exception as e:
         print(f"[FATAL] {e}")
         sys.exit(1)
 
 if __name__ == '__main__':
-    gui_main()
+    if len(sys.argv) > 1:
+        cli_main()
+    else:
+        gui_main()
@@ -78,15 +78,25 @@ import sys
 import os
 import json
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import numpy as np
 import cv2
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem,
-    QFileDialog, QGraphicsView, QGraphicsScene, QComboBox, QAbstractItemView, QSplitter, QColorDialog, QSizePolicy, QGridLayout, QSpacerItem, QSpinBox, QDoubleSpinBox, QFormLayout, QDialog, QSlider, QGroupBox
+    QFileDialog, QGraphicsView, QGraphicsScene, QGraphicsItem, QComboBox, QAbstractItemView, QSplitter, QColorDialog, QSizePolicy, QGridLayout, QSpacerItem, QSpinBox, QDoubleSpinBox, QFormLayout, QDialog, QSlider, QGroupBox
 )
 from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor, QDragEnterEvent, QDropEvent, QMouseEvent, QIcon, QTransform
-from PyQt5.QtCore import Qt, QSize, QByteArray, QMimeData, QRectF
+from PyQt5.QtCore import Qt, QSize, QByteArray, QMimeData, QRectF, QRect
+
+# Per-layer compositing debug output (transform, draw position, sampled pixels); off by default as it runs on every brush stroke
+LayeredImage_DEBUG_COMPOSITE = False
+# Edge length in canvas pixels of the tiles the canvas composite is kept in (see LayeredImageTileCompositor)
+LayeredImage_TILE_SIZE = 256
+# Format of the live canvas composite, its tiles and cached stacks; ARGB32_Premultiplied end to end is the raster
+# engine's fast blending path (about 3x quicker per tile than RGBA8888)
+LayeredImage_CANVAS_FORMAT = QImage.Format_ARGB32_Premultiplied
 
 #//==================================================================
 
@@ -392,10 +402,148 @@ class LayerListWidget(QListWidget):
         self.editor.LayeredImageEditor_project.LayeredImageProject_reorder_layers(new_order)
         self.refresh_layer_list()
 
-def LayeredImage_composite_layers(project):
+def LayeredImage_layer_canvas_transform(layer):
+    """
+    QTransform mapping a layer's image pixels to canvas pixels: rotation and scale about the image centre,
+    re-anchored the way QImage.transformed() does (QImage.trueMatrix), then moved by Layer_offset.
+    """
+    layer_image_width = layer.Layer_image.width()
+    layer_image_height = layer.Layer_image.height()
+    composed_t = QTransform()
+    cx = layer_image_width / 2
+    cy = layer_image_height / 2
+    composed_t.translate(cx, cy)
+    composed_t.rotate(layer.Layer_rotation)
+    composed_t.scale(layer.Layer_scale, layer.Layer_scale)
+    composed_t.translate(-cx, -cy)
+    offset = getattr(layer, 'Layer_offset', (0,0))
+    return QImage.trueMatrix(composed_t, layer_image_width, layer_image_height) * QTransform.fromTranslate(offset[0], offset[1])
+
+def LayeredImage_draw_layer_region(painter, layer, region_rect, source_format=None):
+    """
+    Draw the part of one layer (transform, mask, opacity) that lands in region_rect (canvas pixels) with the painter's
+    current composition mode. source_format converts the masked crop first (match it to the destination to skip
+    per-pixel conversion while blending). Returns False when the layer is hidden, empty or entirely outside the region.
+    """
+    if not layer.Layer_visible or layer.Layer_image is None or layer.Layer_image.isNull():
+        return False
+    layer_to_canvas = LayeredImage_layer_canvas_transform(layer)
+    canvas_to_layer, invertible = layer_to_canvas.inverted()
+    if not invertible:
+        return False
+    # Part of the layer image that lands in the region (+2px for smooth-transform filtering)
+    source_rect = canvas_to_layer.mapRect(QRectF(region_rect)).toAlignedRect().adjusted(-2, -2, 2, 2).intersected(layer.Layer_image.rect())
+    if source_rect.isEmpty():
+        return False
+    source_img = layer.Layer_image.copy(source_rect)
+    if layer.Layer_mask is not None and not layer.Layer_mask.isNull():
+        source_img.setAlphaChannel(layer.Layer_mask.copy(source_rect))
+    if source_format is not None and source_img.format() != source_format:
+        source_img = source_img.convertToFormat(source_format)
+    painter.save()
+    # Combined with the painter's own transform, so tile painters can translate the canvas onto their tile
+    painter.setTransform(QTransform.fromTranslate(source_rect.x(), source_rect.y()) * layer_to_canvas, True)
+    painter.setOpacity(getattr(layer, 'Layer_opacity', 1.0))
+    painter.drawImage(0, 0, source_img)
+    painter.restore()
+    if LayeredImage_DEBUG_COMPOSITE:
+        print(f"[DEBUG][CANVAS] Drew layer '{getattr(layer, 'Layer_name', '?')}' (id={id(layer)}) source={source_rect.getRect()} region={region_rect.getRect()} "
+              f"offset={getattr(layer, 'Layer_offset', None)} opacity={getattr(layer, 'Layer_opacity', 1.0)} "
+              f"rotation={getattr(layer, 'Layer_rotation', 0.0)} scale={getattr(layer, 'Layer_scale', 1.0)}")
+    return True
+
+def LayeredImage_layer_state_key(layer):
+    """
+    Hashable snapshot of everything that affects how a layer composites; QImage.cacheKey() changes whenever an image
+    or mask is modified. Layout: (visible, opacity, scale, offset, rotation, image key, mask key).
+    """
+    return (layer.Layer_visible, layer.Layer_opacity, layer.Layer_scale, tuple(layer.Layer_offset), layer.Layer_rotation,
+            layer.Layer_image.cacheKey() if layer.Layer_image is not None else None,
+            layer.Layer_mask.cacheKey() if layer.Layer_mask is not None else None)
+
+def LayeredImage_layer_block_occupancy(layer, tile_size=LayeredImage_TILE_SIZE):
+    """
+    Boolean (block_rows, block_columns) array of the tile_size blocks of the layer image, in its own pixel space, where
+    image alpha and mask are both non-zero somewhere. Depends only on the image and mask pixels, so it can be kept for
+    as long as their cacheKeys stay the same. None without an image.
+    """
+    image = layer.Layer_image
+    if image is None or image.isNull():
+        return None
+    rgba = image if image.format() == QImage.Format_RGBA8888 else image.convertToFormat(QImage.Format_RGBA8888)
+    ptr = rgba.constBits()
+    ptr.setsize(rgba.byteCount())
+    opaque = np.frombuffer(ptr, np.uint8).reshape((rgba.height(), rgba.bytesPerLine()))[:, 3:4*rgba.width():4] > 0
+    mask = layer.Layer_mask
+    if mask is not None and not mask.isNull():
+        gray = mask if mask.format() == QImage.Format_Grayscale8 else mask.convertToFormat(QImage.Format_Grayscale8)
+        mask_ptr = gray.constBits()
+        mask_ptr.setsize(gray.byteCount())
+        mask_np = np.frombuffer(mask_ptr, np.uint8).reshape((gray.height(), gray.bytesPerLine()))
+        h = min(opaque.shape[0], mask_np.shape[0])
+        w = min(opaque.shape[1], gray.width())
+        opaque = opaque[:h, :w] & (mask_np[:h, :w] > 0)
+    block_rows = -(-opaque.shape[0] // tile_size)
+    block_columns = -(-opaque.shape[1] // tile_size)
+    padded = np.zeros((block_rows * tile_size, block_columns * tile_size), dtype=bool)
+    padded[:opaque.shape[0], :opaque.shape[1]] = opaque
+    return padded.reshape(block_rows, tile_size, block_columns, tile_size).any(axis=(1, 3))
+
+def LayeredImage_layer_tile_coverage(layer, columns, rows, tile_size=LayeredImage_TILE_SIZE, blocks=None):
+    """
+    Boolean (rows, columns) array of the canvas tiles this layer draws anything into: the occupied blocks of
+    LayeredImage_layer_block_occupancy (pass them as blocks when already known) mapped through the layer transform
+    (+2px for smooth-transform filtering) onto the canvas grid.
+    """
+    coverage = np.zeros((rows, columns), dtype=bool)
+    if not layer.Layer_visible or layer.Layer_opacity <= 0:
+        return coverage
+    if blocks is None:
+        blocks = LayeredImage_layer_block_occupancy(layer, tile_size)
+        if blocks is None:
+            return coverage
+    layer_to_canvas = LayeredImage_layer_canvas_transform(layer)
+    for block_y, block_x in zip(*np.nonzero(blocks)):
+        block_rect = QRectF(int(block_x) * tile_size, int(block_y) * tile_size, tile_size, tile_size).adjusted(-2, -2, 2, 2)
+        canvas_rect = layer_to_canvas.mapRect(block_rect)
+        x0 = max(int(canvas_rect.left() // tile_size), 0)
+        y0 = max(int(canvas_rect.top() // tile_size), 0)
+        x1 = min(int(canvas_rect.right() // tile_size), columns - 1)
+        y1 = min(int(canvas_rect.bottom() // tile_size), rows - 1)
+        if x0 <= x1 and y0 <= y1:
+            coverage[y0:y1+1, x0:x1+1] = True
+    return coverage
+
+def LayeredImage_render_tile(layers, tile_rect):
+    """Composite the given layers (bottom to top) into an image covering just tile_rect of the canvas."""
+    tile_img = QImage(tile_rect.size(), LayeredImage_CANVAS_FORMAT)
+    tile_img.fill(Qt.transparent)
+    painter = QPainter(tile_img)
+    painter.setRenderHints(QPainter.SmoothPixmapTransform | QPainter.Antialiasing)
+    painter.translate(-tile_rect.x(), -tile_rect.y())
+    for layer in layers:
+        LayeredImage_draw_layer_region(painter, layer, tile_rect, LayeredImage_CANVAS_FORMAT)
+    painter.end()
+    return tile_img
+
+def LayeredImage_composite_layer_list(layers, width, height):
+    """Flatten a list of layers (bottom to top) onto a transparent canvas of the given size."""
+    result_img = QImage(width, height, LayeredImage_CANVAS_FORMAT)
+    result_img.fill(Qt.transparent)
+    painter = QPainter(result_img)
+    painter.setRenderHints(QPainter.SmoothPixmapTransform | QPainter.Antialiasing)
+    for layer in layers:
+        LayeredImage_draw_layer_region(painter, layer, result_img.rect(), LayeredImage_CANVAS_FORMAT)
+    painter.end()
+    return result_img
+
+def LayeredImage_composite_layers(project, dirty_rect=None, previous_image=None):
     """
     Composite a list of Layer objects into a single QImage.
     Output image and scene rect are always the base layer's size (project.LayeredImageProject_base_layer). All other layers are composited (with transforms) into this fixed-size image, clipped to the base.
+    With dirty_rect (QRect, canvas pixels) and a previous_image of the same size, only that region is recomposited
+    into previous_image (modified in place and returned); each layer contributes just the part of its image and mask
+    that maps into the region, so the cost follows the damaged area rather than canvas size times layer count.
     """
     base_layer = project.LayeredImageProject_base_layer
     if base_layer is None or base_layer.Layer_image is None or base_layer.Layer_image.isNull():
@@ -403,54 +551,36 @@ def LayeredImage_composite_layers(project):
         return None
     base_width = base_layer.Layer_image.width()
     base_height = base_layer.Layer_image.height()
-    result_img = QImage(base_width, base_height, QImage.Format_RGBA8888)
-    result_img.fill(Qt.transparent)
+    canvas_rect = QRect(0, 0, base_width, base_height)
+    incremental = dirty_rect is not None and previous_image is not None and previous_image.size() == canvas_rect.size()
+    if incremental:
+        region_rect = dirty_rect.intersected(canvas_rect)
+        if region_rect.isEmpty():
+            return previous_image
+        result_img = previous_image
+    else:
+        region_rect = canvas_rect
+        result_img = QImage(base_width, base_height, QImage.Format_RGBA8888)
     painter = QPainter(result_img)
+    painter.setClipRect(region_rect)
+    painter.setCompositionMode(QPainter.CompositionMode_Source)
+    painter.fillRect(region_rect, Qt.transparent)
+    painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+    painter.setRenderHints(QPainter.SmoothPixmapTransform | QPainter.Antialiasing)
     # Draw all layers, from bottom (base) to top
     drew_any = False
     for layer in project.get_all_layers():
-        if not layer.Layer_visible or layer.Layer_image is None or layer.Layer_image.isNull():
-            continue
-        composed_img = layer.Layer_image.copy()
-        composed_t = QTransform()
-        cx = composed_img.width() / 2
-        cy = composed_img.height() / 2
-        composed_t.translate(cx, cy)
-        composed_t.rotate(layer.Layer_rotation)
-        composed_t.scale(layer.Layer_scale, layer.Layer_scale)
-        composed_t.translate(-cx, -cy)
-        offset = getattr(layer, 'Layer_offset', (0,0))
-        # Only apply rotation and scale to the transform
-        # Offset will be used as the draw position
-        # Debug print to confirm visual update, opacity, and transform
-        print(f"[DEBUG][CANVAS] Drawing layer '{getattr(layer, 'Layer_name', '?')}' (id={id(layer)})")
-        print(f"    Offset used: {offset}")
-        print(f"    Layer_offset property: {getattr(layer, 'Layer_offset', None)}")
-        print(f"    Opacity: {getattr(layer, 'Layer_opacity', 1.0)}")
-        print(f"    Rotation: {getattr(layer, 'Layer_rotation', 0.0)}")
-        print(f"    Scale: {getattr(layer, 'Layer_scale', 1.0)}")
-        print(f"    QTransform matrix: {composed_t}")
-        # Transform mask too if present
-        if layer.Layer_mask is not None and not layer.Layer_mask.isNull():
-            mask_img = layer.Layer_mask.transformed(composed_t, Qt.SmoothTransformation)
-        else:
-            mask_img = None
-        transformed_img = composed_img.transformed(composed_t, Qt.SmoothTransformation)
-        if mask_img is not None:
-            transformed_img.setAlphaChannel(mask_img)
-        painter.setOpacity(getattr(layer, 'Layer_opacity', 1.0))
-        painter.drawImage(offset[0], offset[1], transformed_img)
-        print(f"    [DRAW] At position ({offset[0]}, {offset[1]}) on base canvas")
-        painter.setOpacity(1.0)  # Reset for next layer
-        drew_any = True
+        if LayeredImage_draw_layer_region(painter, layer, region_rect, result_img.format()):
+            drew_any = True
+    painter.end()
+    if LayeredImage_DEBUG_COMPOSITE:
         # --- Validation: Sample composited image at several points ---
         sample_points = [(0,0), (int(base_width/2), int(base_height/2)), (base_width-1, base_height-1)]
         for (sx, sy) in sample_points:
             if 0 <= sx < result_img.width() and 0 <= sy < result_img.height():
                 rgba = result_img.pixelColor(sx, sy).getRgb()
                 print(f"    [VALIDATE] Pixel at ({sx},{sy}): RGBA={rgba}")
-    painter.end()
-    if not drew_any and base_layer.Layer_image is not None and not base_layer.Layer_image.isNull():
+    if not incremental and not drew_any and base_layer.Layer_image is not None and not base_layer.Layer_image.isNull():
         # Draw the base layer image directly if nothing else was drawn
         result_img = base_layer.Layer_image.copy()
     return result_img
@@ -472,6 +602,238 @@ def LayeredImage_blend_adjustment_layer(base, adj_img):
     result[mask] = adj_np[mask]
     return QImage(result.data, w, h, 4*w, QImage.Format_RGBA8888).copy()
 
+class LayeredImageStackCache:
+    """
+    Flattened buffers of the visible layers below and above the active layer, so a mask stroke on the active layer
+    costs two blends in the damaged region (below+active, then above) however deep the stack is.
+    Each buffer remembers the state signature of the layers it was built from and is used only while that still
+    matches, so edits to those layers invalidate it and strokes on the active layer never do. Rebuilds run on a
+    background thread; until they land, strokes fall back to the regular region composite.
+    """
+    def __init__(self):
+        self.LayeredImageStackCache_lock = threading.Lock()
+        self.LayeredImageStackCache_active_layer = None
+        self.LayeredImageStackCache_below = None  # (signature, QImage)
+        self.LayeredImageStackCache_above = None  # (signature, QImage)
+        self.LayeredImageStackCache_pending = None  # (active layer, below signature, above signature) being built
+        self.LayeredImageStackCache_generation = 0
+
+    @staticmethod
+    def LayeredImageStackCache_signature(layers, width, height):
+        return (width, height) + tuple((id(layer),) + LayeredImage_layer_state_key(layer) for layer in layers)
+
+    @staticmethod
+    def LayeredImageStackCache_split(project, active_idx):
+        """(active layer, below layers, above layers, canvas width, canvas height), or None without a usable base/active layer."""
+        layers = project.get_all_layers() if project else []
+        base_layer = project.LayeredImageProject_base_layer if project else None
+        if active_idx is None or not (0 <= active_idx < len(layers)) or base_layer is None or base_layer.Layer_image is None or base_layer.Layer_image.isNull():
+            return None
+        return layers[active_idx], layers[:active_idx], layers[active_idx+1:], base_layer.Layer_image.width(), base_layer.Layer_image.height()
+
+    def LayeredImageStackCache_request(self, project, active_idx):
+        """Start a background rebuild of whichever buffer is missing or stale for this active layer (no-op when current)."""
+        split = self.LayeredImageStackCache_split(project, active_idx)
+        if split is None:
+            return
+        active_layer, below_layers, above_layers, width, height = split
+        below_signature = self.LayeredImageStackCache_signature(below_layers, width, height)
+        above_signature = self.LayeredImageStackCache_signature(above_layers, width, height)
+        with self.LayeredImageStackCache_lock:
+            if active_layer is not self.LayeredImageStackCache_active_layer:
+                self.LayeredImageStackCache_active_layer = active_layer
+                self.LayeredImageStackCache_below = None
+                self.LayeredImageStackCache_above = None
+            build_below = self.LayeredImageStackCache_below is None or self.LayeredImageStackCache_below[0] != below_signature
+            build_above = self.LayeredImageStackCache_above is None or self.LayeredImageStackCache_above[0] != above_signature
+            if not (build_below or build_above) or self.LayeredImageStackCache_pending == (active_layer, below_signature, above_signature):
+                return
+            self.LayeredImageStackCache_pending = (active_layer, below_signature, above_signature)
+            self.LayeredImageStackCache_generation += 1
+            generation = self.LayeredImageStackCache_generation
+        jobs = []
+        if build_below:
+            jobs.append(('below', list(below_layers), below_signature))
+        if build_above:
+            jobs.append(('above', list(above_layers), above_signature))
+        if LayeredImage_DEBUG_COMPOSITE:
+            print(f"[DEBUG][STACK CACHE] Rebuilding {', '.join(job[0] for job in jobs)} for active layer '{active_layer.Layer_name}' in background")
+        threading.Thread(target=self.LayeredImageStackCache_build, args=(generation, jobs, width, height), daemon=True).start()
+
+    def LayeredImageStackCache_build(self, generation, jobs, width, height):
+        built = {name: (signature, LayeredImage_composite_layer_list(layers, width, height)) for name, layers, signature in jobs}
+        with self.LayeredImageStackCache_lock:
+            if generation != self.LayeredImageStackCache_generation:
+                return  # Superseded by a newer request (active layer switched or stack edited meanwhile)
+            if 'below' in built:
+                self.LayeredImageStackCache_below = built['below']
+            if 'above' in built:
+                self.LayeredImageStackCache_above = built['above']
+            self.LayeredImageStackCache_pending = None
+
+    def LayeredImageStackCache_composite_region(self, project, active_idx, result_img, region_rect):
+        """
+        Recomposite region_rect of result_img from the cached buffers and the live active layer.
+        Returns False (and schedules a rebuild) when the buffers are missing or stale.
+        """
+        split = self.LayeredImageStackCache_split(project, active_idx)
+        if split is None:
+            return False
+        active_layer, below_layers, above_layers, width, height = split
+        below_signature = self.LayeredImageStackCache_signature(below_layers, width, height)
+        above_signature = self.LayeredImageStackCache_signature(above_layers, width, height)
+        with self.LayeredImageStackCache_lock:
+            below = self.LayeredImageStackCache_below
+            above = self.LayeredImageStackCache_above
+            valid = (active_layer is self.LayeredImageStackCache_active_layer and below is not None and above is not None
+                     and below[0] == below_signature and above[0] == above_signature)
+        if not valid:
+            self.LayeredImageStackCache_request(project, active_idx)
+            return False
+        region_rect = region_rect.intersected(result_img.rect())
+        if region_rect.isEmpty():
+            return True
+        painter = QPainter(result_img)
+        painter.setClipRect(region_rect)
+        painter.setRenderHints(QPainter.SmoothPixmapTransform | QPainter.Antialiasing)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawImage(region_rect.topLeft(), below[1], region_rect)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        LayeredImage_draw_layer_region(painter, active_layer, region_rect, result_img.format())
+        painter.drawImage(region_rect.topLeft(), above[1], region_rect)
+        painter.end()
+        return True
+
+class LayeredImageTileCompositor:
+    """
+    Canvas composite kept as a grid of LayeredImage_TILE_SIZE tiles with per-tile dirty flags.
+    Each update compares every layer's state key with the one from the previous update; a changed, added, removed or
+    reordered layer only dirties the tiles it covered before and covers now, and coverage leaves out tiles where the
+    layer is fully transparent. The block occupancy behind coverage is only rescanned when the image or mask changes:
+    transform edits remap the cached blocks and opacity edits keep the previous coverage. Dirty tiles are blended independently on a thread pool from just the layers that
+    cover them, so the work follows the changed, non-empty area instead of canvas size times layer count.
+    """
+    def __init__(self, tile_size=LayeredImage_TILE_SIZE, max_workers=None):
+        self.LayeredImageTileCompositor_tile_size = tile_size
+        self.LayeredImageTileCompositor_image = None  # LayeredImage_CANVAS_FORMAT composite, patched in place
+        self.LayeredImageTileCompositor_dirty = None  # np.bool_ (rows, columns)
+        self.LayeredImageTileCompositor_layer_states = {}  # id(layer) -> (layer, state key, coverage, block occupancy)
+        self.LayeredImageTileCompositor_layer_order = []  # ids, bottom to top, as of the last update
+        self.LayeredImageTileCompositor_pool = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 1))
+
+    def LayeredImageTileCompositor_tile_rect(self, column, row):
+        size = self.LayeredImageTileCompositor_tile_size
+        return QRect(column * size, row * size, size, size).intersected(self.LayeredImageTileCompositor_image.rect())
+
+    def LayeredImageTileCompositor_invalidate(self, rect=None):
+        """Mark the tiles touching rect (QRect, canvas pixels), or every tile, for recompositing on the next update."""
+        if self.LayeredImageTileCompositor_dirty is None:
+            return
+        if rect is None:
+            self.LayeredImageTileCompositor_dirty[:] = True
+            return
+        rect = rect.intersected(self.LayeredImageTileCompositor_image.rect())
+        if rect.isEmpty():
+            return
+        size = self.LayeredImageTileCompositor_tile_size
+        self.LayeredImageTileCompositor_dirty[rect.top() // size:rect.bottom() // size + 1, rect.left() // size:rect.right() // size + 1] = True
+
+    def LayeredImageTileCompositor_update(self, project):
+        """
+        Bring the composite up to date with the project. Returns (composite QImage, list of QRect that changed);
+        the image object is reused across updates until the canvas size changes. (None, []) without a base layer.
+        """
+        base_layer = project.LayeredImageProject_base_layer if project else None
+        if base_layer is None or base_layer.Layer_image is None or base_layer.Layer_image.isNull():
+            print('[DEBUG][TILES] No valid base layer for compositing.')
+            return None, []
+        size = self.LayeredImageTileCompositor_tile_size
+        width, height = base_layer.Layer_image.width(), base_layer.Layer_image.height()
+        columns, rows = -(-width // size), -(-height // size)
+        image = self.LayeredImageTileCompositor_image
+        if image is None or image.width() != width or image.height() != height:
+            self.LayeredImageTileCompositor_image = QImage(width, height, LayeredImage_CANVAS_FORMAT)
+            self.LayeredImageTileCompositor_dirty = np.ones((rows, columns), dtype=bool)
+            self.LayeredImageTileCompositor_layer_states = {}
+            self.LayeredImageTileCompositor_layer_order = []
+        dirty = self.LayeredImageTileCompositor_dirty
+        old_states = self.LayeredImageTileCompositor_layer_states
+        layers = project.get_all_layers()
+        states = {}
+        for layer in layers:
+            key = LayeredImage_layer_state_key(layer)
+            old = old_states.get(id(layer))
+            if old is not None and old[0] is layer and old[1] == key:
+                states[id(layer)] = old
+                continue
+            if old is not None and old[0] is not layer:
+                old = None  # id() reused by a new layer; the removal loop below dirties the old coverage
+            # Block occupancy depends on the image and mask only (key[5:]); transform edits just remap it
+            blocks = old[3] if old is not None and old[1][5:] == key[5:] else None
+            if (blocks is not None and old[1][0] == key[0] and old[1][2:] == key[2:]
+                    and old[1][1] > 0 and key[1] > 0):
+                coverage = old[2]  # Opacity-only edit: same tiles, they just need re-blending
+            else:
+                if blocks is None and key[0] and key[1] > 0:
+                    blocks = LayeredImage_layer_block_occupancy(layer, size)
+                coverage = (LayeredImage_layer_tile_coverage(layer, columns, rows, size, blocks) if blocks is not None
+                            else np.zeros((rows, columns), dtype=bool))
+            dirty |= coverage
+            if old is not None:
+                dirty |= old[2]
+            states[id(layer)] = (layer, key, coverage, blocks)
+        for layer_id, old in old_states.items():
+            if layer_id not in states or states[layer_id][0] is not old[0]:
+                dirty |= old[2]  # Removed layer
+        # Reordered layers change the stacking wherever they cover
+        old_order = [layer_id for layer_id in self.LayeredImageTileCompositor_layer_order if layer_id in states]
+        new_order = [id(layer) for layer in layers if id(layer) in old_states]
+        for old_id, new_id in zip(old_order, new_order):
+            if old_id != new_id:
+                dirty |= states[old_id][2]
+                dirty |= states[new_id][2]
+        self.LayeredImageTileCompositor_layer_states = states
+        self.LayeredImageTileCompositor_layer_order = [id(layer) for layer in layers]
+        dirty_tiles = list(zip(*np.nonzero(dirty)))
+        if not dirty_tiles:
+            return self.LayeredImageTileCompositor_image, []
+        jobs = []
+        for row, column in dirty_tiles:
+            tile_rect = self.LayeredImageTileCompositor_tile_rect(int(column), int(row))
+            tile_layers = [layer for layer in layers if states[id(layer)][2][row, column]]
+            future = self.LayeredImageTileCompositor_pool.submit(LayeredImage_render_tile, tile_layers, tile_rect) if tile_layers else None
+            jobs.append((tile_rect, future))
+        painter = QPainter(self.LayeredImageTileCompositor_image)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for tile_rect, future in jobs:
+            if future is None:
+                painter.fillRect(tile_rect, Qt.transparent)
+            else:
+                painter.drawImage(tile_rect.topLeft(), future.result())
+        painter.end()
+        dirty[:] = False
+        if LayeredImage_DEBUG_COMPOSITE:
+            print(f"[DEBUG][TILES] Recomposited {len(jobs)}/{rows * columns} tiles ({sum(future is None for _, future in jobs)} empty)")
+        return self.LayeredImageTileCompositor_image, [tile_rect for tile_rect, _ in jobs]
+
+class CanvasView_CompositeItem(QGraphicsItem):
+    """
+    Scene item drawing the composite QImage directly, so after a brush stroke only the damaged
+    rect is repainted (instead of rebuilding a full-canvas QPixmap and the scene).
+    """
+    def __init__(self, composite_image):
+        super().__init__()
+        self.CanvasView_CompositeItem_image = composite_image
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+    def boundingRect(self):
+        return QRectF(self.CanvasView_CompositeItem_image.rect())
+
+    def paint(self, painter, option, widget=None):
+        exposed_rect = option.exposedRect.toAlignedRect().intersected(self.CanvasView_CompositeItem_image.rect())
+        if not exposed_rect.isEmpty():
+            painter.drawImage(exposed_rect.topLeft(), self.CanvasView_CompositeItem_image, exposed_rect)
+
 class CanvasView(QGraphicsView):
     def __init__(self, editor, project=None, CanvasView_parent=None):
         super().__init__(CanvasView_parent)
@@ -486,6 +848,10 @@ class CanvasView(QGraphicsView):
         self.CanvasView_tools_properties_callback = None
         self.CanvasView_last_hover_color = QColor(0,0,0)
         self.CanvasView_eyedropper_mode = False
+        self.CanvasView_composite_image = None  # Last full composite, patched in place by mask strokes
+        self.CanvasView_composite_item = None
+        self.CanvasView_stack_cache = LayeredImageStackCache()  # Below/above buffers for the active layer while mask painting
+        self.CanvasView_tile_compositor = LayeredImageTileCompositor()  # Owns CanvasView_composite_image, recomposites dirty tiles only
         # --- Standard PyQt setup ---
         self.setAcceptDrops(True)
         self.CanvasView_scene = QGraphicsScene(self)
@@ -502,6 +868,16 @@ class CanvasView(QGraphicsView):
         self.CanvasView_show_alpha_mask = enabled
         self.CanvasView_update_canvas()
 
+    def CanvasView_set_active_layer(self, idx):
+        self.CanvasView_active_layer_idx = idx
+        if self.CanvasView_mask_painting:
+            self.CanvasView_stack_cache.LayeredImageStackCache_request(self.project, idx)
+
+    def CanvasView_set_mask_painting(self, enabled):
+        self.CanvasView_mask_painting = enabled
+        if enabled:
+            self.CanvasView_stack_cache.LayeredImageStackCache_request(self.project, self.CanvasView_active_layer_idx)
+
     def CanvasView_set_eyedropper_mode(self, enabled):
         self.CanvasView_eyedropper_mode = enabled
 
@@ -550,13 +926,27 @@ class CanvasView(QGraphicsView):
         super().mousePressEvent(event)
 
     def CanvasView_get_composited_image(self):
+        if self.CanvasView_composite_image is not None and not self.CanvasView_composite_image.isNull():
+            return self.CanvasView_composite_image
         if self.project and self.project.get_all_layers():
             return LayeredImage_composite_layers(self.project)
         return None
 
-    def CanvasView_update_canvas(self):
+    def CanvasView_update_canvas(self, dirty_rect=None):
+        """
+        Recomposite and redisplay the canvas. With dirty_rect (QRect in canvas pixels), only that region of the
+        current composite is recomposited and repainted; anything else (layer list, transforms, visibility,
+        alpha-mask view) goes through the tile compositor, which redoes just the tiles touched by changed layers.
+        """
+        if (dirty_rect is not None and not self.CanvasView_show_alpha_mask and self.project is not None
+                and self.CanvasView_composite_image is not None and self.CanvasView_composite_item is not None):
+            # Two blends from the cached below/above buffers once ready, otherwise the whole stack in the region
+            if not self.CanvasView_stack_cache.LayeredImageStackCache_composite_region(
+                    self.project, self.CanvasView_active_layer_idx, self.CanvasView_composite_image, dirty_rect):
+                LayeredImage_composite_layers(self.project, dirty_rect, self.CanvasView_composite_image)
+            self.CanvasView_composite_item.update(QRectF(dirty_rect))
+            return
         print('[DEBUG] CanvasView.update_canvas called. self.project =', self.project)
-        self.CanvasView_scene.clear()
         # Always determine base layer (bottom-most visible layer) for canvas size
         base_layer = None
         layers = self.project.get_all_layers() if self.project else []
@@ -568,6 +958,10 @@ class CanvasView(QGraphicsView):
         if base_layer is not None and base_layer.Layer_image is not None and not base_layer.Layer_image.isNull():
             base_width = base_layer.Layer_image.width()
             base_height = base_layer.Layer_image.height()
+        if self.CanvasView_show_alpha_mask or not layers or self.project is None:
+            self.CanvasView_scene.clear()
+            self.CanvasView_composite_image = None
+            self.CanvasView_composite_item = None
         if self.CanvasView_show_alpha_mask:
             idx = self.CanvasView_active_layer_idx
             if idx is not None and 0 <= idx < len(layers):
@@ -590,13 +984,24 @@ class CanvasView(QGraphicsView):
         # Always use the project reference for compositing and sizing
         project = self.project
         if project is not None:
-            base = LayeredImage_composite_layers(project)
+            base, changed_rects = self.CanvasView_tile_compositor.LayeredImageTileCompositor_update(project)
             if base and not base.isNull():
-                pix = QPixmap.fromImage(base)
-                self.CanvasView_scene.addPixmap(pix)
+                item = self.CanvasView_composite_item
+                if item is not None and item.scene() is self.CanvasView_scene and item.CanvasView_CompositeItem_image is base:
+                    # Same composite image patched in place: repaint just the recomposited tiles
+                    for rect in changed_rects:
+                        item.update(QRectF(rect))
+                else:
+                    self.CanvasView_scene.clear()
+                    self.CanvasView_composite_image = base
+                    self.CanvasView_composite_item = CanvasView_CompositeItem(base)
+                    self.CanvasView_scene.addItem(self.CanvasView_composite_item)
                 self.setSceneRect(QRectF(0, 0, base.width(), base.height()))
             else:
                 print('[DEBUG] CanvasView.update_canvas: No valid base image after compositing.')
+                self.CanvasView_scene.clear()
+                self.CanvasView_composite_image = None
+                self.CanvasView_composite_item = None
                 if project.LayeredImageProject_base_layer and project.LayeredImageProject_base_layer.Layer_image:
                     w = project.LayeredImageProject_base_layer.Layer_image.width()
                     h = project.LayeredImageProject_base_layer.Layer_image.height()
@@ -620,19 +1025,27 @@ class CanvasView(QGraphicsView):
         if idx is None or idx < 0 or idx >= len(self.project.get_all_layers()):
             return
         layer = self.project.get_all_layers()[idx]
-        layer = self.CanvasView_layers[idx]
+        if layer.Layer_image is None or layer.Layer_image.isNull():
+            return
         if layer.Layer_mask is None:
             layer.Layer_mask = QImage(layer.Layer_image.size(), QImage.Format_Grayscale8)
             layer.Layer_mask.fill(255)
+        canvas_to_layer, invertible = LayeredImage_layer_canvas_transform(layer).inverted()
+        if not invertible:
+            return
         scene_pos = self.mapToScene(pos)
         x = int(scene_pos.x())
         y = int(scene_pos.y())
+        # Dab in canvas coordinates, mapped into the (possibly moved/scaled/rotated) layer's mask
+        brush_rect = QRectF(x-self.CanvasView_brush_radius//2, y-self.CanvasView_brush_radius//2, self.CanvasView_brush_radius, self.CanvasView_brush_radius)
         painter = QPainter(layer.Layer_mask)
+        painter.setTransform(canvas_to_layer)
         painter.setPen(Qt.NoPen)
         painter.setBrush(self.CanvasView_brush_color)
-        painter.drawEllipse(x-self.CanvasView_brush_radius//2, y-self.CanvasView_brush_radius//2, self.CanvasView_brush_radius, self.CanvasView_brush_radius)
+        painter.drawEllipse(brush_rect)
         painter.end()
-        self.CanvasView_update_canvas()
+        # Damaged canvas area: the dab plus a margin for antialiasing and smooth-transform filtering
+        self.CanvasView_update_canvas(dirty_rect=brush_rect.toAlignedRect().adjusted(-3, -3, 3, 3))
 
     @staticmethod
     def LayeredImage_blend_images_static(base, top, opacity=1.0, blend_mode='Normal'):
@@ -1052,8 +1465,8 @@ class LayeredImageEditor(QMainWindow):
     def LayeredImageEditor_toggle_mask_paint(self):
         idx = self.LayerListWidget_layer_list.currentRow()
         if 0 <= idx < len(self.LayeredImageEditor_project.get_all_layers()):
-            self.canvas.mask_painting = not self.canvas.mask_painting
-            self.canvas.active_layer_idx = idx
+            self.canvas.CanvasView_set_active_layer(idx)
+            self.canvas.CanvasView_set_mask_painting(not self.canvas.CanvasView_mask_painting)
 
     def LayeredImageEditor_save_project(self):
         fname, _ = QFileDialog.getSaveFileName(self, 'Save Project', '', 'Layered Image Project (*.json)')
@@ -1195,7 +1608,7 @@ class LayeredImageEditor(QMainWindow):
     def LayeredImageEditor_on_layer_selected(self):
         self.debug_print_layer_stack('on_layer_selected')
         LayeredImageEditor_selected_layer_index = self.LayerListWidget_layer_list.currentRow()
-        self.canvas.active_layer_idx = LayeredImageEditor_selected_layer_index
+        self.canvas.CanvasView_set_active_layer(LayeredImageEditor_selected_layer_index)
         self.LayeredImageEditor_update_properties_panel(LayeredImageEditor_selected_layer_index)
 
     def LayeredImageEditor_update_properties_panel(self, LayeredImageEditor_selected_layer_index):